@@ -0,0 +1,76 @@
+"""
+Compare the display conversion of ImageDisplayer with the previous path : color conversion and Image.fromarray
+at full resolution, then a PIL LANCZOS downscale to the canvas.
+
+    python benchmarks/bench_display_convert.py [--repeat N]
+"""
+import argparse
+import os
+import queue
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_processing_gui.image_system.image_displayer import ImageDisplayer
+
+
+SOURCE_SIZES = {'1080p': (1920, 1080), '4K': (3840, 2160)}
+DISPLAY_WIDTHS = (600, 1280)
+
+
+def fit(image_size, display_width):
+    image_width, image_height = image_size
+    return display_width, int(display_width * image_height / image_width)
+
+
+def convert_full_resolution(image, display_size):
+    if image.ndim == 2:
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_GRAY2RGB))
+    else:
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+    return pil_image.resize(display_size, Image.LANCZOS)
+
+
+def measure(function, repeat: int) -> float:
+    function()
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+
+    print(f'{"source":<8} {"channels":>8} {"display":>8} {"previous ms":>12} {"current ms":>11} {"speedup":>8}')
+
+    for source_name, (width, height) in SOURCE_SIZES.items():
+        for channels in (3, 1):
+            shape = (height, width, 3) if channels == 3 else (height, width)
+            image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+
+            for display_width in DISPLAY_WIDTHS:
+                display_size = fit((width, height), display_width)
+                displayer = ImageDisplayer(queue.Queue(), get_display_size=lambda size, display_size=display_size: display_size)
+
+                previous_ms = measure(lambda: convert_full_resolution(image, display_size), args.repeat)
+                current_ms = measure(lambda: displayer.convert(image), args.repeat)
+
+                print(f'{source_name:<8} {channels:>8} {display_width:>8} {previous_ms:>12.2f} {current_ms:>11.2f} '
+                      f'{previous_ms / current_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Subscriber resolution and dispatch cost of the EventBroker with thousands of events and subscribers, with the resolved
+subscribers cached, with the cache cleared before every resolution, and against scanning every subscription.
+
+The callbacks do nothing, so that the time measured is the resolution and the delivery.
+
+    python benchmarks/bench_event_broker.py [--events N] [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_processing_gui.events.event_broker import EventBroker
+from image_processing_gui.events.event_constants import separator
+
+
+class Subscriber:
+
+    def on_event(self, event, *args, **kwargs):
+        pass
+
+
+def create_events(event_count: int) -> list:
+    return [separator.join((f'source{index % 50}', f'action{index % 20}', f'target{index}')) for index in range(event_count)]
+
+
+def create_broker(events: list, subscribers_per_event: int, wildcard_count: int):
+    broker = EventBroker()
+    subscribers = []
+    patterns = []
+
+    for event in events:
+        for _ in range(subscribers_per_event):
+            subscriber = Subscriber()
+            subscribers.append(subscriber)
+            broker.subscribe(event, subscriber.on_event)
+
+    # Keyword, sequence and regex subscriptions in equal parts
+    for index in range(wildcard_count):
+        subscriber = Subscriber()
+        subscribers.append(subscriber)
+
+        if index % 3 == 0:
+            broker.subscribe_keyword(f'source{index % 50}', subscriber.on_event, index=0)
+            patterns.append(lambda event, keyword=f'source{index % 50}': event.split(separator)[0] == keyword)
+        elif index % 3 == 1:
+            broker.subscribe_sequence(f'action{index % 20}{separator}', subscriber.on_event)
+            patterns.append(lambda event, sequence=f'action{index % 20}{separator}': sequence in event)
+        else:
+            broker.subscribe_regex(rf'source\d+\|action{index % 20}\|', subscriber.on_event)
+            patterns.append(re.compile(rf'source\d+\|action{index % 20}\|').match)
+
+    return broker, subscribers, patterns
+
+
+def resolve_scan(broker, patterns, event):
+    """
+    Resolution without an index : every wildcard subscription is matched against the event.
+    """
+    return list(broker.subscriptions.get(event, ())) + [match for match in patterns if match(event)]
+
+
+def measure(function, events: list, repeat: int) -> float:
+    for event in events:
+        function(event)
+
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        for event in events:
+            function(event)
+
+    return (time.perf_counter() - start) / (repeat * len(events)) * 1e6
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    events = create_events(args.events)
+
+    print(f'{"events":>6} {"subscribers":>11} {"wildcards":>9} {"cached resolve us":>18} {"cold resolve us":>16} '
+          f'{"scan resolve us":>16} {"dispatch us":>12}')
+
+    for subscribers_per_event, wildcard_count in ((1, 0), (1, 30), (4, 30), (4, 300), (8, 3000)):
+        broker, subscribers, patterns = create_broker(events, subscribers_per_event, wildcard_count)
+
+        def resolve_cold(event):
+            broker._resolved_subscriptions.clear()
+            return broker.resolve(event)
+
+        cached_us = measure(broker.resolve, events, args.repeat)
+        cold_us = measure(resolve_cold, events, max(1, args.repeat // 10))
+        scan_us = measure(lambda event: resolve_scan(broker, patterns, event), events, max(1, args.repeat // 10))
+        dispatch_us = measure(broker.dispatch, events, args.repeat)
+
+        print(f'{len(events):>6} {len(subscribers):>11} {wildcard_count:>9} {cached_us:>18.2f} {cold_us:>16.2f} '
+              f'{scan_us:>16.2f} {dispatch_us:>12.2f}')
+
+        broker.shutdown()
+
+
+if __name__ == '__main__':
+    main()
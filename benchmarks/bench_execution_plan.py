@@ -0,0 +1,92 @@
+"""
+Per-frame dispatch overhead of a compiled ExecutionPlan, against walking the sorted processor containers
+and calling ImageProcessorFunction.process() on every processor, as ImageProcessorSequence.process() used to.
+
+The frames are tiny, so that the time measured is the dispatch and not the OpenCV functions.
+
+    python benchmarks/bench_execution_plan.py [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_processing_gui.image_system.execution_plan import ExecutionPlan
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction, ImageProcessorSequenceSet
+
+
+def create_processor_set(stage_count: int, disabled_count: int = 0) -> ImageProcessorSequenceSet:
+    processor_set = ImageProcessorSequenceSet()
+
+    for index in range(stage_count + disabled_count):
+        processor = ImageProcessorFunction(name=f'morph_{index}', callback=cv2.morphologyEx, source_keyword='src',
+                                           enabled=True, priority=index, op=cv2.MORPH_DILATE,
+                                           kernel=np.ones((1, 1), np.uint8), iterations=1)
+        processor_set.add(processor)
+
+        # Disabled processors are kept in the container by the interpreted path, dropped by the plan
+        if index >= stage_count:
+            next(p for p in processor_set.processor_sequence if p.name == processor.name).enabled = False
+
+    return processor_set
+
+
+def process_interpreted(processor_set, target):
+    for processor in processor_set.processor_sequence:
+        target = processor.process(target)
+
+    return target
+
+
+def process_direct(stage_count, target, kernel=np.ones((1, 1), np.uint8)):
+    for _ in range(stage_count):
+        target = cv2.morphologyEx(target, cv2.MORPH_DILATE, kernel, iterations=1)
+
+    return target
+
+
+def measure(function, frames: int) -> float:
+    function()
+    start = time.perf_counter()
+
+    for _ in range(frames):
+        function()
+
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    image = np.zeros((8, 8), dtype=np.uint8)
+
+    # The overhead is the time per frame beyond calling the OpenCV functions directly
+    print(f'{"stages":>6} {"disabled":>8} {"direct us":>10} {"interpreted us":>15} {"plan us":>9} '
+          f'{"interpreted overhead":>21} {"plan overhead":>14} {"compile us":>11}')
+
+    for stage_count, disabled_count in ((1, 0), (4, 0), (8, 0), (8, 4), (16, 0)):
+        processor_set = create_processor_set(stage_count, disabled_count)
+        plan = processor_set.compile()
+
+        assert len(plan) == stage_count
+        assert np.array_equal(plan.process(image), process_interpreted(processor_set, image))
+
+        direct_us = measure(lambda: process_direct(stage_count, image), args.frames)
+        interpreted_us = measure(lambda: process_interpreted(processor_set, image), args.frames)
+        plan_us = measure(lambda: plan.process(image), args.frames)
+        compile_us = measure(lambda: ExecutionPlan(step for processor in processor_set.processor_sequence
+                                                   for step in processor.compile_steps()), args.frames // 10)
+
+        print(f'{stage_count:>6} {disabled_count:>8} {direct_us:>10.2f} {interpreted_us:>15.2f} {plan_us:>9.2f} '
+              f'{interpreted_us - direct_us:>21.2f} {plan_us - direct_us:>14.2f} {compile_us:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
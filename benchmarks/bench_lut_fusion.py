@@ -0,0 +1,80 @@
+"""
+Throughput of runs of point-wise threshold stages fused into a single cv2.LUT pass, against running the stages one by one.
+Runs of any length are fused, to find the run length from which fusion pays off (ExecutionPlan.MIN_FUSED_RUN).
+
+    python benchmarks/bench_lut_fusion.py [--size WIDTHxHEIGHT] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_processing_gui.image_system.execution_plan import ExecutionPlan
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction
+
+
+THRESHOLD_CHAIN = (
+    (cv2.THRESH_TOZERO, 20),
+    (cv2.THRESH_TRUNC, 230),
+    (cv2.THRESH_TOZERO_INV, 200),
+    (cv2.THRESH_TOZERO, 60),
+    (cv2.THRESH_TOZERO_INV, 240),
+    (cv2.THRESH_TRUNC, 180),
+    (cv2.THRESH_TOZERO, 30),
+    (cv2.THRESH_BINARY, 100)
+)
+
+
+def create_steps(chain_length: int) -> list:
+    return [ImageProcessorFunction(name='threshold', callback=cv2.threshold, source_keyword='src', return_index=1,
+                                   enabled=True, thresh=thresh, maxval=255, type=threshold_type).compile_steps()[0]
+            for threshold_type, thresh in THRESHOLD_CHAIN[:chain_length]]
+
+
+def measure(function, repeat: int) -> float:
+    function()
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.size.split('x'))
+    rng = np.random.default_rng(0)
+
+    print(f'{width}x{height} uint8')
+    print(f'{"channels":>8} {"stages":>6} {"sequential ms":>14} {"fused ms":>9} {"speedup":>8} {"fused Mpx/s":>12}')
+
+    for channels in (1, 3):
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+
+        for chain_length in range(2, len(THRESHOLD_CHAIN) + 1):
+            steps = create_steps(chain_length)
+            sequential_plan = ExecutionPlan(steps, fuse=False)
+            fused_plan = ExecutionPlan(steps, min_fused_run=2)
+
+            assert np.array_equal(fused_plan.process(image), sequential_plan.process(image))
+
+            sequential_ms = measure(lambda: sequential_plan.process(image), args.repeat)
+            fused_ms = measure(lambda: fused_plan.process(image), args.repeat)
+
+            print(f'{channels:>8} {chain_length:>6} {sequential_ms:>14.2f} {fused_ms:>9.2f} '
+                  f'{sequential_ms / fused_ms:>7.1f}x {width * height / fused_ms / 1000:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
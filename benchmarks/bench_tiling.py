@@ -0,0 +1,76 @@
+"""
+Scaling of TiledStageExecutor with the number of worker threads, against the untiled stage.
+
+    python benchmarks/bench_tiling.py [--size WIDTHxHEIGHT] [--workers 1,2,4,8] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction
+from image_processing_gui.image_system.image_tiling import TiledStageExecutor
+
+
+def create_stages():
+    return {
+        'morph close 5x5 x2': ImageProcessorFunction(name='morph', callback=cv2.morphologyEx, source_keyword='src', enabled=True,
+                                                     op=cv2.MORPH_CLOSE, kernel=np.ones((5, 5), np.uint8), iterations=2),
+        'morph gradient 9x9': ImageProcessorFunction(name='morph', callback=cv2.morphologyEx, source_keyword='src', enabled=True,
+                                                     op=cv2.MORPH_GRADIENT, kernel=np.ones((9, 9), np.uint8), iterations=1),
+        'threshold binary': ImageProcessorFunction(name='threshold', callback=cv2.threshold, source_keyword='src', return_index=1,
+                                                   enabled=True, thresh=127, maxval=255, type=cv2.THRESH_BINARY),
+    }
+
+
+def measure(function, repeat: int) -> float:
+    function()
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='6000x4000')
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.size.split('x'))
+    worker_counts = [int(value) for value in args.workers.split(',')]
+
+    image = np.random.default_rng(0).integers(0, 256, size=(height, width), dtype=np.uint8)
+
+    # OpenCV parallelizes some functions itself, keep it single threaded to measure the tiling alone
+    cv2.setNumThreads(1)
+
+    print(f'{os.cpu_count()} cores, {width}x{height} uint8')
+    print(f'{"stage":<22} {"untiled ms":>11}' + ''.join(f'{f"{count} threads":>18}' for count in worker_counts))
+
+    for stage_name, processor in create_stages().items():
+        step = processor.compile_steps()[0]
+        untiled_ms = measure(lambda: step.process(image), args.repeat)
+
+        results = []
+
+        for worker_count in worker_counts:
+            tile_executor = TiledStageExecutor(max_workers=worker_count)
+            tiled_ms = measure(lambda: tile_executor.process(step, image), args.repeat)
+            tile_executor.shutdown()
+
+            results.append(f'{tiled_ms:>9.1f} ({untiled_ms / tiled_ms:>4.2f}x)')
+
+        print(f'{stage_name:<22} {untiled_ms:>11.1f}' + ''.join(f'{result:>18}' for result in results))
+
+
+if __name__ == '__main__':
+    main()
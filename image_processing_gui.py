@@ -1,6 +1,7 @@
 from image_processing_gui.app import App
 
 import sys, os 
+import argparse
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
         return os.path.join(sys._MEIPASS, relative_path)
@@ -12,5 +13,16 @@ if getattr(sys, 'frozen', False):
     config_file = DIRPATH+"//outside_folder//config.yml"
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Image processing GUI.')
+    parser.add_argument('--replay', metavar='SESSION', default=None, help='Replay a recorded session once the application started.')
+    parser.add_argument('--speed', type=float, default=1.0, help='The replay speed relative to the recording. Defaults to 1.')
+    parser.add_argument('--max-speed', action='store_true', help='Replay the events as fast as possible.')
+    parser.add_argument('--exit-after-replay', action='store_true', help='Close the application once the session was replayed.')
+    args = parser.parse_args()
+
     app = App()
+
+    if args.replay is not None:
+        app.replay_session(args.replay, None if args.max_speed else args.speed, args.exit_after_replay)
+
     app.root.mainloop()
@@ -9,12 +9,15 @@ from .frames.display_frame import DisplayFrame
 from .frames.toolbar_frame import ToolbarFrame
 
 from .image_processing.opencv.opencv_sidebar import OpenCVSidebar
+from .image_processing.opencv.opencv_pipeline import OpenCVEventCodec
+from .image_system.stage_profiler import StageProfiler
 
 
 from .events import event_constants as events
 from .events.event_broker import EventBroker
 from .events.event_subscriber import EventSubscriber
 from .events.event_publisher import EventPublisher
+from .events.event_recorder import EventReplayer
 
 import sys
 
@@ -24,6 +27,8 @@ import logging
 
 class App:
 
+    # Time left to the main loop to render the last replayed events before exiting, in milliseconds
+    REPLAY_EXIT_DELAY = 1000
 
     def __init__(self):
 
@@ -103,6 +108,11 @@ class App:
 
         self.event_subscriber.subscribe(events.MenuEvent.TOGGLE_CONSOLE, self.on_toggle_console)
         self.event_subscriber.subscribe(events.MenuEvent.TOGGLE_SIDEBAR, self.on_toggle_sidebar)
+        self.event_subscriber.subscribe(events.MenuEvent.TOGGLE_PROFILER, self.on_toggle_profiler)
+        self.event_subscriber.subscribe(events.MenuEvent.SHOW_PROFILER, self.on_show_profiler)
+        self.event_subscriber.subscribe(events.MenuEvent.RESET_PROFILER, self.on_reset_profiler)
+        self.event_subscriber.subscribe(events.MenuEvent.TOGGLE_EVENT_TRACER, self.on_toggle_event_tracer)
+        self.event_subscriber.subscribe(events.MenuEvent.TOGGLE_RECORDER, self.on_toggle_recorder)
 
     def on_toggle_console(self, event, state):
         self.console_visible = state
@@ -122,6 +132,65 @@ class App:
         
         self.update_layout()
 
+    def on_toggle_profiler(self, event, state):
+        StageProfiler.shared().enabled = state
+        self.logger.info(f"Stage profiler {'enabled' if state else 'disabled'}")
+
+    def on_show_profiler(self, event):
+        self.logger.info('Stage profiler report :\n' + StageProfiler.shared().report())
+
+    def on_reset_profiler(self, event):
+        StageProfiler.shared().reset()
+
+    def on_toggle_event_tracer(self, event, state):
+        if state:
+            self.event_broker.start_tracing()
+            self.logger.info('Event tracer enabled')
+            return
+
+        tracer = self.event_broker.stop_tracing()
+
+        if tracer is not None:
+            self.logger.info('Event tracer report :\n' + tracer.report())
+
+    def on_toggle_recorder(self, event, state, filename=None):
+        if state:
+            self.event_broker.start_recording(filename, OpenCVEventCodec(),
+                                              ignored_events=[events.MenuEvent.TOGGLE_RECORDER])
+            self.logger.info(f'Recording session to {filename}')
+            return
+
+        self.event_broker.stop_recording()
+
+    def replay_session(self, filename, speed=1.0, exit_when_done=False):
+        """
+        Replay a recorded session against the application, from its main loop.
+
+        Parameters
+        ----------
+        filename : str
+            The session recorded with Tools > Record Session.
+
+        speed : float | None, optional = 1.0
+            The replay speed relative to the recording. If None, events are replayed as fast as possible.
+
+        exit_when_done : bool, optional = False
+            If True, the application is closed once the session was replayed, e.g. for benchmarks.
+        """
+        event_replayer = EventReplayer(filename, OpenCVEventCodec())
+        self.logger.info(f'Replaying {len(event_replayer)} events from {filename}')
+
+        def on_done(seconds):
+            self.logger.info(f'Session replayed in {seconds:.2f} s (recorded in {event_replayer.duration:.2f} s)')
+
+            if StageProfiler.shared().enabled:
+                self.logger.info('Stage profiler report :\n' + StageProfiler.shared().report())
+
+            if exit_when_done:
+                self.root.after(self.REPLAY_EXIT_DELAY, self.root.destroy)
+
+        event_replayer.schedule(self.root, self.event_broker, speed, on_done)
+
     def update_layout(self):
         updated_display_layout = self.display_layout.copy()
         updated_console_layout = self.console_layout.copy()
@@ -0,0 +1,82 @@
+"""
+Headless batch runner. Process images, image directories and videos through a saved pipeline,
+without a display.
+
+    python -m image_processing_gui.batch PIPELINE INPUT [INPUT ...] --output OUTPUT_DIR [--workers N] [--profile]
+
+This module must never import tkinter, PIL.ImageTk or ttkthemes, directly or through the modules it imports.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from .image_system.image_batch import BatchProcessor
+from .image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m image_processing_gui.batch',
+                                     description='Process images, image directories and videos through a saved pipeline.')
+
+    parser.add_argument('pipeline', help='The saved pipeline file (.json, .yaml or .yml).')
+    parser.add_argument('inputs', nargs='+', help='Image files, directories of images or video files.')
+    parser.add_argument('-o', '--output', required=True, help='The directory the results are written to.')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='The number of worker processes. Defaults to the number of cores.')
+    parser.add_argument('--profile', action='store_true', help='Profile every stage and print the statistics.')
+
+    return parser
+
+
+def run(pipeline_path: str, inputs: list, output_dir: str, max_workers: int = None, profile: bool = False) -> BatchProcessor:
+    pipeline_spec = OpenCVPipelineSpec.load(pipeline_path)
+    logger.info(f'Loaded pipeline {pipeline_spec.fingerprint()} with {len(pipeline_spec)} stages from {pipeline_path}')
+
+    # Keep the canonical pipeline along with the results, so that they can be traced back to it
+    os.makedirs(output_dir, exist_ok=True)
+    pipeline_spec.save(os.path.join(output_dir, 'pipeline.json'))
+
+    image_files = []
+
+    with BatchProcessor(pipeline_spec, max_workers=max_workers, profile=profile) as batch_processor:
+        for source in inputs:
+            if os.path.isdir(source):
+                source_name = os.path.basename(os.path.normpath(source))
+                image_paths = BatchProcessor.list_images(source)
+                logger.info(f'Processing {len(image_paths)} images from {source}')
+                batch_processor.process_files(image_paths, os.path.join(output_dir, source_name))
+
+            elif source.lower().endswith(BatchProcessor.IMAGE_EXTENSIONS):
+                image_files.append(source)
+
+            else:
+                source_name = os.path.splitext(os.path.basename(source))[0]
+                logger.info(f'Processing video {source}')
+                batch_processor.process_video(source, os.path.join(output_dir, source_name))
+
+        if image_files:
+            logger.info(f'Processing {len(image_files)} images')
+            batch_processor.process_files(image_files, output_dir)
+
+    return batch_processor
+
+
+def main(argv: list = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+
+    args = create_parser().parse_args(argv)
+    batch_processor = run(args.pipeline, args.inputs, args.output, args.workers, args.profile)
+
+    print(batch_processor.statistics.report())
+
+    if args.profile:
+        print(batch_processor.profiler.report())
+
+    return 1 if batch_processor.statistics.failed_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
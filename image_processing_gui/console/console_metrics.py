@@ -0,0 +1,154 @@
+import logging
+
+import tkinter as tk
+from tkinter import ttk
+from tkinter import filedialog
+
+
+from .console_tab import ConsoleTab
+from ..image_system.metrics_registry import MetricsRegistry, get_process_rss
+from ..image_system.stage_profiler import StageProfiler
+from ..events.event_constants import *
+from ..events.event_broker import EventBroker
+from ..events.event_subscriber import EventSubscriber
+from ..events.event_publisher import EventPublisher
+
+
+class ConsoleMetrics(ConsoleTab, tk.Text):
+    """
+    Live performance dashboard. The metrics are read from the MetricsRegistry and the StageProfiler
+    on a timer, the hot path never waits on the dashboard.
+    """
+
+    metrics_initialdir = '.'
+
+    REFRESH_DELAY = 500
+
+    # Metrics displayed for every source, with their format
+    METRIC_FORMATS = {
+        'fps': '{:.1f}',
+        'latency_ms': '{:.1f}',
+        'queue_depth': '{:d}',
+        'cache_hit_ratio': '{:.0%}',
+        'dropped_frames': '{:d}',
+        'duplicated_frames': '{:d}'
+    }
+
+    def __init__(self, event_broker: EventBroker, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+
+        self.logger = logging.getLogger(__name__)
+
+        self.event_broker = event_broker
+        self.event_subscriber = EventSubscriber(event_broker)
+        self.event_publisher = EventPublisher(event_broker)
+
+        self.metrics_registry = MetricsRegistry.shared()
+        self.stage_profiler = StageProfiler.shared()
+
+        self._refresh_id = None
+
+        # Snapshot of the shared StageProfiler when the tab was last cleared, the tab reports the calls made since
+        self._profile_baseline = None
+
+        # ========== Configure Text Widget ========== #
+
+        self.config(state='disabled')
+        self.config(font=("consolas", 10), wrap='none')
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.config(yscrollcommand=self.scrollbar.set)
+
+        self.on_refresh()
+
+    def format_metric(self, metric, value):
+        if value is None:
+            return '-'
+
+        try:
+            return self.METRIC_FORMATS.get(metric, '{}').format(value)
+        except (ValueError, TypeError):
+            return str(value)
+
+    def format_metrics(self) -> str:
+        sources = self.metrics_registry.sources()
+
+        lines = [f'{"source":<16}' + ''.join(f'{metric:>20}' for metric in self.METRIC_FORMATS)]
+
+        for source, metrics in sorted(sources.items()):
+            lines.append(f'{source:<16}' + ''.join(f'{self.format_metric(metric, metrics.get(metric)):>20}'
+                                                   for metric in self.METRIC_FORMATS))
+
+        for source, metrics in sorted(sources.items()):
+            latency_tracker = metrics.get('frame_latency')
+
+            if latency_tracker is None or not latency_tracker.frame_count:
+                continue
+
+            lines.append('')
+            lines.append(f'{source} latency over the last {latency_tracker.window} frames (ms)')
+
+            for stage, stage_percentiles in latency_tracker.percentiles().items():
+                lines.append(f'  {stage:<14}' + ''.join(f'{name[:-3]} {value:>8.2f}    ' 
+                                                        for name, value in stage_percentiles.items()))
+
+        rss = get_process_rss()
+        lines.append('')
+        lines.append(f'Process RSS : {rss / 2**20:.1f} MiB' if rss is not None else 'Process RSS : -')
+        lines.append('')
+
+        if self.stage_profiler.enabled:
+            lines.append(self.stage_profiler.report(self._profile_baseline))
+        else:
+            lines.append('Stage timings : enable Tools > Stage Profiler')
+
+        return '\n'.join(lines)
+
+    def on_refresh(self):
+        self._refresh_id = None
+
+        # Keep the scroll position, the whole text is replaced at every refresh
+        scroll_position = self.yview()[0]
+
+        self.config(state='normal')
+        self.delete('1.0', tk.END)
+        self.insert(tk.END, self.format_metrics())
+        self.config(state='disabled')
+        self.yview_moveto(scroll_position)
+
+        self._refresh_id = self.after(self.REFRESH_DELAY, self.on_refresh)
+
+    def on_save(self):
+        self.logger.info('Saving metrics file...')
+
+        file_path = filedialog.asksaveasfilename(defaultextension='.txt',
+                                                 initialdir=self.metrics_initialdir)
+        if not file_path:
+            self.logger.info('Metrics file save cancelled.')
+            return False
+
+        try:
+            with open(file_path, 'w') as file:
+                file.write(self.format_metrics())
+
+            self.logger.info(f"Metrics file saved to {file_path}")
+
+        except Exception as err:
+            self.logger.error(f"Error saving metrics file: {err}")
+            return False
+
+        return True
+
+    def on_clear(self):
+        # The profiler is shared with the other tabs and the profiler report, it is not reset
+        self._profile_baseline = self.stage_profiler.snapshot()
+
+    def on_close(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+
+        self.destroy()
@@ -1,99 +1,577 @@
 import logging
 import re
+import time
+import itertools
+import functools
+import threading
+import inspect
+import weakref
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from .event_constants import separator
+from .event_tracer import EventTracer
+from .event_recorder import EventRecorder, EventCodec
+
+
+class CoalescePolicy:
+    """
+    Policy of an event whose dispatches are coalesced. Only the latest payload of a coalesced event is kept,
+    and it is delivered when the broker is flushed, at most once per flush.
+    """
+
+    THROTTLE = 'throttle'
+    DEBOUNCE = 'debounce'
+
+    def __init__(self, mode=THROTTLE, interval=0.0):
+        """
+        Parameters
+        ----------
+        mode : str, optional = 'throttle'
+            'throttle' : deliver the latest payload if at least interval seconds passed since the previous delivery.
+            'debounce' : deliver the latest payload once no new payload was dispatched for interval seconds.
+
+        interval : float, optional = 0.0
+            The interval in seconds.
+        """
+        if mode not in (self.THROTTLE, self.DEBOUNCE):
+            raise ValueError(f"Unknown coalesce mode: {mode}")
+
+        self.mode = mode
+        self.interval = interval
+
+    def is_due(self, now, published, delivered):
+        if self.mode == self.DEBOUNCE:
+            return now - published >= self.interval
+
+        return delivered is None or now - delivered >= self.interval
+
+
+class Subscription:
+    """
+    A callback subscribed to an event or an event pattern. The order of the subscriptions is the order
+    callbacks are called in when an event matches several of them.
+
+    The delivery context of the subscription is the thread the callback is called on :
+
+        'inline' : the thread that dispatched the event.
+        'main' : the Tk main thread. Events dispatched from other threads are queued until the broker is flushed.
+        'worker' : a thread of the worker pool of the broker.
+
+    Callbacks are strongly referenced by default. Widgets that are created and destroyed while the application runs
+    subscribe their bound methods with weak=True, so that subscribing does not keep a destroyed widget alive.
+    Once its owner is garbage collected, the callback of a weak subscription is None.
+    """
+
+    __slots__ = ('_callback', 'order', 'context', 'weak')
+
+    INLINE = 'inline'
+    MAIN = 'main'
+    WORKER = 'worker'
+
+    def __init__(self, callback, order: int, context: str = MAIN, weak: bool = False, on_collected=None):
+        """
+        Parameters
+        ----------
+        weak : bool, optional = False
+            If True and the callback is a bound method, the subscription does not keep its owner alive.
+            Other callables (functions, lambdas) are always strongly referenced.
+
+        on_collected : function, optional = None
+            Called with the weak reference once the owner of a weakly referenced callback is garbage collected.
+        """
+        if context not in (self.INLINE, self.MAIN, self.WORKER):
+            raise ValueError(f"Unknown delivery context: {context}")
+
+        self.weak = weak and inspect.ismethod(callback)
+        self._callback = weakref.WeakMethod(callback, on_collected) if self.weak else callback
+        self.order = order
+        self.context = context
+
+    @property
+    def callback(self):
+        return self._callback() if self.weak else self._callback
+
+    @property
+    def is_alive(self) -> bool:
+        return self.callback is not None
+
+    def __repr__(self):
+        return f'Subscription({self.callback}, {self.order}, {self.context})'
 
 
 class EventBroker:
+    """
+    Deliver events to the callbacks subscribed to them.
+
+    Callbacks can be subscribed to an exact event string, or to a pattern : a keyword of the 
+    [SOURCE]|[ACTION]|[TARGET] event strings, a sequence of characters or a regex. Pattern subscriptions 
+    also match the events dispatched after they were made. Subscribers of an event are resolved on its first
+    dispatch and cached until the subscriptions change.
+
+    Events can be dispatched from any thread. Every subscription is delivered in its own context (see Subscription) :
+    callbacks touching Tk widgets keep the default 'main' context, and the events other threads dispatch to them
+    are queued and delivered in batches by flush(), which the Tk main loop calls on every render tick.
+    """
 
     logger = logging.getLogger(__name__)
 
-    def __init__(self):
+    # Number of resolved events kept before the resolution cache is cleared
+    MAX_RESOLVED_EVENTS = 4096
+
+    # Maximum number of queued deliveries flush() runs at once, so that a burst does not freeze the main loop
+    MAX_DELIVERY_BATCH = 256
+
+    WORKER_COUNT = 2
+
+    def __init__(self, main_thread: threading.Thread = None):
+        """
+        Parameters
+        ----------
+        main_thread : threading.Thread, optional = None
+            The thread running the Tk main loop. Defaults to the thread creating the broker.
+        """
+        self.main_thread = main_thread or threading.current_thread()
+
         self.subscriptions = {}
 
+        # Keyword subscriptions indexed by (index, keyword), index being None for keywords at any position
+        self.keyword_subscriptions = {}
+
+        # Sequence and regex subscriptions, indexed by pattern : (match function, subscriptions)
+        self.pattern_subscriptions = {}
+
+        self._resolved_subscriptions = {}
+        self._subscription_order = itertools.count()
+        self._lock = threading.RLock()
+
+        # Number of weakly referenced callbacks collected since the subscriptions were last pruned
+        self._collected_count = 0
+
+        # Deliveries to the main thread, appended by other threads. deque.append and popleft are atomic.
+        self._main_deliveries = collections.deque()
+        self._worker_pool = None
+
+        # Set by start_tracing(), None when tracing is disabled
+        self.tracer = None
+
+        # Set by start_recording(), None when no session is recorded
+        self.recorder = None
+
+        self.coalesce_policies = {}
+        self._coalesced_events = {}
+        self._coalesced_deliveries = {}
+
     # ==================== SUBSCRIPTION METHODS ==================== #
 
-    def subscribe(self, event, callback):
-        if event not in self.subscriptions:
-            self.subscriptions[event] = []
+    def subscribe(self, event, callback, context=Subscription.MAIN, weak=False):
+        with self._lock:
+            self._add_subscription(self.subscriptions, event, callback, context, weak)
+            self._resolved_subscriptions.pop(event, None)
 
-        self.subscriptions[event].append(callback)
+    def subscribe_keyword(self, event_keyword, callback, index=None, context=Subscription.MAIN, weak=False):
+        """
+        Subscribe to every event containing the keyword, at a specific index of the event string if given. 
+        This does not account for sequences, only for specific keywords delimited by the separator in the event_constants module.
+        """
+        with self._lock:
+            self._add_subscription(self.keyword_subscriptions, (index, event_keyword), callback, context, weak)
+            self._resolved_subscriptions.clear()
+
+    def subscribe_sequence(self, event_sequence, callback, context=Subscription.MAIN, weak=False):
+        """
+        Subscribe to every event containing a sequence of characters.
+        """
+        pattern_key = ('sequence', event_sequence)
 
-    def subscribe_keyword(self, event_keyword, callback, index=None):
-        self._filter_events_containing_keyword(self.subscribe, event_keyword, callback, index)
+        with self._lock:
+            if pattern_key not in self.pattern_subscriptions:
+                self.pattern_subscriptions[pattern_key] = (lambda event: event_sequence in event, [])
 
-    def subscribe_sequence(self, event_sequence, callback):
-        self._filter_events_containing_sequence(self.subscribe, event_sequence, callback)
+            self._add_subscription(self.pattern_subscriptions[pattern_key][1], None, callback, context, weak)
+            self._resolved_subscriptions.clear()
 
-    def subscribe_regex(self, event_regex, callback):
-        self._filter_events_matching_regex(self.subscribe, event_regex, callback)
+    def subscribe_regex(self, event_regex, callback, context=Subscription.MAIN, weak=False):
+        """
+        Subscribe to every event matching a regex pattern.
+        """
+        pattern_key = ('regex', event_regex)
+
+        with self._lock:
+            if pattern_key not in self.pattern_subscriptions:
+                self.pattern_subscriptions[pattern_key] = (re.compile(event_regex).match, [])
+
+            self._add_subscription(self.pattern_subscriptions[pattern_key][1], None, callback, context, weak)
+            self._resolved_subscriptions.clear()
 
     # ==================== UNSUBSCRIPTION METHODS ==================== #
 
     def unsubscribe(self, event, callback):
-        if event not in self.subscriptions:
-            return
-        try:
-            self.subscriptions[event].remove(callback)
-        except ValueError:
-            pass
+        with self._lock:
+            if self._remove_subscription(self.subscriptions.get(event), callback):
+                self._resolved_subscriptions.pop(event, None)
 
     def unsubscribe_keyword(self, event_keyword, callback, index=None):
-        self._filter_events_containing_keyword(self.unsubscribe, event_keyword, callback, index)
+        with self._lock:
+            if self._remove_subscription(self.keyword_subscriptions.get((index, event_keyword)), callback):
+                self._resolved_subscriptions.clear()
 
     def unsubscribe_sequence(self, event_sequence, callback):
-        self._filter_events_containing_sequence(self.unsubscribe, event_sequence, callback)
+        with self._lock:
+            self._remove_pattern_subscription(('sequence', event_sequence), callback)
 
     def unsubscribe_regex(self, event_regex, callback):
-        self._filter_events_matching_regex(self.unsubscribe, event_regex, callback)
+        with self._lock:
+            self._remove_pattern_subscription(('regex', event_regex), callback)
+
+    def _add_subscription(self, subscriptions, key, callback, context=Subscription.MAIN, weak=False):
+        self._prune_subscriptions()
+
+        on_collected = functools.partial(self._on_callback_collected, getattr(callback, '__qualname__', repr(callback)))
+        subscription = Subscription(callback, next(self._subscription_order), context, weak, on_collected)
+
+        if key is None:
+            subscriptions.append(subscription)
+        else:
+            subscriptions.setdefault(key, []).append(subscription)
+
+    def _remove_subscription(self, subscriptions: list, callback) -> bool:
+        """
+        Remove the first subscription of the callback from the list. Return whether a subscription was removed.
+        """
+        if not subscriptions:
+            return False
+
+        for position, subscription in enumerate(subscriptions):
+            if subscription.callback == callback:
+                del subscriptions[position]
+                return True
+
+        return False
+
+    def _remove_pattern_subscription(self, pattern_key, callback):
+        if pattern_key not in self.pattern_subscriptions:
+            return
+
+        subscriptions = self.pattern_subscriptions[pattern_key][1]
+
+        if self._remove_subscription(subscriptions, callback):
+            if not subscriptions:
+                del self.pattern_subscriptions[pattern_key]
+
+            self._resolved_subscriptions.clear()
+
+    def _on_callback_collected(self, callback_name, callback_reference):
+        """
+        Called by the garbage collector, possibly on any thread : only invalidate the resolved subscriptions.
+        The dead subscriptions are pruned on the next resolution or subscription.
+        """
+        self.logger.debug(f"Weak subscription of {callback_name} dropped, its owner was garbage collected")
+
+        with self._lock:
+            self._collected_count += 1
+            self._resolved_subscriptions.clear()
+
+    def _prune_subscriptions(self):
+        if not self._collected_count:
+            return
+
+        self._collected_count = 0
+
+        for event, subscriptions in list(self.subscriptions.items()):
+            subscriptions[:] = [subscription for subscription in subscriptions if subscription.is_alive]
+
+            if not subscriptions:
+                del self.subscriptions[event]
+
+        for keyword_key, subscriptions in list(self.keyword_subscriptions.items()):
+            subscriptions[:] = [subscription for subscription in subscriptions if subscription.is_alive]
+
+            if not subscriptions:
+                del self.keyword_subscriptions[keyword_key]
+
+        for pattern_key, (_, subscriptions) in list(self.pattern_subscriptions.items()):
+            subscriptions[:] = [subscription for subscription in subscriptions if subscription.is_alive]
+
+            if not subscriptions:
+                del self.pattern_subscriptions[pattern_key]
+
+    # ==================== RESOLUTION METHODS ==================== #
+
+    def resolve(self, event) -> tuple:
+        """
+        Return the subscriptions matching the event, directly or through a pattern, in subscription order.
+        """
+        try:
+            return self._resolved_subscriptions[event]
+        except KeyError:
+            pass
+
+        with self._lock:
+            return self._resolve(event)
+
+    def _resolve(self, event) -> tuple:
+        self._prune_subscriptions()
+
+        matched_subscriptions = list(self.subscriptions.get(event, ()))
+
+        if self.keyword_subscriptions:
+            tokens = event.split(separator)
+            token_count = len(tokens)
+
+            # Keywords can be looked up at any position, or at their positive or negative index
+            keyword_keys = set()
+
+            for index, token in enumerate(tokens):
+                keyword_keys.update(((None, token), (index, token), (index - token_count, token)))
+
+            for keyword_key in keyword_keys:
+                matched_subscriptions.extend(self.keyword_subscriptions.get(keyword_key, ()))
+
+        for match, subscriptions in self.pattern_subscriptions.values():
+            if match(event):
+                matched_subscriptions.extend(subscriptions)
+
+        matched_subscriptions.sort(key=lambda subscription: subscription.order)
+        matched_subscriptions = tuple(matched_subscriptions)
+
+        if len(self._resolved_subscriptions) >= self.MAX_RESOLVED_EVENTS:
+            self._resolved_subscriptions.clear()
+
+        self._resolved_subscriptions[event] = matched_subscriptions
+        return matched_subscriptions
+
+
+    # ==================== COALESCING METHODS ==================== #
+
+    def set_coalesce_policy(self, event, policy: CoalescePolicy = None):
+        """
+        Coalesce the dispatches of an event : the latest payload is kept and only delivered by flush().
+        """
+        if policy is None:
+            policy = CoalescePolicy()
+
+        self.coalesce_policies[event] = policy
+
+    def remove_coalesce_policy(self, event):
+        self.coalesce_policies.pop(event, None)
+        self._coalesced_deliveries.pop(event, None)
+
+        pending = self._coalesced_events.pop(event, None)
+
+        if pending is not None:
+            args, kwargs, _ = pending
+            self._deliver_flushed(event, args, kwargs)
+
+    def has_pending(self):
+        return len(self._coalesced_events) > 0 or len(self._main_deliveries) > 0
+
+    def flush(self):
+        """
+        Must be called from the main thread. Run the deliveries queued for the main thread by other threads, 
+        then deliver the latest payload of every coalesced event that is due according to its policy.
+        Return the number of delivered events.
+        """
+        delivered_count = self.flush_main_deliveries()
+
+        if not self._coalesced_events:
+            return delivered_count
+
+        now = time.perf_counter()
+
+        for event in list(self._coalesced_events):
+            with self._lock:
+                pending = self._coalesced_events.get(event)
+
+                if pending is None:
+                    continue
+
+                args, kwargs, published = pending
+                policy = self.coalesce_policies.get(event)
+
+                if policy is not None and not policy.is_due(now, published, self._coalesced_deliveries.get(event)):
+                    continue
+
+                del self._coalesced_events[event]
+                self._coalesced_deliveries[event] = now
+
+            self._deliver_flushed(event, args, kwargs)
+            delivered_count += 1
+
+        return delivered_count
+
+    def flush_main_deliveries(self, max_count: int = None) -> int:
+        """
+        Run at most max_count of the deliveries queued for the main thread, in dispatch order.
+        Return the number of deliveries run.
+        """
+        if max_count is None:
+            max_count = self.MAX_DELIVERY_BATCH
+
+        delivered_count = 0
+
+        while delivered_count < max_count:
+            try:
+                callback, event, args, kwargs = self._main_deliveries.popleft()
+            except IndexError:
+                break
 
+            self._run_callback(callback, event, args, kwargs)
+            delivered_count += 1
+
+        return delivered_count
 
     # ==================== DISPATCH METHOD ==================== #
 
     def dispatch(self, event, *args, **kwargs):
-        if event not in self.subscriptions:
+        tracer = self.tracer
+        coalesced = event in self.coalesce_policies
+
+        if tracer is not None:
+            tracer.record_dispatch(event, coalesced)
+
+        if coalesced:
+            with self._lock:
+                self._coalesced_events[event] = (args, kwargs, time.perf_counter())
             return
 
-        for callback in self.subscriptions[event]:
-            callback(event, *args, **kwargs)
+        self._deliver(event, *args, **kwargs)
 
-    # ==================== UTILITARY METHODS ==================== #
-    
-    def _filter_events_containing_keyword(self, broker_function, event_keyword, callback, index=None):
+    def _deliver_flushed(self, event, args, kwargs):
         """
-        Match events that contain a keyword at a specific index. This does not account for sequences,
-        only for specific keywords delimited by the separator in the event_constants module.
+        Deliver the latest payload of a coalesced event, whose dispatch was already traced by dispatch().
         """
-        for event_string in self.subscriptions.keys():
-            split_event_string = event_string.split(separator)
-            try:
-                found_event = False
-                if index is None:
-                    found_event = event_keyword in split_event_string
+        tracer = self.tracer
+
+        if tracer is not None:
+            tracer.record_flush(event)
+
+        self._deliver(event, *args, **kwargs)
+
+    def _deliver(self, event, *args, **kwargs):
+        on_main_thread = threading.current_thread() is self.main_thread
+        tracer = self.tracer
+        recorder = self.recorder
+
+        if tracer is not None:
+            tracer.enter_dispatch(event)
+
+        # Events published by the callbacks are not user input, the recorder must not record them
+        if recorder is not None:
+            recorder.enter_delivery()
+
+        try:
+            for subscription in self.resolve(event):
+                callback = subscription.callback
+
+                # The owner of the callback was garbage collected
+                if callback is None:
+                    continue
+
+                context = subscription.context
+
+                if context == Subscription.INLINE or (context == Subscription.MAIN and on_main_thread):
+                    if tracer is None:
+                        callback(event, *args, **kwargs)
+                    else:
+                        tracer.call(event, callback, *args, **kwargs)
+
+                elif context == Subscription.MAIN:
+                    self._main_deliveries.append((callback, event, args, kwargs))
+
                 else:
-                    found_event = split_event_string[index] == event_keyword
+                    self.worker_pool.submit(self._run_callback, callback, event, args, kwargs)
+        finally:
+            if tracer is not None:
+                tracer.exit_dispatch()
 
-                if found_event:
-                    broker_function(event_string, callback)
-            except IndexError:
-                continue
-    
-    def _filter_events_containing_sequence(self, broker_function, event_sequence, callback):
+            if recorder is not None:
+                recorder.exit_delivery()
+
+    def _run_callback(self, callback, event, args, kwargs):
         """
-        Match events that contain a sequence of keywords. This does not account for sequences,
-        only for specific keywords delimited by the separator in the event_constants module.
+        Call a callback outside of the dispatch, where nobody would catch its exceptions.
         """
-        event_key_list = self.subscriptions.keys()
+        tracer = self.tracer
+        recorder = self.recorder
+
+        if recorder is not None:
+            recorder.enter_delivery()
+
+        try:
+            if tracer is None:
+                callback(event, *args, **kwargs)
+            else:
+                tracer.call(event, callback, *args, **kwargs)
+        except Exception as e:
+            self.logger.error(f"Callback {callback} failed on {event}: {e}")
+        finally:
+            if recorder is not None:
+                recorder.exit_delivery()
 
-        for event_string in self.subscriptions.keys():
-            if event_sequence in event_string:
-                broker_function(event_string, callback)
+    # ==================== TRACING METHODS ==================== #
 
-    def _filter_events_matching_regex(self, broker_function, regex, callback):
+    def start_tracing(self, trace_path: str = None) -> EventTracer:
         """
-        Match events using a regex pattern.
+        Start recording dispatch counts, callback latencies and dispatch depths. If trace_path is given,
+        a binary trace is also streamed to that file. Return the tracer.
         """
-        event_key_list = self.subscriptions.keys()
-        regex = re.compile(regex)
-        for event_string in event_key_list:
-            if regex.match(event_string):
-                broker_function(event_string, callback)
\ No newline at end of file
+        self.stop_tracing()
+        tracer = EventTracer(trace_path)
+
+        with self._lock:
+            self.tracer = tracer
+
+        return tracer
+
+    def stop_tracing(self) -> EventTracer | None:
+        """
+        Stop tracing and close the trace file. Return the tracer, whose statistics can still be read.
+
+        Callbacks already running on worker threads may still go through the tracer : their statistics are recorded,
+        but they are no longer written to the closed trace file.
+        """
+        with self._lock:
+            tracer, self.tracer = self.tracer, None
+
+        if tracer is not None:
+            tracer.close()
+
+        return tracer
+
+    # ==================== RECORDING METHODS ==================== #
+
+    def start_recording(self, path: str, codec: EventCodec = None, ignored_events=()) -> EventRecorder:
+        """
+        Start recording the events published through EventPublisher objects to a session file,
+        which EventReplayer plays back. Return the recorder.
+        """
+        self.stop_recording()
+        self.recorder = EventRecorder(path, codec, ignored_events)
+        return self.recorder
+
+    def stop_recording(self) -> EventRecorder | None:
+        """
+        Stop recording and close the session file. Return the recorder.
+        """
+        recorder, self.recorder = self.recorder, None
+
+        if recorder is not None:
+            recorder.close()
+
+        return recorder
+
+    # ==================== WORKER POOL METHODS ==================== #
+
+    @property
+    def worker_pool(self):
+        if self._worker_pool is None:
+            with self._lock:
+                if self._worker_pool is None:
+                    self._worker_pool = ThreadPoolExecutor(max_workers=self.WORKER_COUNT,
+                                                           thread_name_prefix=self.__class__.__name__)
+        return self._worker_pool
+
+    def shutdown(self):
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown(wait=True)
+            self._worker_pool = None
@@ -69,7 +69,11 @@ misc = {
     'request': 'REQUEST',
     'all': 'ALL',
     'global': 'GLOBAL',
-    'eye_tracker_mode': 'EYE_TRACKER_MODE'
+    'eye_tracker_mode': 'EYE_TRACKER_MODE',
+    'preview': 'PREVIEW',
+    'profiler': 'PROFILER',
+    'event_tracer': 'EVENT_TRACER',
+    'recorder': 'RECORDER'
 }
 
 
@@ -91,6 +95,13 @@ class MenuEvent:
     TOGGLE_CONSOLE = separator.join([widget['menu'], event['toggle'], widget['console']])
     TOGGLE_SIDE_DISPLAY = separator.join([widget['menu'], event['toggle'], widget['side_display']])
 
+    TOGGLE_PROFILER = separator.join([widget['menu'], event['toggle'], misc['profiler']])
+    SHOW_PROFILER = separator.join([widget['menu'], event['show'], misc['profiler']])
+    RESET_PROFILER = separator.join([widget['menu'], event['reset'], misc['profiler']])
+
+    TOGGLE_EVENT_TRACER = separator.join([widget['menu'], event['toggle'], misc['event_tracer']])
+    TOGGLE_RECORDER = separator.join([widget['menu'], event['toggle'], misc['recorder']])
+
     EXIT = separator.join([widget['menu'], event['exit']])
 
 class SettingsEvent:
@@ -104,7 +115,8 @@ class SettingsEvent:
 class SidebarEvent:
     APPLY_PROCESS = separator.join([widget['sidebar'], event['apply'], image_processing['processor']])
     REVERT_PROCESS = separator.join([widget['sidebar'], event['revert'], image_processing['processor']])
-    RESET_PROCESS = separator.join([widget['sidebar'], event['update'], image_processing['processor']])
+    RESET_PROCESS = separator.join([widget['sidebar'], event['reset'], image_processing['processor']])
+    SHOW_PROCESS = separator.join([widget['sidebar'], event['show'], image_processing['processor']])
     UNDO_PROCESS = separator.join([widget['sidebar'], event['undo'], image_processing['processor']])
     SAVE_PROCESS = separator.join([widget['sidebar'], event['save'], image_processing['processor']])
 
@@ -178,6 +190,9 @@ class ImageProcessingEvent:
     UPDATE_PROCESS = separator.join([image_processing['processor'], event['update']])
     APPLY_PROCESS = separator.join([image_processing['processor'], event['apply']])
 
+    START_PREVIEW = separator.join([image_processing['processor'], event['start'], misc['preview']])
+    STOP_PREVIEW = separator.join([image_processing['processor'], event['stop'], misc['preview']])
+
 class ToolbarEvent:
     PLAY = separator.join([widget['toolbar'], event['play']])
     PAUSE = separator.join([widget['toolbar'], event['pause']])
@@ -9,4 +9,9 @@ class EventPublisher:
         self.event_broker = event_broker
 
     def publish(self, event, *args, **kwargs):
+        recorder = self.event_broker.recorder
+
+        if recorder is not None:
+            recorder.record(event, args, kwargs)
+
         self.event_broker.dispatch(event, *args, **kwargs)
\ No newline at end of file
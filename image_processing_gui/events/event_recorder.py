@@ -0,0 +1,337 @@
+import logging
+import collections
+import json
+import threading
+import time
+
+
+class EventCodec:
+    """
+    Encode event payloads to JSON values and decode them back.
+
+    Plain JSON values are kept as is. Other objects are encoded by encode_object() as dictionaries tagged with
+    their kind under the CODEC_KEY key, and rebuilt by decode_object(). Subclasses extend both methods for the
+    objects their events carry, e.g. the processors of the image processing events.
+    """
+
+    CODEC_KEY = '__codec__'
+    UNSUPPORTED = 'unsupported'
+
+    def encode(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+
+        if isinstance(value, (list, tuple)):
+            return [self.encode(item) for item in value]
+
+        if isinstance(value, dict) and all(isinstance(key, str) for key in value) and self.CODEC_KEY not in value:
+            return {key: self.encode(item) for key, item in value.items()}
+
+        return self.encode_object(value)
+
+    def decode(self, value):
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+
+        if isinstance(value, dict):
+            if self.CODEC_KEY in value:
+                return self.decode_object(value[self.CODEC_KEY], value)
+
+            return {key: self.decode(item) for key, item in value.items()}
+
+        return value
+
+    def encode_object(self, value) -> dict:
+        raise TypeError(f"Unable to encode {type(value).__name__} object")
+
+    def decode_object(self, kind: str, value: dict):
+        raise ValueError(f"Unable to decode {kind} object")
+
+    @classmethod
+    def is_supported(cls, value) -> bool:
+        """
+        Return whether an encoded value holds no object that failed to encode.
+        """
+        if isinstance(value, list):
+            return all(cls.is_supported(item) for item in value)
+
+        if isinstance(value, dict):
+            if value.get(cls.CODEC_KEY) == cls.UNSUPPORTED:
+                return False
+
+            return all(cls.is_supported(item) for item in value.values())
+
+        return True
+
+
+class RecordedEvent:
+    """
+    An event of a recorded session, with its decoded payload.
+    """
+
+    __slots__ = ('timestamp', 'event', 'args', 'kwargs')
+
+    def __init__(self, timestamp: float, event: str, args: list, kwargs: dict):
+        self.timestamp = timestamp
+        self.event = event
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f'RecordedEvent({self.timestamp:.3f}, {self.event})'
+
+
+class EventRecorder:
+    """
+    Record the events published through the EventPublisher objects of a broker, with their payload and their time
+    relative to the start of the recording, for EventReplayer to play them back.
+
+    Only the top-level publications are recorded, i.e. user input. The events published by callbacks are a consequence
+    of another event, and are published again when it is replayed. The broker tells the recorder when it runs callbacks,
+    see EventBroker.start_recording().
+
+    Sessions are saved as JSON lines : a header, then one line per event :
+
+        {"format": 1, "created": 1700000000.0}
+        {"t": 0.52, "event": "MENU|OPEN|IMAGE", "args": [], "kwargs": {"filename": "image.png"}}
+    """
+
+    FORMAT_VERSION = 1
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: str, codec: EventCodec = None, ignored_events=()):
+        """
+        Parameters
+        ----------
+        path : str
+            The file the session is written to.
+
+        codec : EventCodec, optional = None
+            The codec of the event payloads. Defaults to an EventCodec, which only supports plain JSON values.
+
+        ignored_events : iterable, optional = ()
+            Events that are never recorded, e.g. the event toggling the recording itself.
+        """
+        self.path = path
+        self.codec = codec if codec is not None else EventCodec()
+        self.ignored_events = frozenset(ignored_events)
+
+        self.event_count = 0
+        self.unsupported_counts = collections.Counter()
+
+        self._start = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._file = open(path, 'w')
+        self._file.write(json.dumps({'format': self.FORMAT_VERSION, 'created': time.time()}) + '\n')
+
+    @property
+    def depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def enter_delivery(self):
+        self._local.depth = self.depth + 1
+
+    def exit_delivery(self):
+        self._local.depth = self.depth - 1
+
+    def encode_payload(self, event, value):
+        try:
+            return self.codec.encode(value)
+        except Exception as e:
+            if not self.unsupported_counts[event]:
+                self.logger.warning(f"Event {event} will not be replayable: {e}")
+
+            self.unsupported_counts[event] += 1
+            return {EventCodec.CODEC_KEY: EventCodec.UNSUPPORTED, 'repr': repr(value)}
+
+    def record(self, event, args: tuple, kwargs: dict) -> bool:
+        """
+        Record an event about to be dispatched. Return whether it was recorded.
+        """
+        if self.depth > 0 or event in self.ignored_events:
+            return False
+
+        timestamp = time.perf_counter() - self._start
+
+        line = json.dumps({
+            't': round(timestamp, 6),
+            'event': event,
+            'args': [self.encode_payload(event, value) for value in args],
+            'kwargs': {key: self.encode_payload(event, value) for key, value in kwargs.items()}
+        }, separators=(',', ':'))
+
+        with self._lock:
+            if self._file is None:
+                return False
+
+            self._file.write(line + '\n')
+            self.event_count += 1
+
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+        self.logger.info(f"Recorded {self.event_count} events to {self.path}")
+
+
+class EventReplayer:
+    """
+    Play back a session recorded by EventRecorder, by dispatching its events to a broker in the same order,
+    either at the pace they were recorded at (scaled by speed) or as fast as possible.
+
+    Events whose payload could not be recorded, or cannot be decoded, are skipped.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, path: str, codec: EventCodec = None):
+        """
+        Parameters
+        ----------
+        path : str
+            The recorded session file.
+
+        codec : EventCodec, optional = None
+            The codec the session was recorded with.
+        """
+        self.path = path
+        self.codec = codec if codec is not None else EventCodec()
+
+        self.header = {}
+        self.events = []
+        self.skipped_counts = collections.Counter()
+
+        self.load()
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1].timestamp if self.events else 0.0
+
+    def load(self):
+        self.events = []
+        self.skipped_counts.clear()
+
+        with open(self.path, 'r') as file:
+            try:
+                self.header = json.loads(file.readline())
+            except json.JSONDecodeError:
+                raise ValueError(f"{self.path} is not an event session")
+
+            format_version = self.header.get('format', EventRecorder.FORMAT_VERSION)
+
+            if format_version > EventRecorder.FORMAT_VERSION:
+                raise ValueError(f"Unsupported event session format version: {format_version}")
+
+            for line in file:
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                recorded_event = self.decode_record(record)
+
+                if recorded_event is not None:
+                    self.events.append(recorded_event)
+
+        for event, count in self.skipped_counts.items():
+            self.logger.warning(f"Skipping {count} {event} events that cannot be replayed")
+
+    def decode_record(self, record: dict) -> RecordedEvent | None:
+        event = record['event']
+        args, kwargs = record.get('args', []), record.get('kwargs', {})
+
+        if not EventCodec.is_supported(args) or not EventCodec.is_supported(kwargs):
+            self.skipped_counts[event] += 1
+            return None
+
+        try:
+            return RecordedEvent(record['t'], event, self.codec.decode(args), self.codec.decode(kwargs))
+        except Exception as e:
+            self.logger.debug(f"Unable to decode {event}: {e}")
+            self.skipped_counts[event] += 1
+            return None
+
+    def replay(self, event_broker, speed: float | None = 1.0, on_event=None) -> float:
+        """
+        Dispatch the events to the broker from the calling thread, which must be its main thread, and block until
+        they were all delivered. Return the time the replay took, in seconds.
+
+        Parameters
+        ----------
+        event_broker : EventBroker
+            The broker the events are dispatched to.
+
+        speed : float | None, optional = 1.0
+            The replay speed relative to the recording. If None, events are dispatched as fast as possible.
+
+        on_event : function, optional = None
+            Called with every RecordedEvent once it was delivered.
+        """
+        start = time.perf_counter()
+
+        for recorded_event in self.events:
+            if speed is not None:
+                delay = recorded_event.timestamp / speed - (time.perf_counter() - start)
+
+                if delay > 0:
+                    time.sleep(delay)
+
+            event_broker.dispatch(recorded_event.event, *recorded_event.args, **recorded_event.kwargs)
+
+            # Deliver the coalesced events now, nobody else flushes the broker
+            event_broker.flush()
+
+            if on_event is not None:
+                on_event(recorded_event)
+
+        return time.perf_counter() - start
+
+    def schedule(self, widget, event_broker, speed: float | None = 1.0, on_done=None):
+        """
+        Dispatch the events from the Tk main loop of the widget, which keeps running between them. Return immediately.
+
+        Parameters
+        ----------
+        widget : tk.Misc
+            Any widget of the application, used for its after() method.
+
+        event_broker : EventBroker
+            The broker the events are dispatched to. The main loop is expected to flush it.
+
+        speed : float | None, optional = 1.0
+            The replay speed relative to the recording. If None, events are dispatched as fast as the main loop allows.
+
+        on_done : function, optional = None
+            Called with the time the replay took, in seconds, once every event was dispatched.
+        """
+        events = iter(self.events)
+        start = time.perf_counter()
+
+        def dispatch_next(recorded_event):
+            if recorded_event is not None:
+                event_broker.dispatch(recorded_event.event, *recorded_event.args, **recorded_event.kwargs)
+
+            next_event = next(events, None)
+
+            if next_event is None:
+                if on_done is not None:
+                    on_done(time.perf_counter() - start)
+                return
+
+            delay = 0
+
+            if speed is not None:
+                delay = max(0, int((next_event.timestamp / speed - (time.perf_counter() - start)) * 1000))
+
+            widget.after(delay, dispatch_next, next_event)
+
+        widget.after(0, dispatch_next, None)
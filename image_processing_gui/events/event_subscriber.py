@@ -1,5 +1,5 @@
 import logging
-from .event_broker import EventBroker
+from .event_broker import EventBroker, Subscription
 
 class EventSubscriber:
 
@@ -10,17 +10,17 @@ class EventSubscriber:
 
     # ==================== SUBSCRIPTION METHODS ==================== #
 
-    def subscribe(self, event, callback):
-        self.event_broker.subscribe(event, callback)
+    def subscribe(self, event, callback, context=Subscription.MAIN, weak=False):
+        self.event_broker.subscribe(event, callback, context, weak)
 
-    def subscribe_keyword(self, event_keyword, callback, index=None):
-        self.event_broker.subscribe_keyword(event_keyword, callback, index)
+    def subscribe_keyword(self, event_keyword, callback, index=None, context=Subscription.MAIN, weak=False):
+        self.event_broker.subscribe_keyword(event_keyword, callback, index, context, weak)
 
-    def subscribe_sequence(self, event_sequence, callback):
-        self.event_broker.subscribe_sequence(event_sequence, callback)
+    def subscribe_sequence(self, event_sequence, callback, context=Subscription.MAIN, weak=False):
+        self.event_broker.subscribe_sequence(event_sequence, callback, context, weak)
 
-    def subscribe_regex(self, event_regex, callback):
-        self.event_broker.subscribe_regex(event_regex, callback)
+    def subscribe_regex(self, event_regex, callback, context=Subscription.MAIN, weak=False):
+        self.event_broker.subscribe_regex(event_regex, callback, context, weak)
 
 
     # ==================== UNSUBSCRIPTION METHODS ==================== #
@@ -0,0 +1,298 @@
+import logging
+import bisect
+import collections
+import struct
+import threading
+import time
+
+
+class CallbackStatistics:
+    """
+    Latency histogram of the calls of a callback for an event.
+    """
+
+    __slots__ = ('calls', 'total_time', 'max_time', 'histogram')
+
+    # Upper bounds of the latency histogram buckets, in milliseconds. The last bucket is unbounded.
+    BUCKET_BOUNDS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500)
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(self.BUCKET_BOUNDS) + 1)
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.total_time += seconds
+        self.max_time = max(self.max_time, seconds)
+        self.histogram[bisect.bisect_left(self.BUCKET_BOUNDS, seconds * 1000)] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'calls': self.calls,
+            'total_ms': self.total_time * 1000,
+            'mean_ms': self.total_time * 1000 / self.calls if self.calls else 0.0,
+            'max_ms': self.max_time * 1000,
+            'histogram': list(self.histogram)
+        }
+
+
+class EventTraceWriter:
+    """
+    Compact binary trace of the dispatches and callback calls, for offline analysis with read_trace().
+
+    The file starts with MAGIC, followed by records starting with their kind (1 byte) :
+
+        NAME : id (uint32), length (uint16), utf-8 name. Defines the name of an event or callback id.
+        DISPATCH : timestamp (float64), event id (uint32), depth (uint8).
+        CALLBACK : timestamp (float64), event id (uint32), callback id (uint32), depth (uint8), duration in ms (float32).
+
+    Every distinct event and callback name gets its own id. Running out of ids raises an OverflowError.
+    """
+
+    MAGIC = b'EVTRACE2'
+
+    NAME = 0
+    DISPATCH = 1
+    CALLBACK = 2
+
+    NAME_RECORD = struct.Struct('<BIH')
+    DISPATCH_RECORD = struct.Struct('<BdIB')
+    CALLBACK_RECORD = struct.Struct('<BdIIBf')
+
+    MAX_NAME_ID = 0xFFFFFFFF
+
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'wb', buffering=self.BUFFER_SIZE)
+        self._file.write(self.MAGIC)
+
+        self._name_ids = {}
+        self._lock = threading.Lock()
+
+    def _get_name_id(self, name: str) -> int:
+        try:
+            return self._name_ids[name]
+        except KeyError:
+            pass
+
+        name_id = len(self._name_ids)
+
+        # Reusing an id would rename every record written with it
+        if name_id > self.MAX_NAME_ID:
+            raise OverflowError(f"Event trace {self.path} has no id left for {name}")
+
+        encoded_name = name.encode()[:0xFFFF]
+
+        self._name_ids[name] = name_id
+        self._file.write(self.NAME_RECORD.pack(self.NAME, name_id, len(encoded_name)))
+        self._file.write(encoded_name)
+
+        return name_id
+
+    def write_dispatch(self, timestamp: float, event: str, depth: int):
+        with self._lock:
+            # The writer may be closed while a worker thread is still running a traced callback
+            if self._file is None:
+                return
+
+            self._file.write(self.DISPATCH_RECORD.pack(self.DISPATCH, timestamp, self._get_name_id(event), min(depth, 255)))
+
+    def write_callback(self, timestamp: float, event: str, callback_name: str, depth: int, seconds: float):
+        with self._lock:
+            if self._file is None:
+                return
+
+            event_id = self._get_name_id(event)
+            callback_id = self._get_name_id(callback_name)
+            self._file.write(self.CALLBACK_RECORD.pack(self.CALLBACK, timestamp, event_id, callback_id,
+                                                       min(depth, 255), seconds * 1000))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path: str):
+    """
+    Yield the records of a binary trace as tuples :
+    ('dispatch', timestamp, event, depth) and ('callback', timestamp, event, callback, depth, duration_ms).
+    """
+    names = {}
+
+    with open(path, 'rb') as file:
+        if file.read(len(EventTraceWriter.MAGIC)) != EventTraceWriter.MAGIC:
+            raise ValueError(f"{path} is not an event trace")
+
+        while True:
+            kind = file.read(1)
+
+            if not kind:
+                return
+
+            # The records are parsed with their kind byte included
+            if kind[0] == EventTraceWriter.NAME:
+                record = kind + file.read(EventTraceWriter.NAME_RECORD.size - 1)
+                _, name_id, length = EventTraceWriter.NAME_RECORD.unpack(record)
+                names[name_id] = file.read(length).decode()
+
+            elif kind[0] == EventTraceWriter.DISPATCH:
+                record = kind + file.read(EventTraceWriter.DISPATCH_RECORD.size - 1)
+                _, timestamp, event_id, depth = EventTraceWriter.DISPATCH_RECORD.unpack(record)
+                yield 'dispatch', timestamp, names.get(event_id), depth
+
+            elif kind[0] == EventTraceWriter.CALLBACK:
+                record = kind + file.read(EventTraceWriter.CALLBACK_RECORD.size - 1)
+                _, timestamp, event_id, callback_id, depth, duration = EventTraceWriter.CALLBACK_RECORD.unpack(record)
+                yield 'callback', timestamp, names.get(event_id), names.get(callback_id), depth, duration
+
+            else:
+                raise ValueError(f"Corrupted event trace {path}: unknown record kind {kind[0]}")
+
+
+class EventTracer:
+    """
+    Opt-in tracing of an EventBroker : dispatch count of every event, latency histogram of every callback
+    and depth of nested dispatches, i.e. events dispatched by the callbacks of another event.
+
+    Dispatches of coalesced events are counted when they are dispatched, and counted again as flushed
+    when flush() delivers their latest payload, so that the dispatches dropped by coalescing show in the report.
+
+    The broker only goes through the tracer when one is set, see EventBroker.start_tracing().
+    """
+
+    logger = logging.getLogger(__name__)
+
+    # Nested dispatch depth from which a dispatch is reported as a cascade
+    CASCADE_DEPTH = 8
+
+    def __init__(self, trace_path: str = None):
+        """
+        Parameters
+        ----------
+        trace_path : str, optional = None
+            If given, every dispatch and callback call is also streamed to a binary trace file.
+        """
+        self.dispatch_counts = collections.Counter()
+        self.coalesced_counts = collections.Counter()
+        self.flushed_counts = collections.Counter()
+        self.depth_counts = collections.Counter()
+        self.callback_statistics = {}
+        self.max_depth = 0
+
+        self.trace_writer = EventTraceWriter(trace_path) if trace_path is not None else None
+
+        self._reported_cascades = set()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    @staticmethod
+    def get_callback_name(callback) -> str:
+        return getattr(callback, '__qualname__', None) or repr(callback)
+
+    def record_dispatch(self, event, coalesced: bool = False):
+        """
+        Record the dispatch of an event, before it is either delivered or kept for flush() if it is coalesced.
+        """
+        with self._lock:
+            self.dispatch_counts[event] += 1
+
+            if coalesced:
+                self.coalesced_counts[event] += 1
+
+        if self.trace_writer is not None:
+            self.trace_writer.write_dispatch(time.perf_counter(), event, self.depth + 1)
+
+    def record_flush(self, event):
+        """
+        Record the delivery of the latest payload of a coalesced event.
+        """
+        with self._lock:
+            self.flushed_counts[event] += 1
+
+    def enter_dispatch(self, event) -> int:
+        """
+        Record the delivery of an event on the current thread. Return its nesting depth, 1 for a top-level delivery.
+        """
+        depth = self.depth + 1
+        self._local.depth = depth
+
+        with self._lock:
+            self.depth_counts[depth] += 1
+            self.max_depth = max(self.max_depth, depth)
+
+            if depth >= self.CASCADE_DEPTH and event not in self._reported_cascades:
+                self._reported_cascades.add(event)
+                self.logger.warning(f"Event cascade: {event} dispatched at depth {depth}")
+
+        return depth
+
+    def exit_dispatch(self):
+        self._local.depth = self.depth - 1
+
+    def call(self, event, callback, *args, **kwargs):
+        """
+        Call the callback of an event, recording its latency.
+        """
+        start = time.perf_counter()
+
+        try:
+            return callback(event, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            callback_name = self.get_callback_name(callback)
+
+            with self._lock:
+                key = (event, callback_name)
+
+                if key not in self.callback_statistics:
+                    self.callback_statistics[key] = CallbackStatistics()
+
+                self.callback_statistics[key].record(seconds)
+
+            if self.trace_writer is not None:
+                self.trace_writer.write_callback(start, event, callback_name, self.depth, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'dispatch_counts': dict(self.dispatch_counts),
+                'coalesced_counts': dict(self.coalesced_counts),
+                'flushed_counts': dict(self.flushed_counts),
+                'depth_counts': dict(self.depth_counts),
+                'max_depth': self.max_depth,
+                'callbacks': {key: statistics.snapshot() for key, statistics in self.callback_statistics.items()}
+            }
+
+    def close(self):
+        if self.trace_writer is not None:
+            self.trace_writer.close()
+
+    def report(self) -> str:
+        snapshot = self.snapshot()
+
+        coalesced_counts, flushed_counts = snapshot['coalesced_counts'], snapshot['flushed_counts']
+
+        lines = [f'Max dispatch depth : {snapshot["max_depth"]}', '',
+                 f'{"event":<48} {"dispatches":>10} {"coalesced":>10} {"flushed":>10}']
+
+        for event, count in sorted(snapshot['dispatch_counts'].items(), key=lambda item: -item[1]):
+            lines.append(f'{event:<48} {count:>10} {coalesced_counts.get(event, 0):>10} {flushed_counts.get(event, 0):>10}')
+
+        lines.append('')
+        lines.append(f'{"callback":<64} {"calls":>7} {"mean ms":>9} {"max ms":>9}')
+
+        for (event, callback_name), statistics in sorted(snapshot['callbacks'].items(), key=lambda item: -item[1]['total_ms']):
+            lines.append(f'{callback_name[:64]:<64} {statistics["calls"]:>7} '
+                         f'{statistics["mean_ms"]:>9.3f} {statistics["max_ms"]:>9.3f}  {event}')
+
+        return '\n'.join(lines)
@@ -6,6 +6,7 @@ from tkinter import filedialog
 
 from ..console.console_tab import ConsoleTab
 from ..console.console_logger import ConsoleLogger
+from ..console.console_metrics import ConsoleMetrics
 from ..console.console_redirect import ConsoleRedirect
 
 
@@ -55,11 +56,16 @@ class ConsoleFrame(ttk.Frame):
         self.add_tab_button = ttk.Button(self.button_frame,
                                         text='Add',
                                         command=self.on_add_tab)
+        
+        self.add_metrics_button = ttk.Button(self.button_frame,
+                                             text='Metrics',
+                                             command=self.on_add_metrics_tab)
 
         self.clear_text_button.pack(fill=tk.Y, padx=5, pady=5)
         self.save_text_button.pack(fill=tk.Y, padx=5, pady=5)
         self.close_tab_button.pack(fill=tk.Y, padx=5, pady=5)
         self.add_tab_button.pack(fill=tk.Y, padx=5, pady=5)
+        self.add_metrics_button.pack(fill=tk.Y, padx=5, pady=5)
 
 
         # ==================== INITIALIZE CONSOLE TEXT ==================== #
@@ -160,6 +166,13 @@ class ConsoleFrame(ttk.Frame):
         console_tab.grid(row=1, column=0, sticky=tk.NSEW)
         self.console_notebook.add(console_tab, text=tab_name)
 
+    def on_add_metrics_tab(self):
+        metrics_tab = ConsoleMetrics(master=self.console_notebook,
+                                     event_broker=self.event_broker)
+        metrics_tab.grid(row=1, column=0, sticky=tk.NSEW)
+        self.console_notebook.add(metrics_tab, text='Metrics')
+        self.console_notebook.select(metrics_tab)
+
     def on_log_name_filter(self, log_name):
         current_logger = self.get_current_logger()
 
@@ -1,16 +1,18 @@
 import logging
+import time
 import tkinter as tk
 from tkinter import ttk
 from queue import Queue
 
-from ..image_system.image_reader import ImageReader, StaticImageReader, StaticImageFileReader, DynamicImageReader
+from ..image_system.image_reader import ImageReader, StaticImageReader, StaticImageFileReader, DynamicImageReader, BufferedDynamicImageReader
 
 from .image_canvas import ImageCanvas, MainImageCanvas, SideImageCanvas
+from .frame_scheduler import FrameScheduler
 
 from .toolbar_frame import ToolbarFrame
 
 from ..events.event_constants import *
-from ..events.event_broker import EventBroker
+from ..events.event_broker import EventBroker, CoalescePolicy
 from ..events.event_subscriber import EventSubscriber
 from ..events.event_publisher import EventPublisher
 
@@ -82,11 +84,32 @@ class DisplayFrame(ttk.Frame):
 
     logger = logging.getLogger(__name__)
 
+    MAIN_FPS = 30
+    SIDE_FPS = 5
+
+    # Fraction of the frame period a render tick may spend drawing before the remaining side canvases are skipped
+    TICK_BUDGET = 0.5
+
+    # Coalesced processing updates wait at most this long (ms) for the next tick when the display is idle
+    MAX_IDLE_DELAY = 50
+
     def __init__(self, master, event_broker: EventBroker, *args, **kwargs):
         super().__init__(master=master, *args, **kwargs)
 
         self.reader_manager = ReaderManager(event_broker=event_broker)
 
+        # ==================== Render Scheduler ==================== #
+
+        self.frame_scheduler = FrameScheduler(self, self.render_tick, target_fps=self.MAIN_FPS, 
+                                              max_idle_delay=self.MAX_IDLE_DELAY)
+        self.side_fps = self.SIDE_FPS
+
+        # Number of side canvas refreshes skipped, because their worker was busy or the tick was over budget
+        self.skipped_side_refreshes = 0
+
+        self._previous_side_refresh = 0.0
+        self._side_canvas_index = 0
+
         # ==================== Event System ==================== #
 
         self.event_broker = event_broker
@@ -131,11 +154,13 @@ class DisplayFrame(ttk.Frame):
         self.main_display_layout = {'row': 1, 'column': 0, 'columnspan': 1}
         self.side_display_layout = {'row': 1, 'column': 1, 'columnspan': 1}
 
-        self.main_canvas = MainImageCanvas(self.main_display, self.event_broker)
+        self.main_canvas = MainImageCanvas(self.main_display, self.event_broker, frame_scheduler=self.frame_scheduler, name='main_canvas')
 
-        self.side_canvas_1 = SideImageCanvas(self.side_display, self.event_broker)
-        self.side_canvas_2 = SideImageCanvas(self.side_display, self.event_broker)
-        self.side_canvas_3 = SideImageCanvas(self.side_display, self.event_broker)
+        self.side_canvas_1 = SideImageCanvas(self.side_display, self.event_broker, frame_scheduler=self.frame_scheduler, name='side_canvas_1')
+        self.side_canvas_2 = SideImageCanvas(self.side_display, self.event_broker, frame_scheduler=self.frame_scheduler, name='side_canvas_2')
+        self.side_canvas_3 = SideImageCanvas(self.side_display, self.event_broker, frame_scheduler=self.frame_scheduler, name='side_canvas_3')
+
+        self.side_canvases = [self.side_canvas_1, self.side_canvas_2, self.side_canvas_3]
 
         self.main_canvas.grid(row=0, column=0, sticky=tk.NSEW)
         self.side_canvas_1.grid(row=0, column=0, sticky=tk.NSEW)
@@ -162,8 +187,67 @@ class DisplayFrame(ttk.Frame):
         # self.event_subscriber.subscribe(DisplayEvent.EYE_TRACKER_MODE, self.on_eye_tracker_mode)
 
         self.event_subscriber.subscribe(MenuEvent.TOGGLE_SIDE_DISPLAY, self.on_toggle_side_display)
+
+        # Slider drags publish a processor update for every pixel, only run the pipeline once per render tick
+        self.event_broker.set_coalesce_policy(ImageProcessingEvent.APPLY_PROCESS, CoalescePolicy())
+
+        # The scheduler is started by the first opened reader, and stops itself once every canvas is closed
         
 
+    # ==================== Render Tick ==================== #
+
+    def set_side_fps(self, side_fps: float):
+        self.side_fps = side_fps
+
+    def has_readers(self) -> bool:
+        return not self.main_canvas.is_empty() or any(not side_canvas.is_empty() for side_canvas in self.side_canvases)
+
+    def render_tick(self) -> bool:
+        """
+        Render every canvas in a single tick. The main canvas is always rendered first. The side canvases are
+        refreshed at side_fps, in turn. A side canvas whose worker is still processing its previous frame is skipped,
+        and once the tick is over its time budget, the remaining side canvases are skipped until the next refresh,
+        which resumes at the first skipped canvas.
+        Return whether an image was drawn.
+        """
+        tick_start = time.perf_counter()
+        tick_budget = self.frame_scheduler.frame_period * self.TICK_BUDGET
+
+        events_delivered = self.event_broker.flush() > 0
+
+        if not self.has_readers() and not self.event_broker.has_pending():
+            self.frame_scheduler.stop()
+            return events_delivered
+
+        frame_drawn = self.main_canvas.render_frame() or events_delivered
+
+        if tick_start - self._previous_side_refresh < 1 / self.side_fps:
+            return frame_drawn
+
+        self._previous_side_refresh = tick_start
+
+        for index in range(len(self.side_canvases)):
+            if time.perf_counter() - tick_start > tick_budget:
+                remaining_canvases = (self.side_canvases[(self._side_canvas_index + offset) % len(self.side_canvases)]
+                                      for offset in range(len(self.side_canvases) - index))
+                self.skipped_side_refreshes += sum(not side_canvas.is_empty() for side_canvas in remaining_canvases)
+                break
+
+            side_canvas = self.side_canvases[self._side_canvas_index]
+            self._side_canvas_index = (self._side_canvas_index + 1) % len(self.side_canvases)
+
+            if side_canvas.is_empty():
+                continue
+
+            # Submitting another frame would only replace the pending one, the worker is the bottleneck
+            if side_canvas.is_busy():
+                self.skipped_side_refreshes += 1
+                continue
+
+            frame_drawn = side_canvas.render_frame() or frame_drawn
+
+        return frame_drawn
+
     def on_close(self, event):
         for child in self.main_display.winfo_children():
             if isinstance(child, ImageCanvas):
@@ -192,6 +276,7 @@ class DisplayFrame(ttk.Frame):
         if self.main_canvas.is_empty():
             self.main_canvas.set_reader(image_reader)
             self.reader_manager.add_reader(image_reader)
+            self.frame_scheduler.start()
             return
         
         for side_canvas in self.side_display.winfo_children():
@@ -200,19 +285,21 @@ class DisplayFrame(ttk.Frame):
                     side_canvas.set_reader(image_reader)
                     self.reader_manager.add_reader(image_reader)
                     side_canvas.set_selectable(True)
+                    self.frame_scheduler.start()
                     return
                 
                 
     def on_open_webcam(self, event):
         self.logger.info('Opening webcam')
 
-        webcam_reader = DynamicImageReader()
+        webcam_reader = BufferedDynamicImageReader()
         self.event_publisher.publish(DisplayEvent.START)
         
 
         if self.main_canvas.is_empty():
             self.main_canvas.set_reader(webcam_reader)
             self.reader_manager.add_reader(webcam_reader)
+            self.frame_scheduler.start()
             return
         
         for side_canvas in self.side_display.winfo_children():
@@ -221,6 +308,7 @@ class DisplayFrame(ttk.Frame):
                     side_canvas.set_reader(webcam_reader)
                     self.reader_manager.add_reader(webcam_reader)
                     side_canvas.set_selectable(True)
+                    self.frame_scheduler.start()
                     return
                 
     def on_toggle_side_display(self, event, state: bool):
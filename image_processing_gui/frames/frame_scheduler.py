@@ -0,0 +1,196 @@
+import logging
+import time
+import collections
+import statistics
+import tkinter as tk
+
+
+class FrameRateMeter:
+    """
+    Measure the achieved frame rate and the jitter between consecutive frames over a rolling window.
+    """
+
+    def __init__(self, window: int = 60):
+        self.frame_count = 0
+        self._intervals = collections.deque(maxlen=window)
+        self._last_timestamp = None
+
+    def tick(self, timestamp: float = None):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        if self._last_timestamp is not None:
+            self._intervals.append(timestamp - self._last_timestamp)
+
+        self._last_timestamp = timestamp
+        self.frame_count += 1
+
+    def reset(self):
+        self.frame_count = 0
+        self._intervals.clear()
+        self._last_timestamp = None
+
+    @property
+    def fps(self) -> float:
+        if not self._intervals:
+            return 0.0
+
+        mean_interval = sum(self._intervals) / len(self._intervals)
+        return 1 / mean_interval if mean_interval > 0 else 0.0
+
+    @property
+    def jitter(self) -> float:
+        """
+        Standard deviation of the interval between frames, in milliseconds.
+        """
+        if len(self._intervals) < 2:
+            return 0.0
+
+        return statistics.pstdev(self._intervals) * 1000
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frame_count,
+            'fps': self.fps,
+            'jitter_ms': self.jitter
+        }
+
+
+class FrameScheduler:
+    """
+    Call a function repeatedly from the Tk main loop at a target frame rate.
+
+    The duration of every tick is measured and the next after() is scheduled to hit the target.
+    The frames are processed by worker threads, so the ticks are short whatever the cost of the pipeline :
+    the time the workers spend on every drawn frame is reported with record_frame_time().
+    When a tick or a frame takes longer than the frame period, the period is stretched to that duration,
+    so that frames are not submitted faster than they are processed and the Tk main loop has time left
+    to process user events.
+    When the function reports that nothing was drawn, the delay is doubled up to max_idle_delay.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    BACKOFF_FACTOR = 1.25
+    SMOOTHING = 0.2
+
+    def __init__(self, widget: tk.Misc, callback, target_fps: float = 30, max_idle_delay: int = 100):
+        """
+        Parameters
+        ----------
+        widget : tk.Misc
+            The widget used to schedule the ticks.
+
+        callback : function
+            Called on every tick without arguments. Must return True if a frame was drawn.
+
+        target_fps : float, optional = 30
+            The number of ticks per second to aim for.
+
+        max_idle_delay : int, optional = 100
+            The maximum delay between two ticks in milliseconds, when nothing is drawn.
+        """
+        self.widget = widget
+        self.callback = callback
+        self.target_fps = target_fps
+        self.max_idle_delay = max_idle_delay
+
+        self.tick_meter = FrameRateMeter()
+        self.tick_duration = 0.0
+        self.frame_duration = 0.0
+        self.delay = 0
+
+        self._after_id = None
+        self._running = False
+
+    @property
+    def is_running(self):
+        return self._running
+
+    @property
+    def frame_period(self) -> float:
+        return 1 / self.target_fps
+
+    @property
+    def load(self) -> float:
+        """
+        The smoothed time a frame takes, on the main thread or on the workers, in seconds.
+        """
+        return max(self.tick_duration, self.frame_duration)
+
+    def set_target_fps(self, target_fps: float):
+        self.target_fps = target_fps
+
+    def record_frame_time(self, seconds: float):
+        """
+        Record the time a worker spent processing a drawn frame. Must be called from the main thread.
+        """
+        self.frame_duration += self.SMOOTHING * (seconds - self.frame_duration)
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._after_id = self.widget.after_idle(self._on_tick)
+
+    def stop(self):
+        """
+        Stop the ticks. May be called by the callback, in which case the next tick is not scheduled.
+        """
+        self._running = False
+
+        if self._after_id is None:
+            return
+
+        try:
+            self.widget.after_cancel(self._after_id)
+        except tk.TclError:
+            pass
+
+        self._after_id = None
+
+    def _on_tick(self):
+        self._after_id = None
+        tick_start = time.perf_counter()
+
+        try:
+            frame_drawn = self.callback()
+        except Exception as e:
+            self.logger.error(f"Frame callback failed: {e}")
+            frame_drawn = False
+
+        tick_end = time.perf_counter()
+        self.tick_meter.tick(tick_start)
+
+        elapsed = tick_end - tick_start
+        self.tick_duration += self.SMOOTHING * (elapsed - self.tick_duration)
+
+        period = max(self.frame_period, self.load * self.BACKOFF_FACTOR)
+        delay = max(1, int((period - elapsed) * 1000))
+
+        if not frame_drawn:
+            delay = min(self.max_idle_delay, max(delay, self.delay * 2))
+
+        self.delay = delay
+
+        if not self._running:
+            return
+
+        try:
+            self._after_id = self.widget.after(delay, self._on_tick)
+        except tk.TclError:
+            # The widget was destroyed during the tick.
+            self._after_id = None
+            self._running = False
+
+    def stats(self) -> dict:
+        return {
+            'target_fps': self.target_fps,
+            'tick_fps': self.tick_meter.fps,
+            'tick_jitter_ms': self.tick_meter.jitter,
+            'tick_ms': self.tick_duration * 1000,
+            'frame_ms': self.frame_duration * 1000,
+            'delay_ms': self.delay,
+            'backoff': self.load * self.BACKOFF_FACTOR > self.frame_period
+        }
@@ -10,6 +10,11 @@ import queue
 from ..image_system.image_displayer import ImageDisplayer
 from ..image_system.image_reader import ImageReader, StaticImageReader, StaticImageFileReader, DynamicImageReader
 from ..image_system.image_processor import ImageProcessor
+from ..image_system.image_tiling import TiledStageExecutor
+from ..image_system.metrics_registry import MetricsRegistry
+from ..image_system.frame_trace import LatencyTracker
+
+from .frame_scheduler import FrameScheduler, FrameRateMeter
 
 from ..events.event_constants import *
 from ..events.event_broker import EventBroker
@@ -19,9 +24,29 @@ from ..events.event_publisher import EventPublisher
 
 class ImageCanvas(tk.Canvas):
 
-    MS_DELAY = 200
+    TARGET_FPS = 30
+    POLL_DELAY = 10
+    DISPLAY_QUEUE_SIZE = 2
+
+    # Scale of the frames processed while a parameter is being dragged
+    PROXY_SCALE = 0.25
+
+    # Whether the processing time of the drawn frames slows the frame scheduler down
+    reports_frame_time = True
     
-    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, *args, **kwargs):
+    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, 
+                 frame_scheduler: FrameScheduler = None, tile_executor: TiledStageExecutor = None, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        frame_scheduler : FrameScheduler, optional = None
+            The scheduler rendering the canvas, shared with other canvases. 
+            If None, the canvas creates its own scheduler.
+
+        tile_executor : TiledStageExecutor, optional = None
+            If given, e.g. TiledStageExecutor.shared(), the local stages of large images are run on tiles in parallel.
+            Tiling is opt-in, it only pays off on multi-core machines, see benchmarks/bench_tiling.py.
+        """
         super().__init__(master=master, *args, **kwargs)
 
         self.is_running = False
@@ -32,16 +57,42 @@ class ImageCanvas(tk.Canvas):
         self.event_publisher = EventPublisher(event_broker)
         self.event_subscriber = EventSubscriber(event_broker)
 
-        self.display_queue = queue.Queue()
+        # Name of the canvas in the metrics registry, the Tk name of the widget
+        self.metrics_name = self.winfo_name()
+        self.metrics_registry = MetricsRegistry.shared()
+
+        self.display_queue = queue.Queue(maxsize=self.DISPLAY_QUEUE_SIZE)
         self.displayer = ImageDisplayer(display_queue=self.display_queue, 
-                                        reader=reader)
+                                        reader=reader,
+                                        use_worker=True,
+                                        get_display_size=self.get_display_size,
+                                        tile_executor=tile_executor,
+                                        metrics_name=self.metrics_name)
         self.image_item = None
+        self.image = None
+        self.image_mode = None
+        self._poll_id = None
+
+        self.frame_meter = FrameRateMeter()
+        self.latency_tracker = LatencyTracker()
+        self.owns_scheduler = frame_scheduler is None
+
+        if self.owns_scheduler:
+            frame_scheduler = FrameScheduler(self, self.render_frame, target_fps=self.TARGET_FPS)
+
+        self.frame_scheduler = frame_scheduler
+
+        self.canvas_size = (self.winfo_reqwidth(), self.winfo_reqheight())
+        self._display_sizes = {}
 
         self.config(relief=tk.SOLID, borderwidth=1)
         self.bind('<Button-3>', self.on_context_menu)
+        self.bind('<Configure>', self.on_configure)
 
-        self.event_subscriber.subscribe(GlobalEvent.PAUSE, self.on_pause)
-        self.event_subscriber.subscribe(GlobalEvent.RESUME, self.on_resume)
+        self.event_subscriber.subscribe(GlobalEvent.PAUSE, self.on_pause, weak=True)
+        self.event_subscriber.subscribe(GlobalEvent.RESUME, self.on_resume, weak=True)
+        self.event_subscriber.subscribe(ImageProcessingEvent.START_PREVIEW, self.on_start_preview, weak=True)
+        self.event_subscriber.subscribe(ImageProcessingEvent.STOP_PREVIEW, self.on_stop_preview, weak=True)
         # self.event_subscriber.subscribe(DisplayEvent.EYE_TRACKER_MODE, self.on_eye_tracker_mode)
 
         self._loop_image = False
@@ -51,11 +102,18 @@ class ImageCanvas(tk.Canvas):
     def is_empty(self):
         return self.displayer.is_empty()
 
+    def is_busy(self):
+        """
+        Return whether the displayer worker is still processing a frame of the canvas.
+        """
+        return self.displayer.is_busy()
+
     def set_reader(self, reader: ImageReader):
         self.displayer.set_reader(reader)
+        self.metrics_registry.set(self.metrics_name, 'frame_latency', self.latency_tracker)
 
-        self.event_subscriber.subscribe(ImageProcessingEvent.APPLY_PROCESS, self.on_update_process)
-        self.event_subscriber.subscribe(DisplayEvent.CLOSE, self.on_close)
+        self.event_subscriber.subscribe(ImageProcessingEvent.APPLY_PROCESS, self.on_update_process, weak=True)
+        self.event_subscriber.subscribe(DisplayEvent.CLOSE, self.on_close, weak=True)
         self.is_running = True
 
         if isinstance(self.displayer.reader, DynamicImageReader):
@@ -74,11 +132,25 @@ class ImageCanvas(tk.Canvas):
     def set_selectable(self, selectable: bool):
         pass
 
-    def fit_image_to_canvas(self, image):
-        self.update_idletasks()
-        canvas_width, canvas_height = self.winfo_width(), self.winfo_height()
-        
-        image_width, image_height = image.size
+    def on_configure(self, event):
+        """
+        Track the size of the canvas, so that fitting an image never has to flush the Tk layout.
+        """
+        canvas_size = (event.width, event.height)
+
+        if canvas_size == self.canvas_size:
+            return
+
+        self.canvas_size = canvas_size
+        self._display_sizes = {}
+
+    def compute_display_size(self, image_size, canvas_size):
+        """
+        Return the size an image of image_size is displayed at on a canvas of canvas_size.
+        The image is downscaled to fit the canvas, keeping its aspect ratio.
+        """
+        canvas_width, canvas_height = canvas_size
+        image_width, image_height = image_size
         new_image_width, new_image_height = image_width, image_height
 
         if image_width > canvas_width:
@@ -89,27 +161,119 @@ class ImageCanvas(tk.Canvas):
             new_image_height = canvas_height
             new_image_width = int(new_image_height * image_width / image_height)
 
-        return image.resize((new_image_width, new_image_height), Image.ANTIALIAS)
+        return max(1, new_image_width), max(1, new_image_height)
 
-    def display_image(self):
-        
-        if self.displayer is None:
-            return
-        
-        if not self.is_running:
-            return
+    def get_display_size(self, image_size):
+        """
+        Return the size an image of image_size is displayed at. Sizes are computed once per canvas resize.
+        """
+        display_sizes = self._display_sizes
+
+        try:
+            return display_sizes[image_size]
+        except KeyError:
+            display_size = self.compute_display_size(image_size, self.canvas_size)
+            display_sizes[image_size] = display_size
+            return display_size
+
+    def fit_image_to_canvas(self, image):
+        display_size = self.get_display_size(image.size)
+
+        if display_size == image.size:
+            return image
+
+        return image.resize(display_size, Image.BILINEAR)
+
+    def set_target_fps(self, target_fps: float):
+        if self.owns_scheduler:
+            self.frame_scheduler.set_target_fps(target_fps)
+
+    def stop_scheduler(self):
+        """
+        Stop the frame scheduler, unless it is shared with other canvases.
+        """
+        if self.owns_scheduler:
+            self.frame_scheduler.stop()
+
+    def is_looping(self):
+        return self.is_running and self._loop_image and isinstance(self.displayer.reader, DynamicImageReader)
+
+    def render_frame(self) -> bool:
+        """
+        Called by the frame scheduler. Submit the next frame of the reader and draw the latest processed image.
+        Return whether an image was drawn.
+        """
+        if not self.is_looping():
+            self.stop_scheduler()
+            return False
 
         self.displayer.display()
+        return self.show_display_queue()
+
+    def show_display_queue(self) -> bool:
+        """
+        Draw the most recent image of the display queue. The images are produced by the displayer worker,
+        so keep polling the queue until the worker is done with the frames it was given.
+        Return whether an image was drawn.
+        """
+        image = None
+        frame_trace = None
 
-        if not self.display_queue.empty():
-            image = self.display_queue.get()
+        self.metrics_registry.set(self.metrics_name, 'queue_depth', self.display_queue.qsize())
+
+        while True:
+            try:
+                image, frame_trace = self.display_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        if frame_trace is not None:
+            frame_trace.mark('dequeued')
+
+        if image is not None:
             image = self.fit_image_to_canvas(image)
-            tk_image = ImageTk.PhotoImage(image)
-            self.image_item = self.create_image(0, 0, image=tk_image, anchor=tk.NW)
-      
-            self.image = tk_image
-        
-        self.after(self.MS_DELAY, self.display_image)
+
+        if image is not None:
+            self.blit(image)
+
+            frame_trace.mark('drawn')
+            self.latency_tracker.record(frame_trace)
+
+            if self.reports_frame_time and frame_trace.worker_time() is not None:
+                self.frame_scheduler.record_frame_time(frame_trace.worker_time())
+            self.metrics_registry.set(self.metrics_name, 'latency_ms', self.latency_tracker.latest())
+
+        pending = self.displayer.is_busy() or not self.display_queue.empty()
+
+        if pending and self._poll_id is None:
+            self._poll_id = self.after(self.POLL_DELAY, self.on_poll_display_queue)
+
+        return image is not None
+
+    def blit(self, image):
+        """
+        Draw the image on the canvas. The canvas keeps a single image item and PhotoImage, whose pixels are
+        updated in place. They are only reallocated when the size or mode of the image changes.
+        """
+        self.frame_meter.tick()
+        self.metrics_registry.set(self.metrics_name, 'fps', self.frame_meter.fps)
+
+        if self.image is not None and self.image_mode == image.mode and \
+                (self.image.width(), self.image.height()) == image.size:
+            self.image.paste(image)
+            return
+
+        self.image = ImageTk.PhotoImage(image)
+        self.image_mode = image.mode
+
+        if self.image_item is None:
+            self.image_item = self.create_image(0, 0, image=self.image, anchor=tk.NW)
+        else:
+            self.itemconfig(self.image_item, image=self.image)
+
+    def on_poll_display_queue(self):
+        self._poll_id = None
+        self.show_display_queue()
 
 
     def on_context_menu(self, event):
@@ -126,21 +290,46 @@ class ImageCanvas(tk.Canvas):
     def on_close(self, event=''):
         if self.displayer is not None:
             self.displayer.stop()
+
+            # The canvas is empty again, it can show another reader and no longer keeps the scheduler running
+            self.displayer.set_reader(None)
+
         self.reader = None
         self.image_item = None
+        self.image = None
         self.delete('all')
 
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+
+        self.stop_scheduler()
+        self.frame_meter.reset()
+        self.latency_tracker.reset()
+        self.metrics_registry.remove_source(self.metrics_name)
+
         self.event_subscriber.unsubscribe(DisplayEvent.CLOSE, self.on_close)
         self.event_subscriber.unsubscribe(ImageProcessingEvent.APPLY_PROCESS, self.on_update_process)
         self.set_selectable(False)
 
     def on_pause(self, event=''):
         self._loop_image = False
+        self.stop_scheduler()
 
     def on_resume(self, event=''):
         self._loop_image = True
         self.on_update_process()
 
+    def on_start_preview(self, event=''):
+        self.displayer.set_proxy_scale(self.PROXY_SCALE)
+
+    def on_stop_preview(self, event=''):
+        self.displayer.set_proxy_scale(None)
+
+        # Render the current frame once at full resolution, streams are refreshed by the next tick anyway
+        if not self.is_empty() and not self.is_looping():
+            self.on_update_process()
+
     def on_update_process(self, event='', 
                           processor: ImageProcessor = None, 
                           preprocessor: ImageProcessor = None):
@@ -156,29 +345,17 @@ class ImageCanvas(tk.Canvas):
             return
         
         self.displayer.display(processor=processor, preprocessor=preprocessor)
+        self.show_display_queue()
 
-        if not self.display_queue.empty():
-            image = self.display_queue.get()
-
-            if image is None:
-                return
-            
-            image = self.fit_image_to_canvas(image)
-
-            if image is None:
-                return
-            
-            tk_image = ImageTk.PhotoImage(image)
-            self.create_image(0, 0, image=tk_image, anchor=tk.NW)
-            self.image = tk_image
-
-        if isinstance(self.displayer.reader, DynamicImageReader) and self._loop_image:
-            self.after(self.MS_DELAY, self.on_update_process, '', self.processor)
+        if self.is_looping():
+            self.frame_scheduler.start()
 
 
 class MainImageCanvas(ImageCanvas):
-    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, *args, **kwargs):
-        super().__init__(master=master, event_broker=event_broker, reader=reader, *args, **kwargs)
+    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, 
+                 frame_scheduler: FrameScheduler = None, *args, **kwargs):
+        super().__init__(master=master, event_broker=event_broker, reader=reader, 
+                         frame_scheduler=frame_scheduler, *args, **kwargs)
         # self.set_selectable(True)
 
     def fit_image_to_canvas(self, image):
@@ -253,8 +430,14 @@ class MainImageCanvas(ImageCanvas):
         
 
 class SideImageCanvas(ImageCanvas):
-    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, *args, **kwargs):
-        super().__init__(master=master, event_broker=event_broker, reader=reader, *args, **kwargs)
+
+    # Side canvases are refreshed at their own rate, and skipped while their worker is busy
+    reports_frame_time = False
+
+    def __init__(self, master, event_broker: EventBroker, reader: ImageReader = None, 
+                 frame_scheduler: FrameScheduler = None, *args, **kwargs):
+        super().__init__(master=master, event_broker=event_broker, reader=reader, 
+                         frame_scheduler=frame_scheduler, *args, **kwargs)
 
     def set_selectable(self, is_selectable: bool = True):
         if is_selectable:
@@ -273,10 +456,12 @@ class SideImageCanvas(ImageCanvas):
 
         self.event_publisher.publish(DisplayEvent.SELECT, self.displayer.reader)
 
-    def fit_image_to_canvas(self, image):
-        self.update_idletasks()
-        canvas_width, canvas_height = self.winfo_width(), self.winfo_height()
-        return image.resize((canvas_width, canvas_height), Image.ANTIALIAS)
+    def compute_display_size(self, image_size, canvas_size):
+        """
+        Side canvases stretch the image to the size of the canvas.
+        """
+        canvas_width, canvas_height = canvas_size
+        return max(1, canvas_width), max(1, canvas_height)
 
     
 
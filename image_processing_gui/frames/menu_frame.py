@@ -31,6 +31,7 @@ class MenuFrame(tk.Menu):
         self.file_menu.add_command(label='Open Webcam', command=self.handle_open_webcam)
         self.file_menu.add_command(label="Save", command=self.handle_save)
         self.file_menu.add_command(label="Save As", command=self.handle_save_as)
+        self.file_menu.add_command(label="Save Pipeline", command=self.handle_save_pipeline)
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Exit", command=self.handle_exit)
         self.add_cascade(label="File", menu=self.file_menu)
@@ -67,6 +68,30 @@ class MenuFrame(tk.Menu):
         
         self.add_cascade(label="View", menu=self.view_menu)
 
+        # ==================== TOOLS MENU ====================
+
+        self.profiler_state = tk.BooleanVar(value=False)
+        self.event_tracer_state = tk.BooleanVar(value=False)
+        self.recorder_state = tk.BooleanVar(value=False)
+
+        self.tools_menu = tk.Menu(self, tearoff=False)
+
+        self.tools_menu.add_checkbutton(label='Stage Profiler',
+                                        variable=self.profiler_state,
+                                        command=self.handle_toggle_profiler)
+        
+        self.tools_menu.add_command(label='Show Profiler Report', command=self.handle_show_profiler)
+        self.tools_menu.add_command(label='Reset Profiler', command=self.handle_reset_profiler)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_checkbutton(label='Event Tracer',
+                                        variable=self.event_tracer_state,
+                                        command=self.handle_toggle_event_tracer)
+        self.tools_menu.add_checkbutton(label='Record Session',
+                                        variable=self.recorder_state,
+                                        command=self.handle_toggle_recorder)
+
+        self.add_cascade(label="Tools", menu=self.tools_menu)
+
         # ==================== HELP MENU ====================
 
         self.help_menu = tk.Menu(self, tearoff=False)
@@ -106,6 +131,19 @@ class MenuFrame(tk.Menu):
         self.event_publisher.publish(MenuEvent.OPEN_WEBCAM)
 
 
+    def handle_save_pipeline(self):
+        filename = filedialog.asksaveasfilename(initialdir=self.initialdir,
+                                                title='Save pipeline',
+                                                defaultextension='.json',
+                                                filetypes=(('json files', '*.json'),
+                                                           ('yaml files', '*.yaml *.yml'),
+                                                           ('all files', '*.*')))
+
+        if not filename:
+            return
+
+        self.event_publisher.publish(SidebarEvent.SAVE_PROCESS, filename=filename)
+
     def handle_save_as(self):
         raise NotImplementedError('Save As not implemented yet')
     
@@ -133,6 +171,35 @@ class MenuFrame(tk.Menu):
     def handle_toggle_side_display(self):
         self.event_publisher.publish(MenuEvent.TOGGLE_SIDE_DISPLAY, self.side_display_state.get())
     
+    def handle_toggle_profiler(self):
+        self.event_publisher.publish(MenuEvent.TOGGLE_PROFILER, self.profiler_state.get())
+
+    def handle_show_profiler(self):
+        self.event_publisher.publish(MenuEvent.SHOW_PROFILER)
+
+    def handle_reset_profiler(self):
+        self.event_publisher.publish(MenuEvent.RESET_PROFILER)
+
+    def handle_toggle_event_tracer(self):
+        self.event_publisher.publish(MenuEvent.TOGGLE_EVENT_TRACER, self.event_tracer_state.get())
+
+    def handle_toggle_recorder(self):
+        if not self.recorder_state.get():
+            self.event_publisher.publish(MenuEvent.TOGGLE_RECORDER, False)
+            return
+
+        filename = filedialog.asksaveasfilename(initialdir=self.initialdir,
+                                                title='Record session',
+                                                defaultextension='.jsonl',
+                                                filetypes=(('session files', '*.jsonl'),
+                                                           ('all files', '*.*')))
+
+        if not filename:
+            self.recorder_state.set(False)
+            return
+
+        self.event_publisher.publish(MenuEvent.TOGGLE_RECORDER, True, filename=filename)
+    
     def handle_about(self):
         raise NotImplementedError('About not implemented yet')
 
@@ -81,6 +81,11 @@ class SidebarFrame(ttk.Frame):
         self.sidebar_notebook.grid(row=0, column=0, sticky=tk.NSEW)
         self.button_frame.grid(row=1, column=0, sticky=tk.NSEW)
 
+        self.event_subscriber.subscribe(SidebarEvent.APPLY_PROCESS, self.on_apply_process)
+        self.event_subscriber.subscribe(SidebarEvent.REVERT_PROCESS, self.on_revert_process)
+        self.event_subscriber.subscribe(SidebarEvent.RESET_PROCESS, self.on_reset_process)
+        self.event_subscriber.subscribe(SidebarEvent.SHOW_PROCESS, self.on_show_process)
+
         # self.event_subscriber.subscribe(SidebarEvent.TOGGLE_APPLY_BUTTON, lambda event, state: self.apply_button.config(state=state))
         # self.event_subscriber.subscribe(SidebarEvent.TOGGLE_REVERT_BUTTON, lambda event, state: self.revert_button.config(state=state))
         # self.event_subscriber.subscribe(SidebarEvent.TOGGLE_RESET_BUTTON, lambda event, state: self.reset_button.config(state=state))
@@ -125,26 +130,40 @@ class SidebarFrame(ttk.Frame):
         return None
 
     
+    # The buttons go through the event broker, so that recorded sessions replay them
+
     def on_apply(self):
+        self.event_publisher.publish(SidebarEvent.APPLY_PROCESS)
+
+    def on_revert(self):
+        self.event_publisher.publish(SidebarEvent.REVERT_PROCESS)
+
+    def on_reset(self):
+        self.event_publisher.publish(SidebarEvent.RESET_PROCESS)
+
+    def on_show(self):
+        self.event_publisher.publish(SidebarEvent.SHOW_PROCESS)
+
+    def on_apply_process(self, event):
         current_sidebar = self.get_current_sidebar()
 
         if current_sidebar:
             current_sidebar.on_apply()
 
-    def on_revert(self):
+    def on_revert_process(self, event):
         current_sidebar = self.get_current_sidebar()
 
         if current_sidebar:
             current_sidebar.on_revert()
 
 
-    def on_reset(self):
+    def on_reset_process(self, event):
         current_sidebar = self.get_current_sidebar()
 
         if current_sidebar:
             current_sidebar.on_reset()
 
-    def on_show(self):
+    def on_show_process(self, event):
         current_sidebar = self.get_current_sidebar()
 
         if current_sidebar:
@@ -0,0 +1,335 @@
+import logging
+import copy
+import json
+import hashlib
+
+import numpy as np
+
+from .opencv_data import opencv_data
+from ...image_system.image_processor import ImageProcessor, ImageProcessorFunction, \
+    ImageProcessorSequenceList, ImageProcessorSequenceSet
+from ...events.event_recorder import EventCodec
+
+
+class OpenCVPipelineSpec:
+    """
+    Picklable description of an OpenCV pipeline.
+
+    Stages refer to their operation by their key in opencv_data, instead of holding the cv2 function itself,
+    so that the spec can be sent to other processes and rebuilt there.
+
+    The pipeline is a list of groups of stages. Every group is rebuilt as an ImageProcessorSequenceSet,
+    and the groups are applied in order, like the sets of the preprocessor list of the OpenCVSidebar.
+
+    The spec is saved as JSON (or YAML, if PyYAML is installed), where parameters are named by their key in
+    opencv_data and options by their name, e.g. :
+
+        {"format": 1, "groups": [[{"operation": "threshold", "parameters": {"type": "THRESH_BINARY", ...}, ...}]]}
+    """
+
+    FORMAT_VERSION = 1
+    YAML_EXTENSIONS = ('.yaml', '.yml')
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, groups: list = None):
+        """
+        Parameters
+        ----------
+        groups : list, optional = None
+            A list of groups, each group being a list of stage dictionaries with the following keys :
+            'name' (key in opencv_data), 'priority', 'return_index' and 'arguments'.
+        """
+        self.groups = groups if groups is not None else []
+
+    def __eq__(self, __value: object) -> bool:
+        if not isinstance(__value, OpenCVPipelineSpec):
+            return False
+
+        return self.fingerprint() == __value.fingerprint()
+
+    def __hash__(self):
+        return hash(self.fingerprint())
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups)
+
+    @staticmethod
+    def serialize_stage(stage: ImageProcessorFunction) -> dict:
+        if stage.name not in opencv_data:
+            raise KeyError(f"Unknown OpenCV operation: {stage.name}")
+
+        return {
+            'name': stage.name,
+            'priority': stage.priority,
+            'return_index': stage.return_index,
+            'arguments': copy.deepcopy(stage.argument_dict)
+        }
+
+    @staticmethod
+    def build_stage(stage_data: dict) -> ImageProcessorFunction:
+        name = stage_data['name']
+
+        try:
+            operation_data = opencv_data[name]
+        except KeyError:
+            raise KeyError(f"Unknown OpenCV operation: {name}")
+
+        stage = ImageProcessorFunction(name=name,
+                                       callback=operation_data['function'],
+                                       source_keyword=operation_data['source_keyword'],
+                                       return_index=stage_data.get('return_index', operation_data.get('return_index', -1)),
+                                       enabled=True,
+                                       priority=stage_data.get('priority', operation_data['priority']))
+
+        stage.add_argument(**copy.deepcopy(stage_data.get('arguments', {})))
+        return stage
+
+    @classmethod
+    def from_processors(cls, *processors: ImageProcessor):
+        """
+        Create a spec from the processors, in the order they are applied.
+        Every set of an ImageProcessorSequenceList becomes a group, any other processor becomes a single group.
+        """
+        groups = []
+
+        for processor in processors:
+            if processor is None:
+                continue
+
+            if isinstance(processor, ImageProcessorSequenceList):
+                processor_groups = [child.stages() for child in processor.processor_sequence]
+            else:
+                processor_groups = [processor.stages()]
+
+            for stages in processor_groups:
+                if stages:
+                    groups.append([cls.serialize_stage(stage) for stage in stages])
+
+        return cls(groups)
+
+    # ==================== FILE FORMAT METHODS ==================== #
+
+    @staticmethod
+    def export_value(parameter_data: dict, value):
+        if isinstance(value, np.ndarray):
+            return {'ndarray': value.tolist(), 'dtype': value.dtype.name}
+
+        if isinstance(value, np.generic):
+            value = value.item()
+
+        for option_name, option_value in parameter_data.get('options', {}).items():
+            if value == option_value:
+                return option_name
+
+        return value
+
+    @staticmethod
+    def import_value(parameter_data: dict, value):
+        if isinstance(value, dict) and 'ndarray' in value:
+            return np.array(value['ndarray'], dtype=value.get('dtype', 'uint8'))
+
+        options = parameter_data.get('options', {})
+
+        if isinstance(value, str) and value in options:
+            return options[value]
+
+        return value
+
+    @classmethod
+    def export_stage(cls, stage_data: dict) -> dict:
+        parameters_data = opencv_data[stage_data['name']]['parameters']
+        keyword_parameters = {parameter_data['keyword']: (parameter_key, parameter_data)
+                              for parameter_key, parameter_data in parameters_data.items()}
+
+        parameters = {}
+
+        for keyword, value in stage_data.get('arguments', {}).items():
+            parameter_key, parameter_data = keyword_parameters.get(keyword, (keyword, {}))
+            parameters[parameter_key] = cls.export_value(parameter_data, value)
+
+        return {
+            'operation': stage_data['name'],
+            'priority': stage_data['priority'],
+            'return_index': stage_data['return_index'],
+            'parameters': parameters
+        }
+
+    @classmethod
+    def import_stage(cls, stage_dict: dict) -> dict:
+        name = stage_dict['operation']
+
+        try:
+            operation_data = opencv_data[name]
+        except KeyError:
+            raise KeyError(f"Unknown OpenCV operation: {name}")
+
+        arguments = {}
+
+        for parameter_key, value in stage_dict.get('parameters', {}).items():
+            parameter_data = operation_data['parameters'].get(parameter_key, {'keyword': parameter_key})
+            arguments[parameter_data['keyword']] = cls.import_value(parameter_data, value)
+
+        return {
+            'name': name,
+            'priority': stage_dict.get('priority', operation_data['priority']),
+            'return_index': stage_dict.get('return_index', operation_data.get('return_index', -1)),
+            'arguments': arguments
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'format': self.FORMAT_VERSION,
+            'groups': [[self.export_stage(stage_data) for stage_data in group] for group in self.groups]
+        }
+
+    @classmethod
+    def from_dict(cls, spec_dict: dict):
+        format_version = spec_dict.get('format', cls.FORMAT_VERSION)
+
+        if format_version > cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported pipeline format version: {format_version}")
+
+        return cls([[cls.import_stage(stage_dict) for stage_dict in group] for group in spec_dict.get('groups', [])])
+
+    @classmethod
+    def canonical_value(cls, value):
+        """
+        Return the value with integral floats as integers, so that 100 and 100.0 are represented the same way.
+        """
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+
+        if isinstance(value, list):
+            return [cls.canonical_value(item) for item in value]
+
+        if isinstance(value, dict):
+            return {key: cls.canonical_value(item) for key, item in value.items()}
+
+        return value
+
+    def canonical_dict(self) -> dict:
+        """
+        Return the file representation of the spec with normalized numbers, and the stages of every group
+        in the order they are applied, i.e. by priority, then by operation.
+        """
+        spec_dict = self.canonical_value(self.to_dict())
+
+        spec_dict['groups'] = [sorted(group, key=lambda stage_dict: (stage_dict['priority'], stage_dict['operation']))
+                               for group in spec_dict['groups']]
+
+        return spec_dict
+
+    def dumps(self) -> str:
+        """
+        Return the canonical JSON representation of the spec : normalized numbers, stages in the order they are applied,
+        sorted keys and no whitespace.
+        """
+        return json.dumps(self.canonical_dict(), sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, spec_string: str):
+        return cls.from_dict(json.loads(spec_string))
+
+    def fingerprint(self) -> str:
+        """
+        Return the SHA-256 digest of the canonical JSON representation. Identical pipelines have identical fingerprints,
+        regardless of the file they were loaded from, the way their numbers are written or the order of their stages.
+        """
+        return hashlib.sha256(self.dumps().encode()).hexdigest()
+
+    def save(self, path: str):
+        """
+        Save the canonical representation of the spec, so that identical pipelines are saved to identical files.
+        """
+        spec_dict = self.canonical_dict()
+
+        with open(path, 'w') as file:
+            if path.lower().endswith(self.YAML_EXTENSIONS):
+                import yaml
+                yaml.safe_dump(spec_dict, file, sort_keys=True)
+            else:
+                json.dump(spec_dict, file, sort_keys=True, indent=2)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'r') as file:
+            if path.lower().endswith(cls.YAML_EXTENSIONS):
+                import yaml
+                return cls.from_dict(yaml.safe_load(file))
+
+            return cls.from_dict(json.load(file))
+
+    def build(self) -> ImageProcessorSequenceList:
+        """
+        Rebuild the pipeline as an ImageProcessorSequenceList of ImageProcessorSequenceSet.
+        """
+        pipeline = ImageProcessorSequenceList()
+
+        for group in self.groups:
+            processor_set = ImageProcessorSequenceSet()
+
+            for stage_data in group:
+                processor_set.add(self.build_stage(stage_data))
+
+            pipeline.add(processor_set, allow_consecutive=True)
+
+        return pipeline
+
+
+
+class OpenCVEventCodec(EventCodec):
+    """
+    Codec of the payloads of the image processing events, for recorded sessions.
+
+    Processors are encoded with the parameters of their stages, in the format of the pipeline files. Unlike in
+    OpenCVPipelineSpec, disabled processors are kept, since disabling a processor is an event of its own.
+    """
+
+    def encode_processor(self, processor: ImageProcessorFunction) -> dict:
+        return {
+            self.CODEC_KEY: 'processor',
+            'stage': OpenCVPipelineSpec.export_stage(OpenCVPipelineSpec.serialize_stage(processor)),
+            'enabled': processor.enabled
+        }
+
+    def decode_processor(self, value: dict) -> ImageProcessorFunction:
+        processor = OpenCVPipelineSpec.build_stage(OpenCVPipelineSpec.import_stage(value['stage']))
+        processor.enabled = value.get('enabled', True)
+        return processor
+
+    def encode_object(self, value) -> dict:
+        if isinstance(value, ImageProcessorFunction):
+            return self.encode_processor(value)
+
+        if isinstance(value, ImageProcessorSequenceSet):
+            return {self.CODEC_KEY: 'processor_set',
+                    'processors': [self.encode_processor(processor) for processor in value.processor_sequence]}
+
+        if isinstance(value, ImageProcessorSequenceList):
+            return {self.CODEC_KEY: 'processor_list',
+                    'sets': [self.encode_object(processor_set) for processor_set in value.processor_sequence]}
+
+        return super().encode_object(value)
+
+    def decode_object(self, kind: str, value: dict):
+        if kind == 'processor':
+            return self.decode_processor(value)
+
+        if kind == 'processor_set':
+            processor_set = ImageProcessorSequenceSet()
+
+            for processor_value in value['processors']:
+                processor_set.add(self.decode_processor(processor_value))
+
+            return processor_set
+
+        if kind == 'processor_list':
+            processor_list = ImageProcessorSequenceList()
+
+            for set_value in value['sets']:
+                processor_list.add(self.decode_object(set_value[self.CODEC_KEY], set_value), allow_consecutive=True)
+
+            return processor_list
+
+        return super().decode_object(kind, value)
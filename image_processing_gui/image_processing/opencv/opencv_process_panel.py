@@ -54,7 +54,7 @@ class OpenCVProcessPanel(tk.LabelFrame):
         self.config_grandchildren_state(tk.DISABLED)
 
         
-        self.event_subscriber.subscribe(RequestEvent.REQUEST_PROCESSOR_UPDATE, self.on_request)
+        self.event_subscriber.subscribe(RequestEvent.REQUEST_PROCESSOR_UPDATE, self.on_request, weak=True)
 
     def on_request(self, event):
         self.event_publisher.publish(ImageProcessingEvent.UPDATE_PROCESS, process=self.image_process)
@@ -146,8 +146,8 @@ class OpenCVProcessPanel(tk.LabelFrame):
                                      orient=tk.HORIZONTAL,
                                      variable=slider_variable)
         
-        parameter_slider.bind('<Button-1>', lambda event: self.event_publisher.publish(GlobalEvent.PAUSE))
-        parameter_slider.bind('<ButtonRelease-1>', lambda event: self.event_publisher.publish(GlobalEvent.RESUME))
+        parameter_slider.bind('<Button-1>', lambda event: self.event_publisher.publish(ImageProcessingEvent.START_PREVIEW))
+        parameter_slider.bind('<ButtonRelease-1>', lambda event: self.event_publisher.publish(ImageProcessingEvent.STOP_PREVIEW))
         
         parameter_slider.config(command= lambda value : [
             slider_variable.set(int(float(value))), 
@@ -190,8 +190,8 @@ class OpenCVProcessPanel(tk.LabelFrame):
                                             self.on_spinbox_action(value=spinbox_variable.get(),
                                                                    process_parameter=process_parameters))
         
-        parameter_spinbox.bind('<Button-1>', lambda event:self.event_publisher.publish(GlobalEvent.PAUSE))
-        parameter_spinbox.bind('<ButtonRelease-1>', lambda event:self.event_publisher.publish(GlobalEvent.RESUME))
+        parameter_spinbox.bind('<Button-1>', lambda event:self.event_publisher.publish(ImageProcessingEvent.START_PREVIEW))
+        parameter_spinbox.bind('<ButtonRelease-1>', lambda event:self.event_publisher.publish(ImageProcessingEvent.STOP_PREVIEW))
         # Layout the child parameter widgets
         parameter_title_label.grid(row=0, column=0, sticky=tk.NSEW)
         parameter_spinbox.grid(row=0, column=1, columnspan=2, sticky=tk.NSEW)
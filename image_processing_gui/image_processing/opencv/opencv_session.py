@@ -0,0 +1,116 @@
+import logging
+import os
+import time
+
+import cv2
+
+from ...image_system.image_processor import ImageProcessorSequenceList, ImageProcessorSequenceSet
+from ...image_system.percentiles import percentile
+
+from ...events.event_constants import *
+from ...events.event_broker import EventBroker
+from ...events.event_subscriber import EventSubscriber
+
+
+class OpenCVHeadlessSession:
+    """
+    Stand-in for the OpenCVSidebar and the main canvas without a display, for replaying recorded sessions headlessly.
+
+    The processors are updated like in the OpenCVSidebar, and the pipeline is run on the opened image after every
+    event changing it, as the main canvas would. The time of every run is recorded.
+    The session is owned by its caller : its subscriptions are weak, and dropped once the session is collected.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, event_broker: EventBroker, image_dir: str = None):
+        """
+        Parameters
+        ----------
+        event_broker : EventBroker
+            The broker the recorded events are dispatched to.
+
+        image_dir : str, optional = None
+            Directory searched for the opened images that no longer exist at their recorded path,
+            e.g. for sessions recorded on another machine.
+        """
+        self.event_broker = event_broker
+        self.event_subscriber = EventSubscriber(event_broker)
+
+        self.image_dir = image_dir
+
+        self.processor_function_set = ImageProcessorSequenceSet()
+        self.preprocessor_list = ImageProcessorSequenceList()
+
+        self.image = None
+        self.output = None
+        self.run_times = []
+
+        self.event_subscriber.subscribe(MenuEvent.OPEN_IMAGE, self.on_open_image, weak=True)
+        self.event_subscriber.subscribe(ImageProcessingEvent.UPDATE_PROCESS, self.on_update_process, weak=True)
+        self.event_subscriber.subscribe(SidebarEvent.APPLY_PROCESS, self.on_apply, weak=True)
+        self.event_subscriber.subscribe(SidebarEvent.REVERT_PROCESS, self.on_revert, weak=True)
+        self.event_subscriber.subscribe(SidebarEvent.RESET_PROCESS, self.on_reset, weak=True)
+
+    def resolve_filename(self, filename: str) -> str:
+        if os.path.exists(filename) or self.image_dir is None:
+            return filename
+
+        return os.path.join(self.image_dir, os.path.basename(filename))
+
+    def run(self):
+        if self.image is None:
+            return
+
+        start = time.perf_counter()
+        self.output = self.processor_function_set.process(self.preprocessor_list.process(self.image))
+        self.run_times.append(time.perf_counter() - start)
+
+    # ==================== EVENT CALLBACKS ==================== #
+
+    def on_open_image(self, event, filename):
+        filename = self.resolve_filename(filename)
+        image = cv2.imread(filename)
+
+        if image is None:
+            self.logger.error(f'Unable to read image from source: {filename}')
+            return
+
+        self.logger.info(f'Opening image : {filename}')
+        self.image = image
+        self.run()
+
+    def on_update_process(self, event, process):
+        self.processor_function_set.add(process)
+        self.run()
+
+    # The sidebar disables every process panel after these, which empties the processor set
+
+    def on_apply(self, event):
+        self.preprocessor_list.add(self.processor_function_set)
+        self.processor_function_set.clear()
+        self.run()
+
+    def on_revert(self, event):
+        if len(self.preprocessor_list) == 0:
+            return
+
+        self.preprocessor_list.pop()
+        self.processor_function_set.clear()
+        self.run()
+
+    def on_reset(self, event):
+        self.preprocessor_list.clear()
+        self.processor_function_set.clear()
+        self.run()
+
+    def report(self) -> str:
+        if not self.run_times:
+            return 'No pipeline run'
+
+        sorted_run_times = sorted(self.run_times)
+
+        return (f'Pipeline runs : {len(sorted_run_times)}, total {sum(sorted_run_times) * 1000:.1f} ms, '
+                f'p50 {percentile(sorted_run_times, 50) * 1000:.2f} ms, '
+                f'p95 {percentile(sorted_run_times, 95) * 1000:.2f} ms, '
+                f'max {sorted_run_times[-1] * 1000:.2f} ms')
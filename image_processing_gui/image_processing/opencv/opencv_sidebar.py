@@ -6,6 +6,7 @@ from tkinter import filedialog
 
 from .opencv_data import opencv_data
 from .opencv_process_panel import OpenCVProcessPanel
+from .opencv_pipeline import OpenCVPipelineSpec
 from ...image_system.image_processor import ImageProcessorSequenceList, ImageProcessorSequenceSet
 
 
@@ -45,6 +46,7 @@ class OpenCVSidebar(SidebarTab):
 
 
         self.event_subscriber.subscribe(ImageProcessingEvent.UPDATE_PROCESS, self.on_update_process)
+        self.event_subscriber.subscribe(SidebarEvent.SAVE_PROCESS, self.on_save_process)
 
         
 
@@ -60,6 +62,17 @@ class OpenCVSidebar(SidebarTab):
         # self.event_publisher.publish(SidebarEvent.TOGGLE_APPLY_BUTTON, state=tk.NORMAL)
         # self.event_publisher.publish(SidebarEvent.TOGGLE_RESET_BUTTON, state=tk.NORMAL)
 
+    def on_save_process(self, event, filename):
+        pipeline_spec = OpenCVPipelineSpec.from_processors(self.preprocessor_list, self.processor_function_set)
+
+        try:
+            pipeline_spec.save(filename)
+        except (OSError, ImportError) as err:
+            self.logger.error(f'Unable to save pipeline to {filename}: {err}')
+            return
+
+        self.logger.info(f'Pipeline {pipeline_spec.fingerprint()} saved to {filename}')
+
     def on_apply(self, event=''):
         """
         Return whether the on_revert button should be enabled.
@@ -0,0 +1,95 @@
+import logging
+import collections
+
+import numpy as np
+
+
+class BufferArena:
+    """
+    Reusable output buffers, keyed by (shape, dtype).
+
+    Every key holds a small ring of buffers, so that consecutive stages can ping-pong between them :
+    the buffer a stage writes to is never the buffer it reads from. A buffer returned by acquire() is
+    only valid until the ring wraps around, so the arena must not be shared between threads, and
+    images that outlive a frame (e.g. cached images) must not be taken from it.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    BUFFERS_PER_KEY = 2
+    DEFAULT_MAX_KEYS = 8
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS):
+        """
+        Parameters
+        ----------
+        max_keys : int, optional = 8
+            The number of (shape, dtype) kept. The least recently used key is released once it is exceeded.
+        """
+        self.max_keys = max_keys
+
+        self.allocations = 0
+        self.reuses = 0
+
+        self._buffers = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def clear(self):
+        self._buffers.clear()
+
+    def acquire(self, shape: tuple, dtype, exclude=None) -> np.ndarray:
+        """
+        Return a buffer of the given shape and dtype, which is not exclude nor a view of it.
+        """
+        key = (tuple(shape), np.dtype(dtype))
+
+        try:
+            ring = self._buffers[key]
+            self._buffers.move_to_end(key)
+        except KeyError:
+            ring = collections.deque()
+            self._buffers[key] = ring
+
+            if len(self._buffers) > self.max_keys:
+                self._buffers.popitem(last=False)
+
+        for _ in range(len(ring)):
+            buffer = ring[0]
+            ring.rotate(-1)
+
+            if exclude is None or not (buffer is exclude or exclude.base is buffer):
+                self.reuses += 1
+                return buffer
+
+        buffer = np.empty(key[0], dtype=key[1])
+        self.allocations += 1
+
+        if len(ring) < self.BUFFERS_PER_KEY:
+            ring.append(buffer)
+
+        return buffer
+
+    def get_destination(self, step, target):
+        """
+        Return the buffer the step can write its output of target to, or None if the step cannot write to a buffer.
+        """
+        if not isinstance(target, np.ndarray):
+            return None
+
+        output_like = getattr(step, 'output_like', None)
+        output_spec = output_like(target) if output_like is not None else None
+
+        if output_spec is None:
+            return None
+
+        return self.acquire(*output_spec, exclude=target)
+
+    def stats(self) -> dict:
+        return {
+            'keys': len(self._buffers),
+            'allocations': self.allocations,
+            'reuses': self.reuses,
+            'bytes': sum(buffer.nbytes for ring in self._buffers.values() for buffer in ring)
+        }
@@ -0,0 +1,283 @@
+import logging
+import functools
+import hashlib
+import types
+
+import cv2
+import numpy as np
+
+from .stage_profiler import StageProfiler
+
+
+class PlanStep:
+    """
+    A stage of an ExecutionPlan : the function of an enabled ImageProcessorFunction with its arguments pre-bound.
+
+    Whether the function returns a tuple is resolved on the first call, after which the step calls
+    a specialized callable that does not inspect the return value anymore.
+    """
+
+    __slots__ = ('name', 'callback', 'argument_dict', 'fingerprint', 'apply', 
+                 '_bound_callback', '_source_keyword', '_return_index', '_destination_keyword')
+
+    enabled = True
+
+    # Keyword of the output buffer of the functions whose output has the size of their input
+    DESTINATION_KEYWORDS = {
+        cv2.threshold: 'dst',
+        cv2.morphologyEx: 'dst',
+        cv2.Canny: 'edges'
+    }
+
+    def __init__(self, name, callback, source_keyword, argument_dict: dict, return_index=-1, fingerprint=None):
+        self.name = name
+        self.callback = callback
+        self.argument_dict = types.MappingProxyType(dict(argument_dict))
+        self.fingerprint = fingerprint
+
+        self._bound_callback = functools.partial(callback, **self.argument_dict)
+        self._source_keyword = source_keyword
+        self._return_index = 0 if return_index is None else return_index
+        self._destination_keyword = self.DESTINATION_KEYWORDS.get(callback)
+
+        self.apply = self._resolve_apply
+
+    def _resolve_apply(self, target):
+        """
+        Call the function once, and replace apply() by the callable matching its return type.
+        """
+        bound_callback = self._bound_callback
+        source_keyword = self._source_keyword
+        result = bound_callback(**{source_keyword: target})
+
+        if isinstance(result, tuple):
+            return_index = self._return_index
+            self.apply = lambda target: bound_callback(**{source_keyword: target})[return_index]
+            return result[return_index]
+
+        self.apply = lambda target: bound_callback(**{source_keyword: target})
+        return result
+
+    def output_like(self, target):
+        """
+        Return the (shape, dtype) of the output of the step for target, or None if the step cannot write to a buffer.
+        """
+        if self._destination_keyword is None:
+            return None
+
+        if self.callback is cv2.Canny:
+            return target.shape[:2], np.uint8
+
+        return target.shape, target.dtype
+
+    def apply_into(self, target, dst):
+        """
+        Same as apply(), writing the output to the preallocated dst buffer.
+        """
+        result = self._bound_callback(**{self._source_keyword: target, self._destination_keyword: dst})
+
+        if isinstance(result, tuple):
+            return result[self._return_index]
+
+        return result
+
+    def process(self, target, dst=None):
+        """
+        Same as ImageProcessorFunction.process : if the function fails, the target is normalized instead.
+        If dst is given and the function supports it, the output is written to dst.
+        """
+        try:
+            if dst is None or self._destination_keyword is None:
+                return self.apply(target)
+
+            return self.apply_into(target, dst)
+        except cv2.error:
+            StageProfiler.shared().record_exception(self.name)
+            return cv2.normalize(target, None, 0, 255, cv2.NORM_MINMAX) # type: ignore
+
+    def __repr__(self):
+        return f'PlanStep({self.name})'
+
+
+class LookUpTableStep:
+    """
+    A run of point-wise steps fused into a single 256-entry table, applied to single-channel uint8 images
+    with one cv2.LUT pass. Other images go through the original steps in order : on multi-channel images,
+    cv2.threshold is as fast as cv2.LUT per stage, and fusion was measured slower, see benchmarks/bench_lut_fusion.py.
+    """
+
+    __slots__ = ('name', 'steps', 'table', 'fingerprint')
+
+    enabled = True
+    callback = cv2.LUT
+    argument_dict = types.MappingProxyType({})
+
+    def __init__(self, steps: list):
+        """
+        Parameters
+        ----------
+        steps : list
+            The point-wise steps, in order. LookUpTableStep are flattened into their own steps.
+
+        Raises
+        ------
+        ValueError
+            If the steps do not map a uint8 table to a uint8 table of the same size.
+        """
+        self.steps = tuple(component for step in steps 
+                           for component in (step.steps if isinstance(step, LookUpTableStep) else (step,)))
+        self.name = '+'.join(step.name for step in self.steps)
+        self.fingerprint = hashlib.sha1('|'.join(step.fingerprint or step.name for step in self.steps).encode()).hexdigest()
+
+        table = np.arange(256, dtype=np.uint8).reshape(1, 256)
+
+        for step in self.steps:
+            table = step.apply(table)
+
+            if not isinstance(table, np.ndarray) or table.dtype != np.uint8 or table.size != 256:
+                raise ValueError(f"{step} is not a point-wise map of uint8 values")
+
+        self.table = table.reshape(1, 256)
+
+    @staticmethod
+    def is_point_wise(step) -> bool:
+        """
+        Return True if every output pixel of the step only depends on the value of the same input pixel.
+        """
+        if isinstance(step, LookUpTableStep):
+            return True
+
+        if step.callback is cv2.threshold:
+            # Otsu and triangle compute the threshold from the histogram of the whole image
+            return not step.argument_dict.get('type', cv2.THRESH_BINARY) & (cv2.THRESH_OTSU | cv2.THRESH_TRIANGLE)
+
+        return False
+
+    @staticmethod
+    def is_fused(target) -> bool:
+        """
+        Return True if the table is applied to the target, instead of the original steps.
+        """
+        return (isinstance(target, np.ndarray) and target.dtype == np.uint8
+                and (target.ndim == 2 or (target.ndim == 3 and target.shape[2] == 1)))
+
+    def apply(self, target):
+        if self.is_fused(target):
+            return cv2.LUT(target, self.table)
+
+        for step in self.steps:
+            target = step.apply(target)
+
+        return target
+
+    def output_like(self, target):
+        if not self.is_fused(target):
+            return None
+
+        return target.shape, target.dtype
+
+    def process(self, target, dst=None):
+        if self.is_fused(target):
+            return cv2.LUT(target, self.table, dst=dst)
+
+        for step in self.steps:
+            target = step.process(target)
+
+        return target
+
+    def __repr__(self):
+        return f'LookUpTableStep({self.name})'
+
+
+class ExecutionPlan:
+    """
+    Immutable flat sequence of PlanStep compiled from an ImageProcessor. Disabled and no-op processors are dropped,
+    and long runs of point-wise steps are fused into a LookUpTableStep.
+    """
+
+    __slots__ = ('steps',)
+
+    logger = logging.getLogger(__name__)
+
+    # Shortest run of point-wise steps fused by default. A cv2.LUT pass costs about as much as six to eight
+    # SIMD cv2.threshold passes on a single-channel image, see benchmarks/bench_lut_fusion.py.
+    MIN_FUSED_RUN = 8
+
+    def __init__(self, steps, fuse: bool = True, min_fused_run: int = None):
+        """
+        Parameters
+        ----------
+        steps : iterable
+            The steps of the plan, in order.
+
+        fuse : bool, optional = True
+            If True, runs of at least min_fused_run point-wise steps are fused into a single LookUpTableStep.
+
+        min_fused_run : int, optional = None
+            The shortest run of point-wise steps that is fused. Defaults to MIN_FUSED_RUN.
+        """
+        steps = tuple(steps)
+        self.steps = self.fuse(steps, min_fused_run or self.MIN_FUSED_RUN) if fuse else steps
+
+    @classmethod
+    def fuse(cls, steps: tuple, min_fused_run: int = 2) -> tuple:
+        fused_steps = []
+        point_wise_run = []
+
+        def close_run():
+            if len(point_wise_run) >= max(2, min_fused_run):
+                try:
+                    fused_steps.append(LookUpTableStep(point_wise_run))
+                except Exception as e:
+                    cls.logger.debug(f"Unable to fuse {point_wise_run}: {e}")
+                    fused_steps.extend(point_wise_run)
+            else:
+                fused_steps.extend(point_wise_run)
+
+            point_wise_run.clear()
+
+        for step in steps:
+            if LookUpTableStep.is_point_wise(step):
+                point_wise_run.append(step)
+                continue
+
+            close_run()
+            fused_steps.append(step)
+
+        close_run()
+
+        return tuple(fused_steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def process(self, target, arena=None):
+        """
+        Apply the steps to the target in order. If a BufferArena is given, the steps write their output
+        to its buffers instead of allocating a new image, and the returned image belongs to the arena.
+        """
+        profiler = StageProfiler.shared()
+
+        for step in self.steps:
+            try:
+                dst = arena.get_destination(step, target) if arena is not None else None
+
+                if profiler.enabled:
+                    target = profiler.profile(step.name, target, step.process, target, dst)
+                else:
+                    target = step.process(target, dst)
+            except Exception as e:
+                self.logger.debug(f"Step {step.name} failed: {e}")
+                profiler.record_exception(step.name)
+                continue
+
+        return target
+
+    def compile_steps(self) -> list:
+        """
+        Return the steps of the plan, so that a compiled plan can be passed wherever a processor is expected.
+        """
+        return list(self.steps)
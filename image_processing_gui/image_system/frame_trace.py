@@ -0,0 +1,128 @@
+import logging
+import collections
+import time
+
+from .percentiles import percentile
+
+
+class FrameTrace:
+    """
+    Timestamps of a frame along the display path, from its capture by the reader to its blit on the canvas.
+    Timestamps are time.perf_counter() values, None until the frame reaches the corresponding point.
+    """
+
+    __slots__ = ('frame_id', 'captured', 'read', 'preprocessed', 'processed', 'converted', 'queued', 'dequeued', 'drawn')
+
+    # Name of every stage, and the timestamps it starts and ends at
+    STAGES = (
+        ('capture', 'captured', 'read'),
+        ('preprocess', 'read', 'preprocessed'),
+        ('process', 'preprocessed', 'processed'),
+        ('convert', 'processed', 'converted'),
+        ('queue_wait', 'queued', 'dequeued'),
+        ('draw', 'dequeued', 'drawn'),
+        ('total', 'captured', 'drawn')
+    )
+
+    def __init__(self, frame_id=None, captured: float = None):
+        """
+        Parameters
+        ----------
+        frame_id : int, optional = None
+            The id of the frame given by the reader, if any.
+
+        captured : float, optional = None
+            The time the frame was captured. Defaults to now, for frames read on demand.
+        """
+        self.frame_id = frame_id
+        self.captured = time.perf_counter() if captured is None else captured
+        self.read = None
+        self.preprocessed = None
+        self.processed = None
+        self.converted = None
+        self.queued = None
+        self.dequeued = None
+        self.drawn = None
+
+    def mark(self, timestamp_name: str):
+        setattr(self, timestamp_name, time.perf_counter())
+
+    def worker_time(self) -> float | None:
+        """
+        Return the time the displayer spent on the frame, from its read to its queueing, in seconds.
+        Return None if the frame did not reach the display queue.
+        """
+        if self.read is None or self.queued is None:
+            return None
+
+        return self.queued - self.read
+
+    def durations(self) -> dict:
+        """
+        Return the duration of every stage the frame went through, in seconds.
+        """
+        durations = {}
+
+        for stage, start_name, end_name in self.STAGES:
+            start, end = getattr(self, start_name), getattr(self, end_name)
+
+            if start is not None and end is not None:
+                durations[stage] = end - start
+
+        return durations
+
+    def __repr__(self):
+        return f'FrameTrace({self.frame_id}, {self.durations()})'
+
+
+class LatencyTracker:
+    """
+    Rolling latency percentiles of the stages of the last traced frames.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window: int = 300):
+        """
+        Parameters
+        ----------
+        window : int, optional = 300
+            The number of frames the percentiles are computed over.
+        """
+        self.window = window
+        self.frame_count = 0
+        self._durations = {stage: collections.deque(maxlen=window) for stage, _, _ in FrameTrace.STAGES}
+
+    def record(self, frame_trace: FrameTrace):
+        self.frame_count += 1
+
+        for stage, duration in frame_trace.durations().items():
+            self._durations[stage].append(duration)
+
+    def reset(self):
+        self.frame_count = 0
+
+        for durations in self._durations.values():
+            durations.clear()
+
+    def latest(self, stage: str = 'total') -> float:
+        """
+        Return the latest duration of the stage in milliseconds.
+        """
+        durations = self._durations[stage]
+        return durations[-1] * 1000 if durations else 0.0
+
+    def percentiles(self) -> dict:
+        """
+        Return, for every stage, the rolling latency percentiles in milliseconds.
+        """
+        stage_percentiles = {}
+
+        for stage, durations in self._durations.items():
+            sorted_durations = sorted(durations)
+            stage_percentiles[stage] = {f'p{percent}_ms': percentile(sorted_durations, percent) * 1000
+                                        for percent in self.PERCENTILES}
+
+        return stage_percentiles
@@ -0,0 +1,331 @@
+import logging
+import os
+import time
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from .image_reader import StaticImageFileReader, DynamicImageReader
+from .buffer_arena import BufferArena
+from .stage_profiler import StageProfiler
+from .percentiles import percentile
+
+
+logger = logging.getLogger(__name__)
+
+
+# Steps of the pipeline compiled once per worker process by _initialize_worker, 
+# and the buffers their outputs are written to.
+_worker_stages = None
+_worker_arena = None
+
+
+def _initialize_worker(pipeline_spec, profile=False):
+    global _worker_stages, _worker_arena
+    _worker_stages = pipeline_spec.build().compile_steps()
+    _worker_arena = BufferArena()
+
+    StageProfiler.shared().enabled = profile
+
+
+def _take_profile():
+    """
+    Return the statistics profiled since the last call, or None if the worker is not profiling.
+    """
+    profiler = StageProfiler.shared()
+    return profiler.snapshot(reset=True) if profiler.enabled else None
+
+
+def _run_pipeline(image):
+    """
+    Apply the stages of the worker pipeline to the image, timing every stage.
+    Return the processed image and the list of (stage name, seconds).
+    """
+    stage_timings = []
+    profiler = StageProfiler.shared()
+
+    for stage in _worker_stages:
+        stage_start = time.perf_counter()
+
+        try:
+            dst = _worker_arena.get_destination(stage, image)
+
+            if profiler.enabled:
+                image = profiler.profile(stage.name, image, stage.process, image, dst)
+            else:
+                image = stage.process(image, dst)
+        except Exception as e:
+            logger.debug(f"Stage {stage.name} failed: {e}")
+            profiler.record_exception(stage.name)
+            continue
+        finally:
+            stage_timings.append((stage.name, time.perf_counter() - stage_start))
+
+    return image, stage_timings
+
+
+def _process_frame(frame):
+    image, stage_timings = _run_pipeline(frame)
+    return image, stage_timings, _take_profile()
+
+
+def _process_file(source_path, output_path):
+    reader = StaticImageFileReader(source_path)
+    image = reader.read()
+
+    if image is None:
+        return None, [], None
+
+    image, stage_timings = _run_pipeline(image)
+
+    if image is None or not cv2.imwrite(output_path, image):
+        return None, stage_timings, _take_profile()
+
+    return output_path, stage_timings, _take_profile()
+
+
+class BatchStatistics:
+    """
+    Throughput and per-stage latency of the frames processed by a BatchProcessor.
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self.frame_count = 0
+        self.failed_count = 0
+        self.elapsed = 0.0
+        self.stage_timings = collections.defaultdict(list)
+
+    def record(self, succeeded: bool, stage_timings: list):
+        self.frame_count += 1
+
+        if not succeeded:
+            self.failed_count += 1
+
+        for stage_name, seconds in stage_timings:
+            self.stage_timings[stage_name].append(seconds)
+
+    @property
+    def throughput(self) -> float:
+        return self.frame_count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def stage_percentiles(self) -> dict:
+        """
+        Return, for every stage, its call count and the latency percentiles in milliseconds.
+        """
+        stage_percentiles = {}
+
+        for stage_name, timings in self.stage_timings.items():
+            sorted_timings = sorted(timings)
+            stage_percentiles[stage_name] = {'count': len(sorted_timings)}
+
+            for percent in self.PERCENTILES:
+                stage_percentiles[stage_name][f'p{percent}_ms'] = percentile(sorted_timings, percent) * 1000
+
+        return stage_percentiles
+
+    def report(self) -> str:
+        lines = [f'{self.frame_count} frames ({self.failed_count} failed) in {self.elapsed:.2f} s : '
+                 f'{self.throughput:.2f} frames/s']
+
+        for stage_name, stage_stats in self.stage_percentiles().items():
+            latencies = ', '.join(f'p{percent} {stage_stats[f"p{percent}_ms"]:.2f} ms' for percent in self.PERCENTILES)
+            lines.append(f'  {stage_name:<12} x{stage_stats["count"]:<6} {latencies}')
+
+        return '\n'.join(lines)
+
+
+class BatchProcessor:
+    """
+    Process image files and video frames through a pipeline, distributed across a pool of processes.
+
+    The pipeline is given as a picklable spec with a build() method (e.g. OpenCVPipelineSpec), which is
+    rebuilt once in every worker process. Results are always returned in the order of their inputs.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp')
+
+    def __init__(self, pipeline_spec, max_workers: int = None, max_pending: int = None, profile: bool = False):
+        """
+        Parameters
+        ----------
+        pipeline_spec : object
+            A picklable object whose build() method returns the ImageProcessor to apply.
+
+        max_workers : int, optional = None
+            The number of worker processes. Defaults to the number of cores.
+
+        max_pending : int, optional = None
+            The maximum number of video frames in flight. Defaults to twice the number of workers.
+
+        profile : bool, optional = False
+            If True, the workers profile every stage, and their statistics are merged into profiler.
+        """
+        self.pipeline_spec = pipeline_spec
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+
+        self.statistics = BatchStatistics()
+        self.profiler = StageProfiler(enabled=profile)
+
+        # Output paths written by the processor, so that no two inputs overwrite each other's output
+        self._output_paths = set()
+
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                            initializer=_initialize_worker,
+                                            initargs=(pipeline_spec, profile))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def record(self, succeeded: bool, stage_timings: list, profile: dict = None):
+        self.statistics.record(succeeded, stage_timings)
+
+        if profile is not None:
+            self.profiler.merge(profile)
+
+    @classmethod
+    def list_images(cls, directory):
+        return sorted(os.path.join(directory, filename) for filename in os.listdir(directory)
+                      if filename.lower().endswith(cls.IMAGE_EXTENSIONS))
+
+    def get_output_paths(self, source_paths: list, output_dir: str) -> list:
+        """
+        Return the output path of every source file : its path relative to the deepest directory common to the sources,
+        under output_dir, so that files with the same name in different directories do not overwrite each other.
+        The path is None for the sources whose output path was already claimed by another source of the processor.
+        """
+        if not source_paths:
+            return []
+
+        source_paths = [os.path.abspath(source_path) for source_path in source_paths]
+        source_root = os.path.commonpath([os.path.dirname(source_path) for source_path in source_paths])
+
+        output_paths = []
+
+        for source_path in source_paths:
+            output_path = os.path.normpath(os.path.join(output_dir, os.path.relpath(source_path, source_root)))
+
+            if output_path in self._output_paths:
+                self.logger.error(f"Output {output_path} of {source_path} would overwrite the output of another input")
+                output_paths.append(None)
+                continue
+
+            self._output_paths.add(output_path)
+            output_paths.append(output_path)
+
+        return output_paths
+
+    def process_files(self, source_paths: list, output_dir: str) -> list:
+        """
+        Process the image files and write the results to output_dir, under their path relative to their common
+        directory. The files are read and written by the workers, only their paths are sent between processes.
+        Return the output paths in the order of source_paths, None for the files that could not be processed,
+        including the files whose output would overwrite the output of another file.
+        """
+        output_paths = self.get_output_paths(source_paths, output_dir)
+
+        for output_directory in {os.path.dirname(output_path) for output_path in output_paths if output_path is not None}:
+            os.makedirs(output_directory, exist_ok=True)
+
+        jobs = [(source_path, output_path) for source_path, output_path in zip(source_paths, output_paths)
+                if output_path is not None]
+        chunksize = max(1, len(jobs) // (4 * self.max_workers))
+
+        start = time.perf_counter()
+        job_results = self.executor.map(_process_file, *zip(*jobs), chunksize=chunksize) if jobs else iter(())
+
+        results = []
+
+        for output_path in output_paths:
+            # The collisions are failures, they are not sent to the workers
+            if output_path is None:
+                self.record(False, [])
+                results.append(None)
+                continue
+
+            output_path, stage_timings, profile = next(job_results)
+            self.record(output_path is not None, stage_timings, profile)
+            results.append(output_path)
+
+        self.statistics.elapsed += time.perf_counter() - start
+
+        return results
+
+    def process_frames(self, frames):
+        """
+        Process an iterable of frames, yielding the results in order.
+        At most max_pending frames are in flight, so that frames are not read faster than they are processed.
+        """
+        pending = collections.deque()
+        start = time.perf_counter()
+
+        def collect():
+            image, stage_timings, profile = pending.popleft().result()
+            self.record(image is not None, stage_timings, profile)
+            return image
+
+        try:
+            for frame in frames:
+                if len(pending) >= self.max_pending:
+                    yield collect()
+
+                pending.append(self.executor.submit(_process_frame, frame))
+
+            while pending:
+                yield collect()
+        finally:
+            self.statistics.elapsed += time.perf_counter() - start
+
+    def process_video(self, source, output_dir: str, extension: str = '.png') -> list:
+        """
+        Process every frame of a video source and write the results to output_dir as numbered images.
+        Return the output paths in frame order.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+
+        reader = DynamicImageReader(source)
+
+        if not reader.ready():
+            return []
+
+        def read_frames():
+            while True:
+                frame = reader.read()
+
+                if frame is None:
+                    return
+
+                yield frame
+
+        output_paths = []
+
+        try:
+            for index, image in enumerate(self.process_frames(read_frames())):
+                output_path = os.path.normpath(os.path.join(output_dir, f'frame_{index:06d}{extension}'))
+
+                if output_path in self._output_paths:
+                    self.logger.error(f"Frame {index} of {source} would overwrite the output {output_path} of another input")
+                    self.statistics.failed_count += 1
+                    continue
+
+                self._output_paths.add(output_path)
+
+                if image is not None and cv2.imwrite(output_path, image):
+                    output_paths.append(output_path)
+                else:
+                    self.logger.warning(f"Unable to write frame {index} to {output_path}")
+        finally:
+            reader.stop()
+
+        return output_paths
@@ -0,0 +1,100 @@
+import logging
+import collections
+import threading
+
+
+class ImageCache:
+    """
+    Least recently used cache of images, bounded by the total number of bytes it holds.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Parameters
+        ----------
+        max_bytes : int, optional = 256 MiB
+            The byte budget of the cache. Least recently used images are evicted once it is exceeded.
+        """
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the image stored under key and mark it as recently used. Return None if the key is not cached.
+        """
+        with self._lock:
+            try:
+                image = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        """
+        Store the image under key, evicting the least recently used images until the cache fits its byte budget.
+        An image larger than the whole budget is not stored, and the image previously stored under key is dropped.
+        """
+        nbytes = getattr(image, 'nbytes', 0)
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key).nbytes
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = image
+            self._size += nbytes
+
+            while self._size > self.max_bytes:
+                _, evicted_image = self._entries.popitem(last=False)
+                self._size -= evicted_image.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes
+        }
@@ -1,8 +1,13 @@
 import logging
 import cv2
 import threading
-import multiprocessing
-from .image_reader import ImageReader
+from .image_reader import ImageReader, ImageFrame, StaticImageReader
+from .image_cache import ImageCache
+from .buffer_arena import BufferArena
+from .image_tiling import TiledStageExecutor
+from .stage_profiler import StageProfiler
+from .metrics_registry import MetricsRegistry
+from .frame_trace import FrameTrace
 
 from .image_processor import ImageProcessor, DummyImageProcessor
 
@@ -12,15 +17,50 @@ from ..events.event_subscriber import EventSubscriber
 from ..events.event_publisher import EventPublisher
 
 import queue
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
-from PIL import Image, ImageTk
+from PIL import Image
 
 
 class ImageDisplayer:
-
-    def __init__(self, display_queue: queue.Queue, reader: ImageReader = None):
+    """
+    Read images from a reader, run them through the preprocessor and processor stages and publish them to a display queue.
+
+    The output of every stage is cached in the stage_cache only for static images, whose frame is processed again
+    on every change of configuration. The frames of the other readers are processed once, into the buffers of the
+    buffer_arena, and are never cached.
+    """
+
+    def __init__(self, display_queue: queue.Queue, reader: ImageReader = None, use_worker: bool = False,
+                 get_display_size = None, tile_executor: TiledStageExecutor = None, metrics_name: str = None):
+        """
+        Parameters
+        ----------
+        display_queue : queue.Queue
+            The queue the displayed (PIL image, FrameTrace) pairs are published to. If the queue is bounded and full,
+            the oldest image is dropped to make room for the newest one.
+
+        reader : ImageReader, optional = None
+            The reader the images are read from.
+
+        use_worker : bool, optional = False
+            If True, display() only submits the frame to a worker thread and returns immediately.
+            The image is published to the display_queue once the pipeline is done with it.
+            The worker thread is started by the first display() and shut down by stop().
+
+        get_display_size : function, optional = None
+            Return the (width, height) an image of size (width, height) is displayed at. If given, 
+            the processed image is downscaled to that size before its color is converted.
+
+        tile_executor : TiledStageExecutor, optional = None
+            If given, local stages are run on tiles of large images in parallel.
+
+        metrics_name : str, optional = None
+            If given, the cache hit ratio and dropped frames are published to the MetricsRegistry under that source name.
+        """
         self.logger = logging.getLogger(__name__)
 
         self.display_queue = display_queue
@@ -29,23 +69,213 @@ class ImageDisplayer:
         self.previous_processor = None
         self.previous_preprocessor = None
 
+        self.stage_cache = ImageCache()
+        self.buffer_arena = BufferArena()
+        self.previous_frame_key = None
+
+        self.get_display_size = get_display_size
+        self.proxy_scale = None
+        self.tile_executor = tile_executor
+        self.metrics_name = metrics_name
+
+        self.use_worker = use_worker
+        self.executor = None
+
+        self._worker_lock = threading.Lock()
+        self._worker_busy = False
+        self._worker_future = None
+        self._pending_request = None
+
     def set_reader(self, reader: ImageReader):
         self.reader = reader
+        self.stage_cache.clear()
+        self.buffer_arena.clear()
+        self.previous_frame_key = None
+
+    def get_frame_key(self, frame):
+        """
+        Return the key identifying the frame read from the reader, or None if the frame cannot be identified.
+        Static readers always return the same frame.
+        """
+        if isinstance(frame, ImageFrame):
+            return frame.frame_id, self.proxy_scale
+
+        if isinstance(self.reader, StaticImageReader):
+            return 0, self.proxy_scale
+
+        return None
+
+    def set_proxy_scale(self, proxy_scale: float = None):
+        """
+        Process a downscaled proxy of the frames, for real time previews on large images.
+        The proxy is displayed at the size of the full resolution frame. Set to None to process frames at full resolution.
+        """
+        self.proxy_scale = proxy_scale
+
+    def get_proxy(self, image, frame_key=None):
+        proxy_key = (frame_key, 'proxy')
+
+        if frame_key is not None:
+            proxy_image = self.stage_cache.get(proxy_key)
+
+            if proxy_image is not None:
+                return proxy_image
+
+        proxy_image = cv2.resize(image, None, fx=self.proxy_scale, fy=self.proxy_scale, interpolation=cv2.INTER_AREA)
+
+        if frame_key is not None:
+            self.stage_cache.put(proxy_key, proxy_image)
+
+        return proxy_image
+
+    def process_stages(self, image, stages: list, frame_key=None, chain_digest=None):
+        """
+        Apply the compiled stages (PlanStep) to the image in order. When the frame can be identified, the output of every stage is
+        cached under the frame key and the fingerprint of the stage and all the stages before it,
+        so that a change of configuration only re-executes the changed stage and the stages after it.
+        Otherwise, the stages write their output to the buffers of the buffer_arena.
+
+        The chain_digest of the stages applied before, if any, is updated with the fingerprints of the stages.
+        """
+        if chain_digest is None:
+            chain_digest = hashlib.sha1()
+
+        profiler = StageProfiler.shared()
+
+        for stage in stages:
+            if frame_key is not None:
+                chain_digest.update(stage.fingerprint.encode())
+                stage_key = (frame_key, chain_digest.hexdigest())
+
+                cached_image = self.stage_cache.get(stage_key)
+
+                if cached_image is not None:
+                    image = cached_image
+                    continue
+
+            try:
+                dst = self.buffer_arena.get_destination(stage, image) if frame_key is None else None
+
+                if self.tile_executor is not None and profiler.enabled:
+                    image = profiler.profile(stage.name, image, self.tile_executor.process, stage, image, dst)
+                elif self.tile_executor is not None:
+                    image = self.tile_executor.process(stage, image, dst)
+                elif profiler.enabled:
+                    image = profiler.profile(stage.name, image, stage.process, image, dst)
+                else:
+                    image = stage.process(image, dst)
+            except Exception as e:
+                self.logger.debug(f"Stage {stage} failed: {e}")
+                profiler.record_exception(stage.name)
+                continue
+
+            if frame_key is not None and image is not None:
+                self.stage_cache.put(stage_key, image)
+
+        return image
 
 
     def is_empty(self):
         return self.reader is None
 
+    def is_busy(self):
+        """
+        Return whether a frame is being processed by the worker thread.
+        """
+        return self._worker_busy
+
     def stop(self):
         if not self.is_empty():
             self.reader.stop()
 
+        # A frame being processed completes, the pending request is dropped
+        with self._worker_lock:
+            self._pending_request = None
+            executor, self.executor = self.executor, None
+
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+                # The worker never started, it cannot clear its busy flag
+                if self._worker_future is not None and self._worker_future.cancelled():
+                    self._worker_busy = False
+
     def pause(self):
         if not self.is_empty():
             self.reader.pause()
 
 
     def display(self, processor = None, preprocessor = None) -> Image:
+        if not self.use_worker:
+            return self.display_frame(processor, preprocessor)
+
+        # The worker must not compile the processors while the Tk thread changes them, it gets immutable plans instead
+        if processor is not None:
+            processor = processor.compile()
+
+        if preprocessor is not None:
+            preprocessor = preprocessor.compile()
+
+        with self._worker_lock:
+            # Only keep the latest request while the worker is busy, older ones are outdated.
+            # A request without processors must not cancel the processors of the request it replaces.
+            if self._worker_busy:
+                if self._pending_request is not None:
+                    pending_processor, pending_preprocessor = self._pending_request
+
+                    if processor is None:
+                        processor = pending_processor
+
+                    if preprocessor is None:
+                        preprocessor = pending_preprocessor
+
+                self._pending_request = (processor, preprocessor)
+                return None
+
+            self._worker_busy = True
+
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+
+            self._worker_future = self.executor.submit(self._display_worker, processor, preprocessor)
+
+    def _display_worker(self, processor, preprocessor):
+        while True:
+            try:
+                self.display_frame(processor, preprocessor)
+            except Exception as e:
+                self.logger.error(f"Unable to display frame: {e}")
+
+            with self._worker_lock:
+                if self._pending_request is None:
+                    self._worker_busy = False
+                    return
+
+                processor, preprocessor = self._pending_request
+                self._pending_request = None
+
+    def publish(self, image, frame_trace: FrameTrace = None):
+        """
+        Put the image and its trace in the display_queue, dropping the oldest image if the queue is full.
+        """
+        if frame_trace is None:
+            frame_trace = FrameTrace()
+
+        frame_trace.mark('queued')
+
+        while True:
+            try:
+                self.display_queue.put_nowait((image, frame_trace))
+                return
+            except queue.Full:
+                pass
+
+            try:
+                self.display_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def display_frame(self, processor = None, preprocessor = None) -> Image:
 
         if self.reader is None:
             return None
@@ -54,19 +284,49 @@ class ImageDisplayer:
             return None
         
         image = self.reader.read()
+        frame_key = self.get_frame_key(image)
+
+        if isinstance(image, ImageFrame):
+            frame_trace = FrameTrace(image.frame_id, image.timestamp)
+            image = image.image
+        else:
+            frame_trace = FrameTrace()
+
+        frame_trace.mark('read')
 
         if image is None:
             return None
+
+        # Nothing changed since the previous frame, there is nothing new to display.
+        unchanged = processor is None and preprocessor is None
+        
+        if unchanged and frame_key is not None and frame_key == self.previous_frame_key:
+            return None
+
+        self.previous_frame_key = frame_key
+
+        # Live frames are only processed once, so their stages write to reused buffers instead of being cached
+        cache_key = frame_key if isinstance(self.reader, StaticImageReader) else None
+
+        source_height, source_width = image.shape[:2]
+
+        if self.proxy_scale is not None:
+            image = self.get_proxy(image, cache_key)
         
         # ========== Calling pre-processors ========== #
 
         if preprocessor is not None:
-            image = preprocessor.process(image)
             self.previous_preprocessor = preprocessor
 
         else:
-            if self.previous_preprocessor is not None:
-                image = self.previous_preprocessor.process(image)
+            preprocessor = self.previous_preprocessor
+
+        chain_digest = hashlib.sha1()
+
+        if preprocessor is not None:
+            image = self.process_stages(image, preprocessor.compile_steps(), cache_key, chain_digest)
+
+        frame_trace.mark('preprocessed')
 
         # ========== Calling main processor ========== #
         
@@ -81,16 +341,82 @@ class ImageDisplayer:
 
         # ========== Processing image ========== #
 
-        image = processor.process(image) # type: ignore
+        if image is not None:
+            image = self.process_stages(image, processor.compile_steps(), cache_key, chain_digest)
+
+        frame_trace.mark('processed')
 
         if image is None:
             return None
         
         
-        cv_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(cv_image)
+        pil_image = self.convert(image, (source_width, source_height))
+        frame_trace.mark('converted')
+
+        self.publish(pil_image, frame_trace)
+
+        if self.metrics_name is not None:
+            self.publish_metrics()
+
+    def publish_metrics(self):
+        metrics_registry = MetricsRegistry.shared()
+        lookups = self.stage_cache.hits + self.stage_cache.misses
+
+        metrics_registry.set(self.metrics_name, 'cache_hit_ratio', self.stage_cache.hits / lookups if lookups else 0.0)
+        metrics_registry.set(self.metrics_name, 'dropped_frames', getattr(self.reader, 'dropped_frames', 0))
+        metrics_registry.set(self.metrics_name, 'duplicated_frames', getattr(self.reader, 'duplicated_frames', 0))
+
+    def convert(self, image, source_size = None) -> Image:
+        """
+        Convert the processed image to a PIL image of the display size. The image is resized first, 
+        so that the color conversion only runs on the displayed pixels. 
+        Single channel images are converted straight to mode 'L'.
+
+        The display size is computed from source_size if given, the size of the frame before any proxy downscaling.
+        """
+        image_height, image_width = image.shape[:2]
+
+        # The PIL image is always a copy of the array, see below, so color and gray images can be resized
+        # and converted into reused buffers
+        is_color = image.ndim == 3 and image.shape[2] == 3
+        is_gray = image.ndim == 2 and image.dtype == np.uint8
+
+        if source_size is None:
+            source_size = (image_width, image_height)
+
+        if self.get_display_size is not None:
+            display_size = self.get_display_size(source_size)
+
+            if display_size != (image_width, image_height):
+                downscale = display_size[0] * display_size[1] < image_width * image_height
+                interpolation = cv2.INTER_AREA if downscale else cv2.INTER_LINEAR
+                dst = None
+
+                if is_color or is_gray:
+                    dst = self.buffer_arena.acquire((display_size[1], display_size[0]) + image.shape[2:], image.dtype, exclude=image)
+
+                image = cv2.resize(image, display_size, dst=dst, interpolation=interpolation)
+
+        # Image.fromarray copies RGB images, but shares the memory of single channel images, and the image may be
+        # a buffer of the arena the next frame is written to. The PIL image gets its own copy instead.
+        if image.ndim == 2 or image.shape[2] == 1:
+            image = image.reshape(image.shape[:2])
+
+            if image.dtype != np.uint8:
+                return Image.fromarray(image.copy())
+
+            pil_image = Image.new('L', (image.shape[1], image.shape[0]))
+            pil_image.frombytes(np.ascontiguousarray(image))
+            return pil_image
+
+        if image.shape[2] == 4:
+            return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA))
+
+        if is_color:
+            dst = self.buffer_arena.acquire(image.shape, image.dtype, exclude=image)
+            return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=dst))
 
-        self.display_queue.put(pil_image)
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
 
 class EyeTrackerImageDisplayer(ImageDisplayer):
     def __init__(self, display_queue: queue.Queue, reader: ImageReader = None):
@@ -7,6 +7,9 @@ import numpy as np
 import heapq
 import sortedcontainers
 import numpy as np
+import hashlib
+
+from .execution_plan import PlanStep, ExecutionPlan
 
 
 
@@ -62,6 +65,28 @@ class ImageProcessor(ABC):
     def copy(self):
         serialized_data = self.serialize()[1]
         return self.__class__.deserialize(serialized_data)
+
+    def stages(self) -> list:
+        """
+        Return the flat list of processors that are actually applied to an image, in order.
+        """
+        return []
+
+    def fingerprint(self) -> str:
+        """
+        Return a digest of the configuration of the processor. Two processors with the same fingerprint
+        produce the same output for the same input.
+        """
+        return self.__class__.__name__
+
+    def compile(self) -> ExecutionPlan:
+        """
+        Return the flat ExecutionPlan of the stages of the processor.
+        """
+        return ExecutionPlan(step for stage in self.stages() for step in stage.compile_steps())
+
+    def compile_steps(self) -> list:
+        return list(self.compile().steps)
     
     def __str__(self):
         return str(self.serialize())
@@ -99,7 +124,7 @@ class DummyImageProcessor(ImageProcessor):
 
 class ImageProcessorFunction(ImageProcessor):
 
-    _supported_attributes = ['enabled', 'priority', 'name', 'callback', 'source_keyword', 'argument_dict']
+    _supported_attributes = ['enabled', 'priority', 'name', 'callback', 'source_keyword', 'return_index', 'argument_dict']
 
     def __init__(self, 
                  name=None, 
@@ -181,6 +206,55 @@ class ImageProcessorFunction(ImageProcessor):
     def add_argument(self, **kwargs):
         self.argument_dict.update(kwargs)
 
+    def apply(self, target):
+        """
+        Call the function on the target and return the resulting image, without any error handling.
+        """
+        source_argument = {self.source_keyword: target}
+
+        target = self.callback(**source_argument, **self.argument_dict)
+
+        if isinstance(target, tuple):
+            if self.return_index is not None:
+                return target[self.return_index]
+            
+            return target[0]
+
+        return target
+
+    def stages(self) -> list:
+        if not self.enabled or self.callback is None:
+            return []
+
+        return [self]
+
+    def compile_steps(self) -> list:
+        if not self.enabled or self.callback is None:
+            return []
+
+        return [PlanStep(name=self.name,
+                         callback=self.callback,
+                         source_keyword=self.source_keyword,
+                         argument_dict=self.argument_dict,
+                         return_index=self.return_index,
+                         fingerprint=self.fingerprint())]
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha1()
+        digest.update(repr((self.name, self.source_keyword, self.return_index)).encode())
+
+        for keyword in sorted(self.argument_dict):
+            value = self.argument_dict[keyword]
+            digest.update(keyword.encode())
+
+            if isinstance(value, np.ndarray):
+                digest.update(repr((value.shape, value.dtype.str)).encode())
+                digest.update(value.tobytes())
+            else:
+                digest.update(repr(value).encode())
+
+        return digest.hexdigest()
+
     def process(self, target):
         if not self.enabled or self.callback is None: 
             return target
@@ -189,17 +263,7 @@ class ImageProcessorFunction(ImageProcessor):
 
         while process_attempt < 1:
             try:
-                source_argument = {self.source_keyword: target}
-
-                target = self.callback(**source_argument, **self.argument_dict)
-
-                if isinstance(target, tuple):
-                    if self.return_index is not None:
-                        return target[self.return_index]
-                    
-                    return target[0]
-
-                return target
+                return self.apply(target)
 
             except cv2.error as e:
                 target = cv2.normalize(target, None, 0, 255, cv2.NORM_MINMAX) # type: ignore
@@ -261,16 +325,35 @@ class ImageProcessorSequence(ImageProcessor, ABC):
     def clear(self):
         pass
 
+    _execution_plan = None
+
     def process(self, target):
-        if len(self.processor_sequence) == 0:
-            return target
-        
-        for processor in self.processor_sequence:
-            try:
-                target = processor.process(target)
-            except Exception as e:
-                continue
-        return target
+        return self.compile().process(target)
+
+    def compile(self) -> ExecutionPlan:
+        """
+        Return the ExecutionPlan of the sequence. The plan is compiled once, and only recompiled after
+        the sequence changed.
+        """
+        if self._execution_plan is None:
+            self._execution_plan = ExecutionPlan(step for processor in self.processor_sequence 
+                                                 for step in processor.compile_steps())
+
+        return self._execution_plan
+
+    def invalidate(self):
+        self._execution_plan = None
+
+    def stages(self) -> list:
+        return [stage for processor in self.processor_sequence for stage in processor.stages()]
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha1()
+
+        for stage in self.stages():
+            digest.update(stage.fingerprint().encode())
+
+        return digest.hexdigest()
 
     def serialize(self):
         return self.__class__, [processor.serialize() for processor in self.processor_sequence]
@@ -336,14 +419,20 @@ class ImageProcessorSequenceSet(ImageProcessorSequence):
         return self._enabled
 
     def add(self, processor: ImageProcessor):
+        """
+        Add a copy of an enabled processor, replacing the processor of the same name and its arguments.
+        A disabled processor is removed from the set instead.
+        """
+        # The set holds one processor per name, adding an updated processor would keep the stale one
+        self.discard(processor)
+
         if processor.enabled:
             self._processor_sequence.add(processor.copy())
-            return
-        
-        self.discard(processor)
+            self.invalidate()
 
     def discard(self, processor: ImageProcessor):
         self._processor_sequence.discard(processor)
+        self.invalidate()
 
     def pop(self, index: int = -1):
         """
@@ -351,12 +440,16 @@ class ImageProcessorSequenceSet(ImageProcessorSequence):
         If the index is out of range, return None.
         """
         try:
-            return self._processor_sequence.pop(index)
+            processor = self._processor_sequence.pop(index)
         except IndexError:
-            pass
+            return None
+
+        self.invalidate()
+        return processor
     
     def clear(self):
         self._processor_sequence.clear()
+        self.invalidate()
 
 class ImageProcessorSequenceList(ImageProcessorSequence):
 
@@ -405,9 +498,11 @@ class ImageProcessorSequenceList(ImageProcessorSequence):
                     return
 
         self._processor_sequence.add(processor.copy())
+        self.invalidate()
 
     def discard(self, processor: ImageProcessor):
         self._processor_sequence.discard(processor)
+        self.invalidate()
 
     def pop(self, index: int = -1):
         """
@@ -416,9 +511,13 @@ class ImageProcessorSequenceList(ImageProcessorSequence):
         If the index is out of range, return None.
         """
         try:
-            return self.processor_sequence.pop(index)
+            processor = self.processor_sequence.pop(index)
         except IndexError:
             return None
+
+        self.invalidate()
+        return processor
         
     def clear(self):
-        self._processor_sequence.clear()
\ No newline at end of file
+        self._processor_sequence.clear()
+        self.invalidate()
\ No newline at end of file
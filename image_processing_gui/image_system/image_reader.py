@@ -2,8 +2,8 @@ import logging
 from abc import ABC, abstractmethod
 import cv2
 import threading
-import queue
 import time
+import collections
 
 
 class ImageReader(ABC):
@@ -138,3 +138,168 @@ class DynamicImageReader(ImageReader):
     def pause(self):
         self._is_ready = False
 
+
+
+
+class ImageFrame:
+    """
+    A frame read from an ImageReader, along with the metadata needed to identify it.
+    """
+
+    __slots__ = ('image', 'frame_id', 'timestamp')
+
+    def __init__(self, image, frame_id, timestamp):
+        self.image = image
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+
+
+class BufferedDynamicImageReader(DynamicImageReader):
+    """
+    Read image from a video source on a dedicated capture thread. 
+
+    Frames are pulled from the source as fast as it produces them and kept in a small ring buffer,
+    so that read() never waits on the decoder and the driver buffer never fills up.
+
+    The capture thread is parked while the reader is paused, and exits at the end of the source,
+    after which the reader is no longer ready.
+    """
+
+    DROP_LATEST = 'latest'
+    DROP_FIFO = 'fifo'
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, source=0, drop_policy=DROP_LATEST, buffer_size=1):
+        """
+        Parameters
+        ----------
+        source : int | str, optional = 0
+            The source passed to cv2.VideoCapture.
+
+        drop_policy : str, optional = 'latest'
+            'latest' : read() always returns the newest frame, older frames are dropped.
+            'fifo' : read() returns frames in capture order. When the buffer is full, the oldest frame is dropped.
+
+        buffer_size : int, optional = 1
+            The number of frames kept in the ring buffer. Only used with the 'fifo' drop policy.
+        """
+        super().__init__(source)
+
+        if drop_policy not in (self.DROP_LATEST, self.DROP_FIFO):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        if drop_policy == self.DROP_LATEST:
+            buffer_size = 1
+
+        self.drop_policy = drop_policy
+
+        self.dropped_frames = 0
+        self.duplicated_frames = 0
+
+        self._frame_buffer = collections.deque(maxlen=max(1, buffer_size))
+        self._frame_count = 0
+        self._last_frame = None
+        self._buffer_lock = threading.Lock()
+
+        self._capture_stopped = threading.Event()
+        self._capture_resumed = threading.Event()
+        self._capture_resumed.set()
+        self._capture_thread = None
+
+        if self._is_ready:
+            self._capture_thread = threading.Thread(target=self._capture, daemon=True)
+            self._capture_thread.start()
+
+    @property
+    def is_ready(self):
+        return self._is_ready
+
+    @is_ready.setter
+    def is_ready(self, value):
+        if value:
+            self.resume()
+        else:
+            self.pause()
+
+    def _capture(self):
+        try:
+            while True:
+                self._capture_resumed.wait()
+
+                if self._capture_stopped.is_set():
+                    break
+
+                ret, image = self._source.read()
+
+                if not ret:
+                    # End of file or unplugged device, no frame will come anymore
+                    self.logger.info('End of the video source, stopping the capture')
+                    self._is_ready = False
+                    self._capture_stopped.set()
+                    break
+
+                timestamp = time.perf_counter()
+
+                with self._buffer_lock:
+                    self._frame_count += 1
+
+                    if len(self._frame_buffer) == self._frame_buffer.maxlen:
+                        self.dropped_frames += 1
+
+                    self._frame_buffer.append(ImageFrame(image, self._frame_count, timestamp))
+        finally:
+            # The capture is only released once no read() is in progress on it
+            self._source.release()
+
+    def read(self):
+        """
+        Return the next ImageFrame according to the drop policy. If no new frame was captured since the
+        previous call, the previous frame is returned again and counted as duplicated.
+        Return None if no frame was captured yet.
+        """
+        if not self._is_ready:
+            return None
+
+        with self._buffer_lock:
+            if self._frame_buffer:
+                self._last_frame = self._frame_buffer.popleft()
+
+            elif self._last_frame is not None:
+                self.duplicated_frames += 1
+
+            return self._last_frame
+
+    def pause(self):
+        """
+        Stop reading frames from the source until resume() is called. The frames read before are discarded.
+        """
+        self._is_ready = False
+        self._capture_resumed.clear()
+
+    def resume(self):
+        if self._capture_stopped.is_set() or self._capture_thread is None:
+            return
+
+        with self._buffer_lock:
+            self._frame_buffer.clear()
+
+        self._is_ready = True
+        self._capture_resumed.set()
+
+    def stop(self):
+        self._is_ready = False
+        self._capture_stopped.set()
+
+        # Unpark the capture thread, so that it exits
+        self._capture_resumed.set()
+
+        # The capture thread releases the source when it exits, it may still be blocked in a read
+        if self._capture_thread is None:
+            self._source.release()
+
+        elif self._capture_thread is not threading.current_thread():
+            self._capture_thread.join(timeout=1)
+
+            if self._capture_thread.is_alive():
+                self.logger.warning('Capture thread still reading, the source will be released when the read returns')
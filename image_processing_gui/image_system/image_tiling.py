@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .image_processor import ImageProcessor
+from .stage_profiler import StageProfiler
+
+
+class TiledStageExecutor:
+    """
+    Run local image processing stages on overlapping tiles of the image, on a thread pool.
+
+    Every tile is extended by a halo large enough for the stage to compute the pixels of the tile exactly
+    as if it was run on the whole image, so the stitched output matches the untiled output bit for bit.
+    Stages whose output depends on the whole image (e.g. Otsu and triangle thresholds, Canny hysteresis)
+    are run untiled.
+
+    Tiling only pays off for neighbourhood stages on large images with several cores : point-wise stages
+    (color conversions, fixed thresholds, lookup tables) are memory bound and only pay the thread pool overhead,
+    see benchmarks/bench_tiling.py. These stages, small images and single worker executors run untiled.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    DEFAULT_TILE_SIZE = 1024
+
+    # Minimum number of tiles for an image to be tiled
+    MIN_TILE_COUNT = 4
+
+    # Number of sequential passes of the structuring element for each morphological operation
+    MORPH_PASSES = {
+        cv2.MORPH_ERODE: 1,
+        cv2.MORPH_DILATE: 1,
+        cv2.MORPH_GRADIENT: 1,
+        cv2.MORPH_OPEN: 2,
+        cv2.MORPH_CLOSE: 2,
+        cv2.MORPH_TOPHAT: 2,
+        cv2.MORPH_BLACKHAT: 2
+    }
+
+    _shared_executor = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = None, tile_size: int = DEFAULT_TILE_SIZE):
+        """
+        Parameters
+        ----------
+        max_workers : int, optional = None
+            The number of threads processing tiles. Defaults to the number of cores.
+
+        tile_size : int, optional = 1024
+            The width and height of the tiles, halo excluded. Images smaller than MIN_TILE_COUNT tiles are not tiled.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tile_size = tile_size
+
+        self._thread_pool = None
+
+    @classmethod
+    def shared(cls):
+        """
+        Return an executor shared by every displayer, so that the number of tile threads stays bounded by the number of cores.
+        """
+        with cls._shared_lock:
+            if cls._shared_executor is None:
+                cls._shared_executor = cls()
+
+            return cls._shared_executor
+
+    @property
+    def thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix=self.__class__.__name__)
+        return self._thread_pool
+
+    def shutdown(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True)
+            self._thread_pool = None
+
+    # ==================== HALO METHODS ==================== #
+
+    def get_halo(self, stage) -> int | None:
+        """
+        Return the number of neighbouring pixels, on each side, the stage needs to compute a pixel.
+        Return None if the stage cannot be tiled.
+        """
+        callback = getattr(stage, 'callback', None)
+        argument_dict = getattr(stage, 'argument_dict', {})
+
+        if callback is cv2.cvtColor or callback is cv2.LUT:
+            return 0
+
+        if callback is cv2.threshold:
+            threshold_type = argument_dict.get('type', cv2.THRESH_BINARY)
+
+            # Otsu and triangle compute the threshold from the histogram of the whole image
+            if threshold_type & (cv2.THRESH_OTSU | cv2.THRESH_TRIANGLE):
+                return None
+
+            return 0
+
+        if callback is cv2.morphologyEx:
+            passes = self.MORPH_PASSES.get(argument_dict.get('op'))
+
+            if passes is None:
+                return None
+
+            kernel = argument_dict.get('kernel')
+            kernel_radius = 1 if kernel is None else max(np.shape(kernel)[:2]) // 2
+            iterations = max(1, int(argument_dict.get('iterations', 1)))
+
+            return kernel_radius * iterations * passes
+
+        # Canny edge tracking by hysteresis can propagate across the whole image, and unknown
+        # stages cannot be assumed to be local.
+        return None
+
+    # ==================== PROCESSING METHODS ==================== #
+
+    def get_tiles(self, height, width):
+        for y0 in range(0, height, self.tile_size):
+            for x0 in range(0, width, self.tile_size):
+                yield y0, min(y0 + self.tile_size, height), x0, min(x0 + self.tile_size, width)
+
+    def process_sequence(self, processor: ImageProcessor, target):
+        for stage in processor.compile_steps():
+            try:
+                target = self.process(stage, target)
+            except Exception as e:
+                self.logger.debug(f"Stage {stage.name} failed: {e}")
+                StageProfiler.shared().record_exception(stage.name)
+                continue
+
+        return target
+
+    def is_tiled(self, stage, target) -> bool:
+        """
+        Return whether the stage is run on tiles of the target : the stage must need neighbouring pixels,
+        the target must span MIN_TILE_COUNT tiles and the executor must have several workers.
+        """
+        if self.max_workers <= 1 or not stage.enabled or not isinstance(target, np.ndarray) or target.ndim < 2:
+            return False
+
+        halo = self.get_halo(stage)
+
+        if halo is None or halo == 0:
+            return False
+
+        height, width = target.shape[:2]
+        return height * width >= self.MIN_TILE_COUNT * self.tile_size * self.tile_size
+
+    def process(self, stage, target, dst=None):
+        """
+        Apply the stage to the target, tiled if is_tiled() allows it.
+        If dst is given, the output is written to it when its shape and dtype match.
+        """
+        if not self.is_tiled(stage, target):
+            return self.process_untiled(stage, target, dst)
+
+        halo = self.get_halo(stage)
+        height, width = target.shape[:2]
+
+        def process_tile(tile):
+            y0, y1, x0, x1 = tile
+            halo_y0, halo_x0 = max(0, y0 - halo), max(0, x0 - halo)
+            halo_y1, halo_x1 = min(height, y1 + halo), min(width, x1 + halo)
+
+            tile_output = stage.apply(target[halo_y0:halo_y1, halo_x0:halo_x1])
+
+            return tile_output[y0 - halo_y0:y1 - halo_y0, x0 - halo_x0:x1 - halo_x0]
+
+        tiles = list(self.get_tiles(height, width))
+
+        try:
+            tile_outputs = list(self.thread_pool.map(process_tile, tiles))
+        except cv2.error:
+            # The stage falls back on a normalization of the whole image, which cannot be tiled
+            return stage.process(target)
+
+        first_output = tile_outputs[0]
+        output_shape = (height, width) + first_output.shape[2:]
+
+        if dst is not None and dst.shape == output_shape and dst.dtype == first_output.dtype:
+            output = dst
+        else:
+            output = np.empty(output_shape, dtype=first_output.dtype)
+
+        for (y0, y1, x0, x1), tile_output in zip(tiles, tile_outputs):
+            output[y0:y1, x0:x1] = tile_output
+
+        return output
+
+    @staticmethod
+    def process_untiled(stage, target, dst=None):
+        if dst is None:
+            return stage.process(target)
+
+        return stage.process(target, dst)
@@ -0,0 +1,80 @@
+import logging
+import os
+import threading
+
+
+class MetricsRegistry:
+    """
+    Latest value of named metrics, e.g. 'main_canvas.fps'. Metrics are named '[SOURCE].[METRIC]'.
+
+    Publishers write with plain dictionary assignments, which are atomic in CPython, so that publishing
+    never takes a lock on the hot path. Readers get a consistent copy of all the values with snapshot().
+    """
+
+    logger = logging.getLogger(__name__)
+
+    separator = '.'
+
+    _shared_registry = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._values = {}
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the registry of the process, which the readers, displayers and canvases publish to.
+        """
+        with cls._shared_lock:
+            if cls._shared_registry is None:
+                cls._shared_registry = cls()
+
+            return cls._shared_registry
+
+    def set(self, source: str, metric: str, value):
+        self._values[source + self.separator + metric] = value
+
+    def get(self, source: str, metric: str, default=None):
+        return self._values.get(source + self.separator + metric, default)
+
+    def remove_source(self, source: str):
+        prefix = source + self.separator
+
+        for name in [name for name in list(self._values) if name.startswith(prefix)]:
+            self._values.pop(name, None)
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+    def sources(self, snapshot: dict = None) -> dict:
+        """
+        Return the metrics of a snapshot grouped by source : {source: {metric: value}}.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+
+        sources = {}
+
+        for name, value in snapshot.items():
+            source, _, metric = name.rpartition(self.separator)
+            sources.setdefault(source, {})[metric] = value
+
+        return sources
+
+
+def get_process_rss() -> int | None:
+    """
+    Return the resident set size of the process in bytes, or None if it cannot be read on this platform.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
@@ -0,0 +1,12 @@
+import math
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """
+    Return the nearest-rank percentile of a sorted list of values.
+    """
+    if not sorted_values:
+        return 0.0
+
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
@@ -0,0 +1,247 @@
+import logging
+import bisect
+import collections
+import threading
+import time
+
+
+class StageStatistics:
+    """
+    Statistics of the calls to a single stage.
+    """
+
+    __slots__ = ('calls', 'exceptions', 'total_time', 'min_time', 'max_time', 'histogram',
+                 'allocated_bytes', 'input_shapes', 'output_shapes')
+
+    # Upper bounds of the wall time histogram buckets, in milliseconds. The last bucket is unbounded.
+    BUCKET_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self):
+        self.calls = 0
+        self.exceptions = 0
+        self.total_time = 0.0
+        self.min_time = float('inf')
+        self.max_time = 0.0
+        self.histogram = [0] * (len(self.BUCKET_BOUNDS) + 1)
+        self.allocated_bytes = 0
+        self.input_shapes = collections.Counter()
+        self.output_shapes = collections.Counter()
+
+    def record(self, seconds: float, input_shape, output_shape, allocated_bytes: int):
+        self.calls += 1
+        self.total_time += seconds
+        self.min_time = min(self.min_time, seconds)
+        self.max_time = max(self.max_time, seconds)
+        self.histogram[bisect.bisect_left(self.BUCKET_BOUNDS, seconds * 1000)] += 1
+        self.allocated_bytes += allocated_bytes
+        self.input_shapes[input_shape] += 1
+        self.output_shapes[output_shape] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'calls': self.calls,
+            'exceptions': self.exceptions,
+            'total_ms': self.total_time * 1000,
+            'mean_ms': self.total_time * 1000 / self.calls if self.calls else 0.0,
+            'min_ms': self.min_time * 1000 if self.calls else 0.0,
+            'max_ms': self.max_time * 1000,
+            'histogram': list(self.histogram),
+            'allocated_bytes': self.allocated_bytes,
+            'input_shapes': dict(self.input_shapes),
+            'output_shapes': dict(self.output_shapes)
+        }
+
+    @classmethod
+    def subtract(cls, stage_snapshot: dict, baseline: dict) -> dict:
+        """
+        Return the statistics of the calls recorded between the baseline snapshot and stage_snapshot.
+        The extremes are exact when they were reached after the baseline, and otherwise bounded by the histogram
+        buckets of the calls made since.
+        """
+        calls = stage_snapshot['calls'] - baseline['calls']
+        total_ms = stage_snapshot['total_ms'] - baseline['total_ms']
+        histogram = [count - baseline_count for count, baseline_count in zip(stage_snapshot['histogram'], baseline['histogram'])]
+        buckets = [index for index, count in enumerate(histogram) if count]
+
+        min_ms = max_ms = 0.0
+
+        if buckets:
+            upper_bound = cls.BUCKET_BOUNDS[buckets[-1]] if buckets[-1] < len(cls.BUCKET_BOUNDS) else float('inf')
+            lower_bound = cls.BUCKET_BOUNDS[buckets[0] - 1] if buckets[0] > 0 else 0.0
+
+            if stage_snapshot['max_ms'] > baseline['max_ms']:
+                max_ms = stage_snapshot['max_ms']
+            else:
+                max_ms = min(stage_snapshot['max_ms'], upper_bound)
+
+            if baseline['calls'] and stage_snapshot['min_ms'] < baseline['min_ms']:
+                min_ms = stage_snapshot['min_ms']
+            else:
+                min_ms = max(stage_snapshot['min_ms'], lower_bound)
+
+        input_shapes = collections.Counter(stage_snapshot['input_shapes'])
+        input_shapes.subtract(baseline['input_shapes'])
+        output_shapes = collections.Counter(stage_snapshot['output_shapes'])
+        output_shapes.subtract(baseline['output_shapes'])
+
+        return {
+            'calls': calls,
+            'exceptions': stage_snapshot['exceptions'] - baseline['exceptions'],
+            'total_ms': total_ms,
+            'mean_ms': total_ms / calls if calls else 0.0,
+            'min_ms': min_ms,
+            'max_ms': max_ms,
+            'histogram': histogram,
+            'allocated_bytes': stage_snapshot['allocated_bytes'] - baseline['allocated_bytes'],
+            'input_shapes': {shape: count for shape, count in input_shapes.items() if count > 0},
+            'output_shapes': {shape: count for shape, count in output_shapes.items() if count > 0}
+        }
+
+    def merge(self, stage_snapshot: dict):
+        self.calls += stage_snapshot['calls']
+        self.exceptions += stage_snapshot['exceptions']
+        self.total_time += stage_snapshot['total_ms'] / 1000
+        self.max_time = max(self.max_time, stage_snapshot['max_ms'] / 1000)
+
+        if stage_snapshot['calls']:
+            self.min_time = min(self.min_time, stage_snapshot['min_ms'] / 1000)
+
+        self.histogram = [count + other_count for count, other_count in zip(self.histogram, stage_snapshot['histogram'])]
+        self.allocated_bytes += stage_snapshot['allocated_bytes']
+        self.input_shapes.update(stage_snapshot['input_shapes'])
+        self.output_shapes.update(stage_snapshot['output_shapes'])
+
+
+class StageProfiler:
+    """
+    Per-stage instrumentation of pipeline execution : call count, wall time histogram, input and output shapes,
+    bytes of newly allocated outputs and exception count.
+
+    The profiler is disabled by default. Callers check the enabled flag before going through profile(),
+    so that a disabled profiler costs a single attribute lookup per stage.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    _shared_profiler = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+
+        self._statistics = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the profiler of the process, which the pipelines report to.
+        """
+        with cls._shared_lock:
+            if cls._shared_profiler is None:
+                cls._shared_profiler = cls()
+
+            return cls._shared_profiler
+
+    def get_statistics(self, name) -> StageStatistics:
+        try:
+            return self._statistics[name]
+        except KeyError:
+            return self._statistics.setdefault(name, StageStatistics())
+
+    def profile(self, name, target, function, *args):
+        """
+        Call function(*args), recording it as a call of stage name on target. Return the result of the call.
+        The last argument is the preallocated output buffer of the stage, if any.
+        Exceptions are propagated unrecorded, the caller handling them records them with record_exception().
+        """
+        start = time.perf_counter()
+        output = function(*args)
+        seconds = time.perf_counter() - start
+
+        # An output that is neither the input nor a preallocated buffer was allocated by the stage
+        allocated_bytes = 0
+
+        if output is not target and output is not args[-1]:
+            allocated_bytes = getattr(output, 'nbytes', 0)
+
+        with self._lock:
+            self.get_statistics(name).record(seconds, getattr(target, 'shape', None),
+                                             getattr(output, 'shape', None), allocated_bytes)
+
+        return output
+
+    def record_exception(self, name):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.get_statistics(name).exceptions += 1
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Return the statistics of every stage as plain dictionaries, which can be pickled and merged.
+        """
+        with self._lock:
+            snapshot = {name: statistics.snapshot() for name, statistics in self._statistics.items()}
+
+            if reset:
+                self._statistics = {}
+
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._statistics = {}
+
+    def merge(self, snapshot: dict):
+        """
+        Add the statistics of a snapshot, e.g. taken in another process.
+        """
+        with self._lock:
+            for name, stage_snapshot in snapshot.items():
+                self.get_statistics(name).merge(stage_snapshot)
+
+    def snapshot_since(self, baseline: dict) -> dict:
+        """
+        Return the statistics recorded since the baseline snapshot, leaving the profiler untouched.
+        The stages recorded since the profiler was reset after the baseline are returned whole.
+        """
+        snapshot = {}
+
+        for name, stage_snapshot in self.snapshot().items():
+            stage_baseline = baseline.get(name)
+
+            if stage_baseline is None or stage_snapshot['calls'] < stage_baseline['calls']:
+                snapshot[name] = stage_snapshot
+                continue
+
+            stage_snapshot = StageStatistics.subtract(stage_snapshot, stage_baseline)
+
+            if stage_snapshot['calls'] or stage_snapshot['exceptions']:
+                snapshot[name] = stage_snapshot
+
+        return snapshot
+
+    def report(self, baseline: dict = None) -> str:
+        """
+        Return the statistics of every stage as a table. If a baseline snapshot is given, only the calls recorded
+        since the baseline are reported.
+        """
+        snapshot = self.snapshot() if baseline is None else self.snapshot_since(baseline)
+
+        if not snapshot:
+            return 'No stage profiled'
+
+        lines = [f'{"stage":<24} {"calls":>7} {"errors":>6} {"mean ms":>9} {"max ms":>9} {"total ms":>10} {"alloc MiB":>10}  shapes']
+
+        for name, stage_snapshot in sorted(snapshot.items(), key=lambda item: -item[1]['total_ms']):
+            input_shapes = ', '.join(str(shape) for shape in stage_snapshot['input_shapes'])
+            output_shapes = ', '.join(str(shape) for shape in stage_snapshot['output_shapes'])
+
+            lines.append(f'{name:<24} {stage_snapshot["calls"]:>7} {stage_snapshot["exceptions"]:>6} '
+                         f'{stage_snapshot["mean_ms"]:>9.2f} {stage_snapshot["max_ms"]:>9.2f} '
+                         f'{stage_snapshot["total_ms"]:>10.1f} {stage_snapshot["allocated_bytes"] / 2**20:>10.1f}  '
+                         f'{input_shapes} -> {output_shapes}')
+
+        return '\n'.join(lines)
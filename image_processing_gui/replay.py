@@ -0,0 +1,73 @@
+"""
+Headless session replayer. Replay a session recorded with Tools > Record Session through the image processing
+pipeline, without a display, and print the pipeline timings.
+
+    python -m image_processing_gui.replay SESSION [--speed SPEED | --max-speed] [--image-dir DIR] [--profile]
+
+This module must never import tkinter, PIL.ImageTk or ttkthemes, directly or through the modules it imports.
+To replay a session against the application itself, see App.replay_session().
+"""
+import argparse
+import logging
+import sys
+
+from .events.event_broker import EventBroker
+from .events.event_recorder import EventReplayer
+from .image_processing.opencv.opencv_pipeline import OpenCVEventCodec
+from .image_processing.opencv.opencv_session import OpenCVHeadlessSession
+from .image_system.stage_profiler import StageProfiler
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m image_processing_gui.replay',
+                                     description='Replay a recorded session through the image processing pipeline.')
+
+    parser.add_argument('session', help='The recorded session file.')
+
+    speed_group = parser.add_mutually_exclusive_group()
+    speed_group.add_argument('--speed', type=float, default=1.0, help='The replay speed relative to the recording. Defaults to 1.')
+    speed_group.add_argument('--max-speed', action='store_true', help='Replay the events as fast as possible.')
+
+    parser.add_argument('--image-dir', default=None, help='Directory searched for the images missing at their recorded path.')
+    parser.add_argument('--profile', action='store_true', help='Profile every stage and print the statistics.')
+
+    return parser
+
+
+def run(session_path: str, speed: float | None = 1.0, image_dir: str = None) -> OpenCVHeadlessSession:
+    event_broker = EventBroker()
+    session = OpenCVHeadlessSession(event_broker, image_dir)
+
+    event_replayer = EventReplayer(session_path, OpenCVEventCodec())
+    logger.info(f'Replaying {len(event_replayer)} events recorded in {event_replayer.duration:.2f} s from {session_path}')
+
+    seconds = event_replayer.replay(event_broker, speed)
+    logger.info(f'Session replayed in {seconds:.2f} s')
+
+    event_broker.shutdown()
+    return session
+
+
+def main(argv: list = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+
+    args = create_parser().parse_args(argv)
+
+    if args.profile:
+        StageProfiler.shared().enabled = True
+
+    session = run(args.session, None if args.max_speed else args.speed, args.image_dir)
+
+    print(session.report())
+
+    if args.profile:
+        print(StageProfiler.shared().report())
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
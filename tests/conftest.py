@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def tk_root():
+    """
+    A hidden Tk root window. Tests needing widgets are skipped when no display is available.
+    """
+    tkinter = pytest.importorskip('tkinter')
+
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError as e:
+        pytest.skip(f'No display available: {e}')
+
+    root.withdraw()
+    yield root
+    root.destroy()
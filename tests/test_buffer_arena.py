@@ -0,0 +1,109 @@
+import queue
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui.image_system.image_displayer import ImageDisplayer
+from image_processing_gui.image_system.image_reader import ImageReader, ImageFrame
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction, ImageProcessorSequenceSet
+
+
+WARMUP_FRAMES = 20
+MEASURED_FRAMES = 200
+
+
+class LiveReader(ImageReader):
+    """
+    Stand-in for a capture reader, cycling through prepared frames with increasing frame ids.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.frame_count = 0
+
+    @property
+    def is_ready(self):
+        return True
+
+    @property
+    def source(self):
+        return None
+
+    def read(self):
+        self.frame_count += 1
+        return ImageFrame(self.frames[self.frame_count % len(self.frames)], self.frame_count, time.perf_counter())
+
+    def stop(self):
+        pass
+
+    def pause(self):
+        pass
+
+
+def create_processor():
+    processor_set = ImageProcessorSequenceSet()
+    processor_set.add(ImageProcessorFunction(name='threshold', callback=cv2.threshold, source_keyword='src', return_index=1,
+                                             enabled=True, priority=1, thresh=127, maxval=255, type=cv2.THRESH_BINARY))
+    processor_set.add(ImageProcessorFunction(name='morph', callback=cv2.morphologyEx, source_keyword='src', enabled=True,
+                                             priority=3, op=cv2.MORPH_OPEN, kernel=np.ones((3, 3), np.uint8), iterations=1))
+    return processor_set
+
+
+def create_displayer(frames, display_size=None):
+    get_display_size = None if display_size is None else (lambda source_size: display_size)
+    displayer = ImageDisplayer(queue.Queue(), LiveReader(frames), get_display_size=get_display_size)
+    displayer.display_frame(processor=create_processor())
+    return displayer
+
+
+@pytest.mark.parametrize('channels', (1, 3))
+@pytest.mark.parametrize('display_size', (None, (320, 240)))
+def test_published_images_do_not_share_arena_buffers(channels, display_size):
+    shape = (480, 640) if channels == 1 else (480, 640, 3)
+    frames = [np.zeros(shape, np.uint8), np.full(shape, 255, np.uint8)]
+
+    displayer = create_displayer(frames, display_size)
+    first_image, _ = displayer.display_queue.get_nowait()
+    first_pixels = np.asarray(first_image).copy()
+
+    # The next frames are written to the same arena buffers
+    for _ in range(4):
+        displayer.display_frame()
+
+    assert np.array_equal(np.asarray(first_image), first_pixels)
+
+
+@pytest.mark.parametrize('channels', (1, 3))
+@pytest.mark.parametrize('display_size', (None, (320, 240)))
+def test_steady_state_allocations_per_frame_are_close_to_zero(channels, display_size):
+    shape = (480, 640) if channels == 1 else (480, 640, 3)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(2)]
+
+    displayer = create_displayer(frames, display_size)
+
+    for _ in range(WARMUP_FRAMES):
+        displayer.display_frame()
+        displayer.display_queue.get_nowait()
+
+    tracemalloc.start()
+
+    try:
+        start_memory, _ = tracemalloc.get_traced_memory()
+
+        for _ in range(MEASURED_FRAMES):
+            displayer.display_frame()
+            displayer.display_queue.get_nowait()
+
+        end_memory, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # A single new array per frame would raise the peak by a whole frame
+    frame_bytes = frames[0].nbytes
+
+    assert peak_memory - start_memory < frame_bytes / 10
+    assert end_memory - start_memory < frame_bytes / 10
@@ -0,0 +1,146 @@
+import pytest
+
+from image_processing_gui.events.event_broker import EventBroker
+from image_processing_gui.frames import display_frame
+from image_processing_gui.frames.display_frame import DisplayFrame
+
+
+MAIN_FPS = 30
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCanvas:
+    """
+    Stand-in for an ImageCanvas, recording its renders. Rendering takes render_time seconds of the fake clock.
+    """
+
+    def __init__(self, name, clock, renders, empty=False, busy=False, render_time=0.0):
+        self.name = name
+        self.clock = clock
+        self.renders = renders
+        self.empty = empty
+        self.busy = busy
+        self.render_time = render_time
+
+    def is_empty(self):
+        return self.empty
+
+    def is_busy(self):
+        return self.busy
+
+    def render_frame(self):
+        self.renders.append(self.name)
+        self.clock.now += self.render_time
+        return True
+
+
+class FakeScheduler:
+
+    frame_period = 1 / MAIN_FPS
+
+    def __init__(self):
+        self.is_running = True
+
+    def stop(self):
+        self.is_running = False
+
+
+class FakeDisplayFrame:
+    """
+    The render loop of DisplayFrame, without its widgets.
+    """
+
+    TICK_BUDGET = DisplayFrame.TICK_BUDGET
+
+    has_readers = DisplayFrame.has_readers
+    render_tick = DisplayFrame.render_tick
+
+    def __init__(self, clock, side_fps=1000, side_canvas_options=None):
+        side_canvas_options = side_canvas_options or {}
+
+        self.renders = []
+        self.event_broker = EventBroker()
+        self.frame_scheduler = FakeScheduler()
+        self.main_canvas = FakeCanvas('main', clock, self.renders)
+        self.side_canvases = [FakeCanvas(f'side_{index}', clock, self.renders, **side_canvas_options.get(index, {}))
+                              for index in range(3)]
+
+        self.side_fps = side_fps
+        self.skipped_side_refreshes = 0
+        self._previous_side_refresh = 0.0
+        self._side_canvas_index = 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(display_frame.time, 'perf_counter', clock)
+    return clock
+
+
+def run_ticks(frame, clock, tick_count):
+    for _ in range(tick_count):
+        frame.render_tick()
+        clock.now += 1 / MAIN_FPS
+
+
+def test_side_canvases_are_rendered_in_turn(clock):
+    frame = FakeDisplayFrame(clock)
+
+    run_ticks(frame, clock, 2)
+
+    assert frame.renders == ['main', 'side_0', 'side_1', 'side_2'] * 2
+    assert frame.skipped_side_refreshes == 0
+
+
+def test_over_budget_ticks_resume_at_the_first_skipped_canvas(clock):
+    # Every side render takes more than the budget of the tick
+    render_time = FakeScheduler.frame_period * DisplayFrame.TICK_BUDGET * 1.2
+    frame = FakeDisplayFrame(clock, side_canvas_options={index: {'render_time': render_time} for index in range(3)})
+
+    run_ticks(frame, clock, 4)
+
+    assert frame.renders == ['main', 'side_0', 'main', 'side_1', 'main', 'side_2', 'main', 'side_0']
+
+    # Two canvases are skipped on every tick
+    assert frame.skipped_side_refreshes == 8
+
+
+def test_busy_and_empty_canvases_are_skipped(clock):
+    frame = FakeDisplayFrame(clock, side_canvas_options={0: {'busy': True}, 2: {'empty': True}})
+
+    run_ticks(frame, clock, 3)
+
+    assert frame.renders == ['main', 'side_1'] * 3
+
+    # Only the busy canvas counts, the empty one has nothing to refresh
+    assert frame.skipped_side_refreshes == 3
+
+
+def test_side_canvases_are_refreshed_at_side_fps(clock):
+    frame = FakeDisplayFrame(clock, side_fps=5)
+
+    run_ticks(frame, clock, MAIN_FPS)
+
+    assert frame.renders.count('main') == MAIN_FPS
+
+    for index in range(3):
+        assert frame.renders.count(f'side_{index}') == 5
+
+
+def test_scheduler_stops_without_readers(clock):
+    frame = FakeDisplayFrame(clock, side_canvas_options={index: {'empty': True} for index in range(3)})
+    frame.main_canvas.empty = True
+
+    run_ticks(frame, clock, 1)
+
+    assert not frame.frame_scheduler.is_running
+    assert frame.renders == []
@@ -0,0 +1,292 @@
+import gc
+import logging
+import threading
+import weakref
+
+import pytest
+
+from image_processing_gui.events.event_broker import EventBroker, Subscription, CoalescePolicy
+from image_processing_gui.events.event_tracer import EventTraceWriter, read_trace
+from image_processing_gui.events.event_constants import *
+from image_processing_gui.image_processing.opencv.opencv_session import OpenCVHeadlessSession
+
+
+OPEN_CLOSE_COUNT = 1000
+
+
+class Subscriber:
+
+    def __init__(self, event_broker: EventBroker, weak: bool = True):
+        self.events = []
+
+        event_broker.subscribe(GlobalEvent.PAUSE, self.on_event, weak=weak)
+        event_broker.subscribe_keyword(widget['display'], self.on_event, index=0, weak=weak)
+        event_broker.subscribe_sequence(event['close'], self.on_event, weak=weak)
+        event_broker.subscribe_regex(r'.*\|CLOSE$', self.on_event, weak=weak)
+
+    def on_event(self, event, *args, **kwargs):
+        self.events.append(event)
+
+
+def count_subscriptions(event_broker: EventBroker) -> int:
+    return (sum(len(subscriptions) for subscriptions in event_broker.subscriptions.values())
+            + sum(len(subscriptions) for subscriptions in event_broker.keyword_subscriptions.values())
+            + sum(len(subscriptions) for _, subscriptions in event_broker.pattern_subscriptions.values()))
+
+
+def assert_collected_and_pruned(event_broker: EventBroker, references: list):
+    gc.collect()
+
+    assert all(reference() is None for reference in references)
+
+    # Dead subscriptions are pruned on the next resolution
+    event_broker.dispatch(DisplayEvent.CLOSE)
+
+    assert count_subscriptions(event_broker) == 0
+    assert event_broker.resolve(GlobalEvent.PAUSE) == ()
+
+
+def test_subscribers_are_collected_and_pruned(caplog):
+    event_broker = EventBroker()
+    references = []
+    caplog.set_level(logging.DEBUG, logger='image_processing_gui.events.event_broker')
+
+    for _ in range(OPEN_CLOSE_COUNT):
+        subscriber = Subscriber(event_broker)
+        event_broker.dispatch(DisplayEvent.CLOSE)
+
+        assert subscriber.events == [DisplayEvent.CLOSE] * 3
+
+        references.append(weakref.ref(subscriber))
+        del subscriber
+
+    assert_collected_and_pruned(event_broker, references)
+
+    assert 'Weak subscription of Subscriber.on_event dropped' in caplog.text
+
+
+def test_headless_sessions_are_collected_and_pruned():
+    event_broker = EventBroker()
+    references = []
+
+    for _ in range(OPEN_CLOSE_COUNT):
+        references.append(weakref.ref(OpenCVHeadlessSession(event_broker)))
+
+    assert_collected_and_pruned(event_broker, references)
+
+
+def test_subscriptions_keep_their_owner_by_default():
+    event_broker = EventBroker()
+    subscriber = Subscriber(event_broker, weak=False)
+
+    reference = weakref.ref(subscriber)
+    del subscriber
+    gc.collect()
+
+    assert reference() is not None
+
+    event_broker.dispatch(GlobalEvent.PAUSE)
+
+    assert reference().events == [GlobalEvent.PAUSE]
+
+
+def test_strong_subscriptions_keep_their_weakly_subscribed_owner():
+    event_broker = EventBroker()
+    subscriber = Subscriber(event_broker)
+    event_broker.subscribe(GlobalEvent.RESUME, subscriber.on_event)
+
+    reference = weakref.ref(subscriber)
+    del subscriber
+    gc.collect()
+
+    assert reference() is not None
+
+    event_broker.dispatch(GlobalEvent.RESUME)
+
+    assert reference().events == [GlobalEvent.RESUME]
+
+
+def test_closed_tabs_and_canvases_are_collected(tk_root):
+    from image_processing_gui.console.console_logger import ConsoleLogger
+    from image_processing_gui.console.console_metrics import ConsoleMetrics
+    from image_processing_gui.frames.image_canvas import ImageCanvas
+
+    event_broker = EventBroker()
+    references = []
+
+    for index in range(OPEN_CLOSE_COUNT):
+        widgets = (ConsoleLogger(event_broker, tk_root), ConsoleMetrics(event_broker, tk_root),
+                   ImageCanvas(tk_root, event_broker, width=64, height=48))
+
+        for widget in widgets:
+            references.append(weakref.ref(widget))
+            widget.on_close()
+
+        widgets[-1].destroy()
+        del widgets, widget
+
+        if index % 100 == 0:
+            tk_root.update()
+
+    tk_root.update()
+
+    assert_collected_and_pruned(event_broker, references)
+
+
+def test_tracer_counts_coalesced_dispatches_and_flushed_deliveries(tmp_path):
+    event_broker = EventBroker()
+    subscriber = Subscriber(event_broker)
+    event_broker.set_coalesce_policy(GlobalEvent.PAUSE, CoalescePolicy())
+
+    tracer = event_broker.start_tracing(str(tmp_path / 'events.trace'))
+
+    for _ in range(10):
+        event_broker.dispatch(GlobalEvent.PAUSE)
+
+    event_broker.dispatch(DisplayEvent.CLOSE)
+    event_broker.flush()
+
+    event_broker.stop_tracing()
+    snapshot = tracer.snapshot()
+
+    assert snapshot['dispatch_counts'] == {GlobalEvent.PAUSE: 10, DisplayEvent.CLOSE: 1}
+    assert snapshot['coalesced_counts'] == {GlobalEvent.PAUSE: 10}
+    assert snapshot['flushed_counts'] == {GlobalEvent.PAUSE: 1}
+    assert subscriber.events.count(GlobalEvent.PAUSE) == 1
+
+    dispatched_events = [record[2] for record in read_trace(str(tmp_path / 'events.trace')) if record[0] == 'dispatch']
+
+    assert dispatched_events == [GlobalEvent.PAUSE] * 10 + [DisplayEvent.CLOSE]
+
+    report = tracer.report()
+
+    assert 'coalesced' in report and 'flushed' in report
+
+
+def test_trace_keeps_the_names_of_more_than_65536_events(tmp_path):
+    path = str(tmp_path / 'events.trace')
+    writer = EventTraceWriter(path)
+    event_count = 0x10000 + 2
+
+    for i in range(event_count):
+        writer.write_dispatch(float(i), f'event {i}', 0)
+
+    writer.write_callback(0.0, 'event 0', 'callback', 1, 0.001)
+    writer.close()
+
+    records = list(read_trace(path))
+
+    assert [record[2] for record in records[:event_count]] == [f'event {i}' for i in range(event_count)]
+    assert records[-1][:4] == ('callback', 0.0, 'event 0', 'callback')
+
+
+def test_trace_raises_when_it_runs_out_of_ids(tmp_path):
+    writer = EventTraceWriter(str(tmp_path / 'events.trace'))
+    writer.MAX_NAME_ID = 1
+
+    writer.write_dispatch(0.0, 'first', 0)
+    writer.write_dispatch(0.0, 'second', 0)
+
+    with pytest.raises(OverflowError):
+        writer.write_dispatch(0.0, 'third', 0)
+
+    writer.close()
+
+
+def test_stop_tracing_during_a_worker_callback(tmp_path, caplog):
+    event_broker = EventBroker()
+    running, release = threading.Event(), threading.Event()
+
+    def on_event(event):
+        running.set()
+        release.wait(timeout=5)
+
+    event_broker.subscribe(GlobalEvent.PAUSE, on_event, context=Subscription.WORKER)
+    tracer = event_broker.start_tracing(str(tmp_path / 'events.trace'))
+    event_broker.dispatch(GlobalEvent.PAUSE)
+
+    assert running.wait(timeout=5)
+
+    # The callback returns, and its latency is recorded, after the trace file was closed
+    event_broker.stop_tracing()
+    release.set()
+    event_broker.shutdown()
+
+    snapshot = tracer.snapshot()
+
+    assert sum(statistics['calls'] for statistics in snapshot['callbacks'].values()) == 1
+    assert not [record for record in caplog.records if record.levelname == 'ERROR']
+    assert [record[0] for record in read_trace(str(tmp_path / 'events.trace'))] == ['dispatch']
+
+
+def test_dispatches_within_a_tick_are_delivered_once_with_the_latest_payload():
+    event_broker = EventBroker()
+    event_broker.set_coalesce_policy(ImageProcessingEvent.APPLY_PROCESS, CoalescePolicy())
+    deliveries = []
+
+    event_broker.subscribe(ImageProcessingEvent.APPLY_PROCESS, lambda event, **kwargs: deliveries.append(kwargs))
+
+    for index in range(50):
+        event_broker.dispatch(ImageProcessingEvent.APPLY_PROCESS, processor=index)
+
+    assert deliveries == []
+    assert event_broker.has_pending()
+
+    assert event_broker.flush() == 1
+    assert deliveries == [{'processor': 49}]
+
+    # Nothing was dispatched during the next tick
+    assert event_broker.flush() == 0
+    assert not event_broker.has_pending()
+
+    event_broker.dispatch(ImageProcessingEvent.APPLY_PROCESS, processor=50)
+    event_broker.flush()
+
+    assert deliveries == [{'processor': 49}, {'processor': 50}]
+
+
+def test_callbacks_are_delivered_on_the_thread_of_their_context():
+    event_broker = EventBroker()
+    threads = {}
+    worker_called = threading.Event()
+
+    def record_thread(context):
+        def on_event(event):
+            threads.setdefault(context, []).append(threading.current_thread())
+
+            if context == Subscription.WORKER:
+                worker_called.set()
+
+        return on_event
+
+    for context in (Subscription.INLINE, Subscription.MAIN, Subscription.WORKER):
+        event_broker.subscribe(GlobalEvent.PAUSE, record_thread(context), context=context)
+
+    dispatcher = threading.Thread(target=event_broker.dispatch, args=(GlobalEvent.PAUSE,))
+    dispatcher.start()
+    dispatcher.join(timeout=5)
+
+    assert worker_called.wait(timeout=5)
+
+    # The main thread callback waits in the queue until the main thread flushes the broker
+    assert threads[Subscription.INLINE] == [dispatcher]
+    assert Subscription.MAIN not in threads
+    assert event_broker.has_pending()
+
+    assert event_broker.flush() == 1
+    assert threads[Subscription.MAIN] == [threading.current_thread()]
+
+    assert threads[Subscription.WORKER][0] not in (dispatcher, threading.current_thread())
+
+    event_broker.shutdown()
+
+
+def test_main_thread_dispatches_are_delivered_immediately():
+    event_broker = EventBroker()
+    threads = []
+
+    event_broker.subscribe(GlobalEvent.PAUSE, lambda event: threads.append(threading.current_thread()))
+    event_broker.dispatch(GlobalEvent.PAUSE)
+
+    assert threads == [threading.current_thread()]
+    assert not event_broker.has_pending()
@@ -0,0 +1,162 @@
+import itertools
+import logging
+
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui.image_system.buffer_arena import BufferArena
+from image_processing_gui.image_system.execution_plan import ExecutionPlan, LookUpTableStep
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction
+from image_processing_gui.image_system.stage_profiler import StageProfiler
+
+
+THRESHOLD_TYPES = (cv2.THRESH_BINARY, cv2.THRESH_BINARY_INV, cv2.THRESH_TRUNC, cv2.THRESH_TOZERO, cv2.THRESH_TOZERO_INV)
+
+
+def create_threshold_step(threshold_type, thresh=127, maxval=255):
+    processor = ImageProcessorFunction(name='threshold', callback=cv2.threshold, source_keyword='src', return_index=1,
+                                       enabled=True, thresh=thresh, maxval=maxval, type=threshold_type)
+    return processor.compile_steps()[0]
+
+
+def create_adaptive_threshold_step():
+    processor = ImageProcessorFunction(name='adaptive_threshold', callback=cv2.adaptiveThreshold, source_keyword='src',
+                                       enabled=True, maxValue=255, adaptiveMethod=cv2.ADAPTIVE_THRESH_MEAN_C,
+                                       thresholdType=cv2.THRESH_BINARY, blockSize=11, C=2)
+    return processor.compile_steps()[0]
+
+
+def create_image(channels=1, dtype=np.uint8, seed=0):
+    shape = (97, 131) if channels == 1 else (97, 131, channels)
+    image = np.random.default_rng(seed).integers(0, 256, size=shape)
+    return image.astype(dtype)
+
+
+def assert_fused_matches_sequential(steps, image):
+    # Fuse the short runs too, which the default plan keeps unfused
+    fused_plan = ExecutionPlan(steps, min_fused_run=2)
+    sequential_plan = ExecutionPlan(steps, fuse=False)
+
+    expected = sequential_plan.process(image)
+
+    assert np.array_equal(fused_plan.process(image), expected)
+    assert np.array_equal(fused_plan.process(image, BufferArena()), expected)
+
+    return fused_plan
+
+
+@pytest.mark.parametrize('threshold_type', THRESHOLD_TYPES)
+@pytest.mark.parametrize('channels', (1, 3))
+def test_single_threshold_type_chain_is_fused(threshold_type, channels):
+    steps = [create_threshold_step(threshold_type, thresh) for thresh in (200, 90, 40)]
+    fused_plan = assert_fused_matches_sequential(steps, create_image(channels))
+
+    assert len(fused_plan) == 1
+    assert isinstance(fused_plan.steps[0], LookUpTableStep)
+
+
+@pytest.mark.parametrize('chain_length', (2, 3, 4, 5))
+@pytest.mark.parametrize('threshold_types', list(itertools.product(THRESHOLD_TYPES, repeat=2)))
+def test_mixed_threshold_chains_match_sequential(chain_length, threshold_types):
+    rng = np.random.default_rng(chain_length)
+    steps = [create_threshold_step(threshold_types[index % 2], thresh=int(rng.integers(0, 256)), maxval=int(rng.integers(1, 256)))
+             for index in range(chain_length)]
+
+    fused_plan = assert_fused_matches_sequential(steps, create_image())
+
+    assert len(fused_plan) == 1
+
+
+@pytest.mark.parametrize('threshold_type', THRESHOLD_TYPES)
+def test_fractional_and_saturating_parameters_match_sequential(threshold_type):
+    steps = [create_threshold_step(threshold_type, thresh=100.5, maxval=300), create_threshold_step(threshold_type, thresh=-1.5, maxval=17.7)]
+
+    assert_fused_matches_sequential(steps, create_image())
+
+
+@pytest.mark.parametrize('dtype', (np.float32, np.uint16))
+def test_non_uint8_images_go_through_the_original_steps(dtype):
+    steps = [create_threshold_step(cv2.THRESH_TRUNC, 150), create_threshold_step(cv2.THRESH_TOZERO, 60)]
+
+    assert_fused_matches_sequential(steps, create_image(dtype=dtype))
+
+
+@pytest.mark.parametrize('channels', (3, 4))
+def test_multi_channel_images_go_through_the_original_steps(channels):
+    steps = [create_threshold_step(cv2.THRESH_TRUNC, 150), create_threshold_step(cv2.THRESH_TOZERO, 60)]
+    image = create_image(channels)
+
+    fused_step = assert_fused_matches_sequential(steps, image).steps[0]
+
+    assert not fused_step.is_fused(image)
+    assert fused_step.output_like(image) is None
+    assert fused_step.is_fused(create_image(1))
+    assert fused_step.is_fused(create_image(1)[:, :, np.newaxis])
+
+
+@pytest.mark.parametrize('global_type', (cv2.THRESH_OTSU, cv2.THRESH_TRIANGLE))
+def test_otsu_and_triangle_thresholds_are_not_fused(global_type):
+    global_step = create_threshold_step(cv2.THRESH_BINARY | global_type, thresh=0)
+    steps = [create_threshold_step(cv2.THRESH_TOZERO, 30), global_step, create_threshold_step(cv2.THRESH_TRUNC, 200)]
+
+    fused_plan = assert_fused_matches_sequential(steps, create_image())
+
+    assert not LookUpTableStep.is_point_wise(global_step)
+    assert global_step in fused_plan.steps
+    assert not any(isinstance(step, LookUpTableStep) for step in fused_plan.steps)
+
+
+def test_adaptive_threshold_is_not_fused():
+    adaptive_step = create_adaptive_threshold_step()
+    steps = [create_threshold_step(cv2.THRESH_TOZERO, 30), create_threshold_step(cv2.THRESH_TRUNC, 220),
+             adaptive_step, create_threshold_step(cv2.THRESH_BINARY, 100), create_threshold_step(cv2.THRESH_BINARY_INV, 50)]
+
+    fused_plan = assert_fused_matches_sequential(steps, create_image())
+
+    assert not LookUpTableStep.is_point_wise(adaptive_step)
+    assert [type(step) for step in fused_plan.steps] == [LookUpTableStep, type(adaptive_step), LookUpTableStep]
+
+
+def test_single_point_wise_step_is_not_fused():
+    step = create_threshold_step(cv2.THRESH_BINARY)
+
+    assert ExecutionPlan([step]).steps == (step,)
+    assert ExecutionPlan([step], min_fused_run=1).steps == (step,)
+
+
+def test_runs_shorter_than_the_minimum_are_not_fused():
+    steps = [create_threshold_step(cv2.THRESH_TOZERO, thresh) for thresh in range(10, 10 + 10 * ExecutionPlan.MIN_FUSED_RUN, 10)]
+
+    assert ExecutionPlan(steps[:-1]).steps == tuple(steps[:-1])
+
+    fused_plan = assert_fused_matches_sequential(steps, create_image())
+
+    assert [type(step) for step in ExecutionPlan(steps).steps] == [LookUpTableStep]
+    assert len(fused_plan) == 1
+
+
+
+def test_failing_steps_are_skipped_logged_and_recorded_once(caplog):
+    def fail(src):
+        raise ValueError('broken stage')
+
+    failing_step = ImageProcessorFunction(name='failing', callback=fail, source_keyword='src', enabled=True).compile_steps()[0]
+    threshold_step = create_threshold_step(cv2.THRESH_BINARY)
+    image = create_image()
+
+    profiler = StageProfiler.shared()
+    profiler.reset()
+    profiler.enabled = True
+
+    try:
+        with caplog.at_level(logging.DEBUG, logger='image_processing_gui.image_system.execution_plan'):
+            output = ExecutionPlan([failing_step, threshold_step]).process(image)
+
+        assert profiler.snapshot()['failing']['exceptions'] == 1
+    finally:
+        profiler.enabled = False
+        profiler.reset()
+
+    assert np.array_equal(output, threshold_step.process(image))
+    assert 'failing failed: broken stage' in caplog.text
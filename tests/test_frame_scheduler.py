@@ -0,0 +1,85 @@
+from image_processing_gui.frames.frame_scheduler import FrameScheduler
+
+
+class FakeWidget:
+    """
+    Stand-in for the Tk widget of the scheduler, keeping the scheduled callbacks instead of running them.
+    """
+
+    def __init__(self):
+        self.scheduled = {}
+        self.delays = []
+        self._next_id = 0
+
+    def after(self, delay, callback):
+        self.delays.append(delay)
+        return self.after_idle(callback)
+
+    def after_idle(self, callback):
+        self._next_id += 1
+        self.scheduled[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def run_next(self):
+        after_id = min(self.scheduled)
+        self.scheduled.pop(after_id)()
+
+
+def test_stop_from_the_callback_ends_the_ticks():
+    widget = FakeWidget()
+    scheduler = None
+    ticks = []
+
+    def on_tick():
+        ticks.append(len(ticks))
+
+        if len(ticks) == 3:
+            scheduler.stop()
+
+        return True
+
+    scheduler = FrameScheduler(widget, on_tick)
+    scheduler.start()
+
+    for _ in range(3):
+        widget.run_next()
+
+    assert len(ticks) == 3
+    assert not scheduler.is_running
+    assert not widget.scheduled
+
+    scheduler.start()
+
+    assert scheduler.is_running
+    assert len(widget.scheduled) == 1
+
+
+def test_delay_grows_with_the_worker_frame_time():
+    widget = FakeWidget()
+    scheduler = FrameScheduler(widget, lambda: True, target_fps=30)
+    scheduler.start()
+
+    for _ in range(5):
+        widget.run_next()
+
+    assert max(widget.delays) <= 34
+    assert not scheduler.stats()['backoff']
+
+    # The ticks stay short, the frames take 100 ms on the worker
+    for _ in range(20):
+        scheduler.record_frame_time(0.1)
+        widget.run_next()
+
+    assert widget.delays[-1] > widget.delays[4]
+    assert widget.delays[-1] >= 100
+    assert scheduler.stats()['backoff']
+
+    # Once the frames are cheap again, the delay goes back to the frame period
+    for _ in range(40):
+        scheduler.record_frame_time(0.001)
+        widget.run_next()
+
+    assert widget.delays[-1] <= 34
@@ -0,0 +1,64 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui import batch
+from image_processing_gui.image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec
+from image_processing_gui.image_system.image_batch import BatchProcessor
+
+
+THRESHOLD_SPEC = OpenCVPipelineSpec([[{'name': 'threshold', 'priority': 1, 'return_index': 1,
+                                       'arguments': {'thresh': 100, 'maxval': 255, 'type': 0}}]])
+
+
+def write_image(path: str, value: int) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cv2.imwrite(path, np.full((16, 24), value, np.uint8))
+    return path
+
+
+@pytest.fixture
+def same_named_images(tmp_path):
+    # Below and above the threshold, so that the two outputs differ
+    return [write_image(str(tmp_path / 'inputs' / 'a' / 'img0.png'), 50),
+            write_image(str(tmp_path / 'inputs' / 'b' / 'img0.png'), 150)]
+
+
+def test_same_named_inputs_keep_separate_outputs(same_named_images, tmp_path):
+    output_dir = str(tmp_path / 'outputs')
+
+    with BatchProcessor(THRESHOLD_SPEC, max_workers=1) as batch_processor:
+        output_paths = batch_processor.process_files(same_named_images, output_dir)
+
+    assert output_paths == [os.path.join(output_dir, 'a', 'img0.png'), os.path.join(output_dir, 'b', 'img0.png')]
+    assert batch_processor.statistics.failed_count == 0
+
+    assert cv2.imread(output_paths[0], cv2.IMREAD_GRAYSCALE).max() == 0
+    assert cv2.imread(output_paths[1], cv2.IMREAD_GRAYSCALE).min() == 255
+
+
+def test_colliding_outputs_are_failures(same_named_images, tmp_path):
+    output_dir = str(tmp_path / 'outputs')
+
+    with BatchProcessor(THRESHOLD_SPEC, max_workers=1) as batch_processor:
+        output_paths = batch_processor.process_files(same_named_images[:1] * 2, output_dir)
+
+    assert output_paths == [os.path.join(output_dir, 'img0.png'), None]
+    assert batch_processor.statistics.frame_count == 2
+    assert batch_processor.statistics.failed_count == 1
+
+
+def test_batch_fails_on_same_named_directories(same_named_images, tmp_path):
+    pipeline_path = str(tmp_path / 'pipeline.json')
+    THRESHOLD_SPEC.save(pipeline_path)
+
+    # Both directories are written to outputs/a
+    other_dir = os.path.join(str(tmp_path), 'other', 'inputs')
+    write_image(os.path.join(other_dir, 'a', 'img0.png'), 50)
+
+    return_code = batch.main([pipeline_path, os.path.join(str(tmp_path), 'inputs', 'a'), os.path.join(other_dir, 'a'),
+                              '--output', str(tmp_path / 'outputs'), '--workers', '1'])
+
+    assert return_code == 1
@@ -0,0 +1,145 @@
+import queue
+
+import numpy as np
+
+from image_processing_gui.image_system.image_cache import ImageCache
+from image_processing_gui.image_system.image_displayer import ImageDisplayer
+from image_processing_gui.image_system.image_reader import ImageReader, StaticImageReader, ImageFrame
+from image_processing_gui.image_system.image_processor import ImageProcessorSequenceSet
+from image_processing_gui.image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec
+
+
+def create_image(nbytes, value=0):
+    return np.full(nbytes, value, dtype=np.uint8)
+
+
+class LiveReader(ImageReader):
+    """
+    Reader returning a new frame of the same image on every read, like a video source.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.frame_id = 0
+
+    @property
+    def is_ready(self):
+        return True
+
+    @property
+    def source(self):
+        return self.image
+
+    def read(self):
+        self.frame_id += 1
+        return ImageFrame(self.image, self.frame_id, 0.0)
+
+    def stop(self):
+        pass
+
+    def pause(self):
+        pass
+
+
+def create_processor_set(thresh, threshold1=100):
+    processor_set = ImageProcessorSequenceSet()
+    processor_set.add(OpenCVPipelineSpec.build_stage({'name': 'threshold', 'priority': 1, 'return_index': 1,
+                                                      'arguments': {'thresh': thresh, 'maxval': 255, 'type': 0}}))
+    processor_set.add(OpenCVPipelineSpec.build_stage({'name': 'canny', 'priority': 2,
+                                                      'arguments': {'threshold1': threshold1, 'threshold2': 200}}))
+    return processor_set
+
+
+def test_least_recently_used_images_are_evicted_first():
+    cache = ImageCache(max_bytes=300)
+
+    cache.put('a', create_image(100))
+    cache.put('b', create_image(100))
+    cache.put('c', create_image(100))
+
+    # Reading 'a' makes 'b' the least recently used image
+    assert cache.get('a') is not None
+    cache.put('d', create_image(100))
+
+    assert 'b' not in cache
+    assert all(key in cache for key in ('a', 'c', 'd'))
+    assert cache.evictions == 1
+
+
+def test_byte_budget_is_never_exceeded():
+    cache = ImageCache(max_bytes=1000)
+
+    for i in range(20):
+        cache.put(i, create_image(150))
+        assert cache.size <= cache.max_bytes
+
+    assert len(cache) == 6
+    assert cache.size == 900
+    assert cache.stats()['bytes'] == 900
+
+    # Replacing an image accounts for the bytes of the new image only
+    cache.put(19, create_image(50))
+    assert cache.size == 800
+
+
+def test_oversized_images_are_not_cached_and_evict_nothing():
+    cache = ImageCache(max_bytes=300)
+    cache.put('small', create_image(100))
+
+    cache.put('large', create_image(301))
+
+    assert 'large' not in cache
+    assert 'small' in cache
+    assert cache.size == 100
+    assert cache.evictions == 0
+
+    # The stale image of a key must not outlive an oversized replacement
+    cache.put('small', create_image(301))
+
+    assert cache.get('small') is None
+    assert cache.size == 0
+
+
+def test_changed_stage_invalidates_its_key_and_the_following_stages():
+    image = np.random.default_rng(0).integers(0, 256, (32, 32), dtype=np.uint8)
+    displayer = ImageDisplayer(queue.Queue(), StaticImageReader(image))
+    frame_key = displayer.get_frame_key(image)
+
+    first = displayer.process_stages(image, create_processor_set(100).compile_steps(), frame_key)
+    assert displayer.stage_cache.misses == 2
+
+    displayer.stage_cache.reset_stats()
+    assert np.array_equal(displayer.process_stages(image, create_processor_set(100).compile_steps(), frame_key), first)
+    assert displayer.stage_cache.hits == 2
+    assert displayer.stage_cache.misses == 0
+
+    # The threshold comes first, changing it executes both stages again
+    displayer.stage_cache.reset_stats()
+    second = displayer.process_stages(image, create_processor_set(200).compile_steps(), frame_key)
+
+    assert displayer.stage_cache.hits == 0
+    assert displayer.stage_cache.misses == 2
+    assert not np.array_equal(first, second)
+
+    # Changing the last stage reuses the cached threshold
+    displayer.stage_cache.reset_stats()
+    displayer.process_stages(image, create_processor_set(200, threshold1=50).compile_steps(), frame_key)
+
+    assert displayer.stage_cache.hits == 1
+    assert displayer.stage_cache.misses == 1
+
+
+def test_stages_of_live_frames_are_not_cached():
+    image = np.zeros((32, 32), dtype=np.uint8)
+
+    displayer = ImageDisplayer(queue.Queue(), StaticImageReader(image))
+    displayer.display(processor=create_processor_set(100))
+
+    assert len(displayer.stage_cache) == 2
+
+    displayer.set_reader(LiveReader(image))
+    displayer.display(processor=create_processor_set(100))
+    displayer.display()
+
+    assert displayer.display_queue.qsize() == 3
+    assert len(displayer.stage_cache) == 0
@@ -0,0 +1,77 @@
+import numpy as np
+from PIL import Image
+
+from image_processing_gui.events.event_broker import EventBroker
+from image_processing_gui.frames.image_canvas import ImageCanvas
+from image_processing_gui.image_system.frame_trace import FrameTrace
+from image_processing_gui.image_system.metrics_registry import get_process_rss
+
+
+SOAK_FRAMES = 10000
+WARMUP_FRAMES = 500
+
+# RSS growth tolerated over the soak, for allocator noise. A leaked 320x240 RGB frame per tick would be ~2 GiB.
+MAX_RSS_GROWTH = 16 * 2**20
+
+
+def create_frames():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    return [Image.fromarray(np.full_like(frame, value)) for value in range(0, 256, 32)]
+
+
+def test_blit_keeps_one_item_and_flat_memory_over_soak(tk_root):
+    canvas = ImageCanvas(tk_root, EventBroker(), width=320, height=240)
+    frames = create_frames()
+
+    for index in range(WARMUP_FRAMES):
+        canvas.blit(frames[index % len(frames)])
+
+    tk_root.update()
+    photo_image = canvas.image
+    start_rss = get_process_rss()
+
+    for index in range(SOAK_FRAMES):
+        canvas.blit(frames[index % len(frames)])
+
+        if index % 100 == 0:
+            tk_root.update()
+
+    tk_root.update()
+
+    assert len(canvas.find_all()) == 1
+    assert canvas.image is photo_image
+
+    if start_rss is not None:
+        assert get_process_rss() - start_rss < MAX_RSS_GROWTH
+
+
+def test_display_queue_frames_reuse_the_canvas_item(tk_root):
+    canvas = ImageCanvas(tk_root, EventBroker(), width=320, height=240)
+    frames = create_frames()
+
+    for index in range(WARMUP_FRAMES):
+        canvas.display_queue.put((frames[index % len(frames)], FrameTrace()))
+        canvas.show_display_queue()
+
+    item = canvas.image_item
+
+    for index in range(SOAK_FRAMES // 10):
+        canvas.display_queue.put((frames[index % len(frames)], FrameTrace()))
+        canvas.show_display_queue()
+
+    assert canvas.find_all() == (item,)
+    assert canvas.latency_tracker.frame_count == WARMUP_FRAMES + SOAK_FRAMES // 10
+
+
+def test_blit_reallocates_only_when_the_size_changes(tk_root):
+    canvas = ImageCanvas(tk_root, EventBroker(), width=320, height=240)
+
+    canvas.blit(Image.new('RGB', (320, 240)))
+    photo_image = canvas.image
+
+    canvas.blit(Image.new('RGB', (320, 240), (255, 0, 0)))
+    assert canvas.image is photo_image
+
+    canvas.blit(Image.new('RGB', (160, 120)))
+    assert canvas.image is not photo_image
+    assert len(canvas.find_all()) == 1
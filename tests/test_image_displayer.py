@@ -0,0 +1,115 @@
+import queue
+import threading
+
+import numpy as np
+
+from image_processing_gui.image_system.image_displayer import ImageDisplayer
+from image_processing_gui.image_system.image_reader import StaticImageReader
+from image_processing_gui.image_system.image_processor import ImageProcessorSequenceSet
+from image_processing_gui.image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec
+
+
+def create_threshold_set(thresh):
+    processor_set = ImageProcessorSequenceSet()
+    processor_set.add(OpenCVPipelineSpec.build_stage({'name': 'threshold', 'arguments': {'thresh': thresh, 'maxval': 255, 'type': 0}}))
+    return processor_set
+
+
+class BlockingReader(StaticImageReader):
+    """
+    Static reader whose read() waits until it is released, to keep the worker of the displayer busy.
+    """
+
+    def __init__(self, source):
+        super().__init__(source)
+        self.reading = threading.Event()
+        self.release = threading.Event()
+
+    def read(self):
+        self.reading.set()
+        self.release.wait(timeout=5)
+        return super().read()
+
+
+def get_published_images(display_queue):
+    images = []
+
+    while not display_queue.empty():
+        images.append(np.asarray(display_queue.get_nowait()[0]))
+
+    return images
+
+
+def test_pending_request_keeps_the_processor_of_the_request_it_replaces():
+    image = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    reader = BlockingReader(image)
+    display_queue = queue.Queue()
+    displayer = ImageDisplayer(display_queue, reader, use_worker=True)
+
+    displayer.display()
+    assert reader.reading.wait(timeout=5)
+
+    # Both requests arrive while the worker is busy, the second one must not drop the processor of the first
+    displayer.display(processor=create_threshold_set(200))
+    displayer.display()
+
+    reader.release.set()
+    displayer.executor.shutdown(wait=True)
+
+    images = get_published_images(display_queue)
+    assert np.array_equal(images[-1], np.where(image > 200, 255, 0).astype(np.uint8))
+
+
+def test_worker_processes_a_snapshot_of_the_processor():
+    image = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    reader = BlockingReader(image)
+    display_queue = queue.Queue()
+    displayer = ImageDisplayer(display_queue, reader, use_worker=True)
+
+    processor_set = create_threshold_set(50)
+    displayer.display(processor=processor_set)
+    assert reader.reading.wait(timeout=5)
+
+    # Changed by the Tk thread while the worker is running
+    processor_set.clear()
+    processor_set.add(OpenCVPipelineSpec.build_stage({'name': 'threshold', 'arguments': {'thresh': 200, 'maxval': 255, 'type': 0}}))
+
+    reader.release.set()
+    displayer.executor.shutdown(wait=True)
+
+    images = get_published_images(display_queue)
+    assert np.array_equal(images[0], np.where(image > 50, 255, 0).astype(np.uint8))
+
+
+def get_worker_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith(ImageDisplayer.__name__)]
+
+
+def test_stop_shuts_the_worker_thread_down():
+    image = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    reader = BlockingReader(image)
+    reader.release.set()
+    display_queue = queue.Queue()
+    displayer = ImageDisplayer(display_queue, reader, use_worker=True)
+
+    displayer.display(processor=create_threshold_set(100))
+    assert reader.reading.wait(timeout=5)
+
+    worker_threads = get_worker_threads()
+    assert worker_threads
+
+    displayer.stop()
+
+    for thread in worker_threads:
+        thread.join(timeout=5)
+
+    assert displayer.executor is None
+    assert not get_worker_threads()
+
+    # The canvas may be reopened with another reader, a new worker is started
+    displayer.set_reader(BlockingReader(image))
+    displayer.reader.release.set()
+    displayer.display()
+    displayer.executor.shutdown(wait=True)
+
+    assert len(get_published_images(display_queue)) == 2
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import numpy as np
+
+from image_processing_gui.image_system import image_reader
+from image_processing_gui.image_system.image_reader import BufferedDynamicImageReader
+
+
+class SlowCapture:
+    """
+    Stand-in for cv2.VideoCapture whose read() blocks, like a camera waiting for its next frame.
+    """
+
+    def __init__(self, read_time=0.0, frame_limit=None, end_of_file=False):
+        """
+        After frame_limit frames, read() either reports the end of the file, or blocks until unblocked is set.
+        """
+        self.read_time = read_time
+        self.frame_limit = frame_limit
+        self.end_of_file = end_of_file
+        self.read_count = 0
+        self.unblocked = threading.Event()
+        self.released = threading.Event()
+        self.read_after_release = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.released.is_set():
+            self.read_after_release = True
+
+        if self.frame_limit is not None and self.read_count >= self.frame_limit:
+            if self.end_of_file:
+                return False, None
+
+            self.unblocked.wait()
+
+        time.sleep(self.read_time)
+        self.read_count += 1
+
+        return True, np.full((4, 4, 3), self.read_count % 256, dtype=np.uint8)
+
+    def release(self):
+        self.released.set()
+
+
+def test_stop_waits_for_the_capture_thread_before_releasing(monkeypatch):
+    capture = SlowCapture(read_time=1.5)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0)
+    time.sleep(0.1)
+    reader.stop()
+
+    # The capture thread is still inside read(), the capture must not be released under it
+    assert not capture.released.is_set()
+    assert capture.released.wait(timeout=3)
+    assert not capture.read_after_release
+
+
+def test_read_counts_dropped_and_duplicated_frames(monkeypatch):
+    capture = SlowCapture(read_time=0.001)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0)
+    time.sleep(0.2)
+
+    frame = reader.read()
+    assert frame is not None and frame.frame_id > 1
+    assert reader.dropped_frames > 0
+    assert reader.duplicated_frames == 0
+
+    reader.stop()
+    assert capture.released.wait(timeout=1)
+
+
+def test_read_without_a_new_frame_returns_a_duplicate(monkeypatch):
+    capture = SlowCapture(frame_limit=1)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0)
+
+    while capture.read_count < 1:
+        time.sleep(0.01)
+
+    first_frame = reader.read()
+
+    assert reader.read() is first_frame
+    assert reader.read() is first_frame
+    assert reader.duplicated_frames == 2
+    assert reader.dropped_frames == 0
+
+    capture.unblocked.set()
+    reader.stop()
+    assert capture.released.wait(timeout=1)
+
+
+def test_fifo_policy_returns_frames_in_capture_order(monkeypatch):
+    capture = SlowCapture(frame_limit=5)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0, drop_policy=BufferedDynamicImageReader.DROP_FIFO, buffer_size=3)
+
+    while capture.read_count < 5:
+        time.sleep(0.01)
+
+    time.sleep(0.05)
+    frames = [reader.read() for _ in range(4)]
+
+    # The two oldest frames were dropped when the buffer was full, the last read has no new frame
+    assert [frame.frame_id for frame in frames] == [3, 4, 5, 5]
+    assert [frame.image[0, 0, 0] for frame in frames] == [3, 4, 5, 5]
+    assert reader.dropped_frames == 2
+    assert reader.duplicated_frames == 1
+
+    capture.unblocked.set()
+    reader.stop()
+    assert capture.released.wait(timeout=1)
+
+
+def test_pause_parks_the_capture_thread(monkeypatch):
+    capture = SlowCapture(read_time=0.005)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0)
+    time.sleep(0.05)
+    reader.pause()
+
+    # A read in progress when pausing may still complete
+    time.sleep(0.05)
+    paused_read_count = capture.read_count
+    time.sleep(0.1)
+
+    assert capture.read_count == paused_read_count
+    assert reader.read() is None
+
+    reader.resume()
+    time.sleep(0.05)
+
+    assert capture.read_count > paused_read_count
+    assert reader.read().frame_id > paused_read_count
+
+    reader.stop()
+    assert capture.released.wait(timeout=1)
+
+
+def test_end_of_file_stops_the_capture(monkeypatch):
+    capture = SlowCapture(frame_limit=3, end_of_file=True)
+    monkeypatch.setattr(image_reader.cv2, 'VideoCapture', lambda source: capture)
+
+    reader = BufferedDynamicImageReader(0)
+
+    assert capture.released.wait(timeout=1)
+
+    reader._capture_thread.join(timeout=1)
+
+    assert not reader._capture_thread.is_alive()
+    assert not reader.ready()
+    assert reader.read() is None
+    assert capture.read_count == 3
@@ -0,0 +1,126 @@
+import itertools
+
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui.image_system.image_processor import ImageProcessorFunction, ImageProcessorSequenceSet
+from image_processing_gui.image_system.image_tiling import TiledStageExecutor
+
+
+TILE_SIZE = 64
+
+MORPH_OPERATIONS = (cv2.MORPH_ERODE, cv2.MORPH_DILATE, cv2.MORPH_OPEN, cv2.MORPH_CLOSE,
+                    cv2.MORPH_GRADIENT, cv2.MORPH_TOPHAT, cv2.MORPH_BLACKHAT)
+KERNEL_SHAPES = (cv2.MORPH_RECT, cv2.MORPH_ELLIPSE, cv2.MORPH_CROSS)
+KERNEL_SIZES = (3, 5, 9)
+ITERATIONS = (1, 2, 3)
+
+
+@pytest.fixture(scope='module')
+def tile_executor():
+    executor = TiledStageExecutor(max_workers=4, tile_size=TILE_SIZE)
+    yield executor
+    executor.shutdown()
+
+
+def create_image(channels: int, seed: int = 0):
+    # Not a multiple of the tile size, so that the last row and column of tiles are partial
+    shape = (211, 307) if channels == 1 else (211, 307, channels)
+    return np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def create_step(name, callback, source_keyword='src', return_index=-1, **arguments):
+    processor = ImageProcessorFunction(name=name, callback=callback, source_keyword=source_keyword,
+                                       return_index=return_index, enabled=True, **arguments)
+    return processor.compile_steps()[0]
+
+
+def assert_tiled_matches_untiled(tile_executor, step, image):
+    assert tile_executor.is_tiled(step, image)
+
+    expected = step.process(image)
+    tiled = tile_executor.process(step, image)
+
+    assert tiled.dtype == expected.dtype
+    assert tiled.shape == expected.shape
+    assert np.array_equal(tiled, expected)
+
+
+@pytest.mark.parametrize('channels', (1, 3))
+@pytest.mark.parametrize('operation, kernel_shape, kernel_size, iterations',
+                         list(itertools.product(MORPH_OPERATIONS, KERNEL_SHAPES, KERNEL_SIZES, ITERATIONS)))
+def test_morphology_tiled_matches_untiled(tile_executor, operation, kernel_shape, kernel_size, iterations, channels):
+    kernel = cv2.getStructuringElement(kernel_shape, (kernel_size, kernel_size))
+    step = create_step('morph', cv2.morphologyEx, op=operation, kernel=kernel, iterations=iterations)
+
+    assert_tiled_matches_untiled(tile_executor, step, create_image(channels))
+
+
+@pytest.mark.parametrize('channels', (1, 3))
+@pytest.mark.parametrize('threshold_type', (cv2.THRESH_BINARY, cv2.THRESH_BINARY_INV, cv2.THRESH_TRUNC,
+                                            cv2.THRESH_TOZERO, cv2.THRESH_TOZERO_INV))
+def test_threshold_runs_untiled(tile_executor, threshold_type, channels):
+    step = create_step('threshold', cv2.threshold, return_index=1, thresh=100, maxval=200, type=threshold_type)
+    image = create_image(channels)
+
+    # Point-wise stages have no halo, tiling them only adds the thread pool overhead
+    assert tile_executor.get_halo(step) == 0
+    assert not tile_executor.is_tiled(step, image)
+    assert np.array_equal(tile_executor.process(step, image), step.process(image))
+
+
+@pytest.mark.parametrize('code', (cv2.COLOR_BGR2GRAY, cv2.COLOR_BGR2HSV, cv2.COLOR_BGR2LAB))
+def test_color_conversion_runs_untiled(tile_executor, code):
+    step = create_step('cvt_color', cv2.cvtColor, code=code)
+    image = create_image(3)
+
+    assert tile_executor.get_halo(step) == 0
+    assert not tile_executor.is_tiled(step, image)
+    assert np.array_equal(tile_executor.process(step, image), step.process(image))
+
+
+def test_single_worker_and_small_images_run_untiled(tile_executor):
+    step = create_step('morph', cv2.morphologyEx, op=cv2.MORPH_DILATE, kernel=np.ones((3, 3), np.uint8), iterations=1)
+    single_worker_executor = TiledStageExecutor(max_workers=1, tile_size=TILE_SIZE)
+
+    assert not single_worker_executor.is_tiled(step, create_image(1))
+    assert not tile_executor.is_tiled(step, np.zeros((TILE_SIZE, TILE_SIZE * 3), np.uint8))
+    assert tile_executor.is_tiled(step, np.zeros((TILE_SIZE, TILE_SIZE * 4), np.uint8))
+
+
+@pytest.mark.parametrize('step', [
+    create_step('threshold', cv2.threshold, return_index=1, thresh=0, maxval=255, type=cv2.THRESH_BINARY | cv2.THRESH_OTSU),
+    create_step('threshold', cv2.threshold, return_index=1, thresh=0, maxval=255, type=cv2.THRESH_BINARY | cv2.THRESH_TRIANGLE),
+    create_step('canny', cv2.Canny, source_keyword='image', threshold1=50, threshold2=150),
+])
+def test_global_stages_run_untiled(tile_executor, step):
+    image = create_image(1)
+
+    assert tile_executor.get_halo(step) is None
+    assert not tile_executor.is_tiled(step, image)
+    assert np.array_equal(tile_executor.process(step, image), step.process(image))
+
+
+@pytest.mark.parametrize('channels', (1, 3))
+def test_tiled_sequence_matches_untiled(tile_executor, channels):
+    processor_set = ImageProcessorSequenceSet()
+    processor_set.add(ImageProcessorFunction(name='threshold', callback=cv2.threshold, source_keyword='src', return_index=1,
+                                             enabled=True, priority=1, thresh=90, maxval=255, type=cv2.THRESH_TOZERO))
+    processor_set.add(ImageProcessorFunction(name='morph', callback=cv2.morphologyEx, source_keyword='src', enabled=True,
+                                             priority=3, op=cv2.MORPH_CLOSE, kernel=np.ones((5, 5), np.uint8), iterations=2))
+
+    image = create_image(channels)
+
+    assert np.array_equal(tile_executor.process_sequence(processor_set, image), processor_set.process(image))
+
+
+def test_tiled_output_is_written_to_dst(tile_executor):
+    step = create_step('morph', cv2.morphologyEx, op=cv2.MORPH_DILATE, kernel=np.ones((3, 3), np.uint8), iterations=1)
+    image = create_image(1)
+    dst = np.empty_like(image)
+
+    output = tile_executor.process(step, image, dst)
+
+    assert output is dst
+    assert np.array_equal(output, step.process(image))
@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui.image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec
+
+
+THRESHOLD = {'operation': 'threshold', 'priority': 1, 'return_index': 1,
+             'parameters': {'type': 'THRESH_BINARY', 'thresh': 100, 'max_value': 255}}
+MORPH = {'operation': 'morph', 'priority': 3, 'return_index': -1,
+         'parameters': {'type': 'MORPH_CLOSE', 'iterations': 2, 'kernel': {'ndarray': [[1, 1, 1]] * 3, 'dtype': 'uint8'}}}
+
+
+def create_spec(*groups):
+    return OpenCVPipelineSpec.from_dict({'format': 1, 'groups': [list(group) for group in groups]})
+
+
+def with_parameters(stage_dict, **parameters):
+    return dict(stage_dict, parameters=dict(stage_dict['parameters'], **parameters))
+
+
+def test_fingerprint_ignores_the_way_numbers_are_written():
+    float_threshold = with_parameters(THRESHOLD, thresh=100.0, max_value=255.0)
+
+    assert create_spec([THRESHOLD]).fingerprint() == create_spec([float_threshold]).fingerprint()
+
+
+def test_fingerprint_ignores_the_order_stages_are_written_in():
+    assert create_spec([THRESHOLD, MORPH]).fingerprint() == create_spec([MORPH, THRESHOLD]).fingerprint()
+
+
+def test_fingerprint_keeps_the_order_of_groups():
+    assert create_spec([THRESHOLD], [MORPH]).fingerprint() != create_spec([MORPH], [THRESHOLD]).fingerprint()
+
+
+def test_fingerprint_changes_with_parameters():
+    assert create_spec([THRESHOLD]).fingerprint() != create_spec([with_parameters(THRESHOLD, thresh=100.5)]).fingerprint()
+
+
+@pytest.mark.parametrize('extension', ('.json', '.yaml'))
+def test_saved_spec_loads_with_the_same_fingerprint(tmp_path, extension):
+    spec = create_spec([MORPH, THRESHOLD])
+    path = str(tmp_path / f'pipeline{extension}')
+
+    if extension == '.yaml':
+        pytest.importorskip('yaml')
+
+    spec.save(path)
+
+    assert OpenCVPipelineSpec.load(path) == spec
+
+
+@pytest.mark.parametrize('extension', ('.json', '.yaml'))
+def test_identical_specs_are_saved_to_identical_files(tmp_path, extension):
+    if extension == '.yaml':
+        pytest.importorskip('yaml')
+
+    float_threshold = with_parameters(THRESHOLD, thresh=100.0, max_value=255.0)
+    first_path = tmp_path / f'first{extension}'
+    second_path = tmp_path / f'second{extension}'
+
+    create_spec([THRESHOLD, MORPH]).save(str(first_path))
+    create_spec([MORPH, float_threshold]).save(str(second_path))
+
+    assert first_path.read_bytes() == second_path.read_bytes()
+
+
+def test_built_pipeline_matches_the_spec():
+    spec = create_spec([THRESHOLD, MORPH])
+    image = np.random.default_rng(0).integers(0, 256, size=(64, 64), dtype=np.uint8)
+
+    expected = cv2.threshold(image, 100, 255, cv2.THRESH_BINARY)[1]
+    expected = cv2.morphologyEx(expected, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8), iterations=2)
+
+    assert np.array_equal(spec.build().process(image), expected)
+    assert OpenCVPipelineSpec.from_processors(spec.build()) == spec
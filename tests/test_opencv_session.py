@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import pytest
+
+from image_processing_gui.events.event_broker import EventBroker
+from image_processing_gui.events.event_constants import *
+from image_processing_gui.events.event_publisher import EventPublisher
+from image_processing_gui.events.event_recorder import EventReplayer
+from image_processing_gui.image_processing.opencv.opencv_pipeline import OpenCVPipelineSpec, OpenCVEventCodec
+from image_processing_gui.image_processing.opencv.opencv_session import OpenCVHeadlessSession
+from image_processing_gui.image_system.image_processor import ImageProcessorSequenceSet
+
+
+# Successive argument changes of the same stages, as a process panel publishes them
+STAGE_UPDATES = (
+    ('threshold', {'thresh': 50, 'maxval': 255, 'type': cv2.THRESH_BINARY}),
+    ('threshold', {'thresh': 100}),
+    ('morph', {'op': cv2.MORPH_OPEN, 'kernel': np.ones((3, 3), np.uint8), 'iterations': 1}),
+    ('threshold', {'thresh': 150, 'type': cv2.THRESH_TOZERO}),
+    ('morph', {'iterations': 3}),
+    ('threshold', {'thresh': 200})
+)
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, size=(64, 80, 3), dtype=np.uint8)
+    path = str(tmp_path / 'image.png')
+    cv2.imwrite(path, image)
+    return path
+
+
+def publish_updates(event_publisher: EventPublisher, image_path: str):
+    event_publisher.publish(MenuEvent.OPEN_IMAGE, filename=image_path)
+
+    # The panels mutate and publish the same processor on every change
+    stages = {}
+
+    for name, arguments in STAGE_UPDATES:
+        if name not in stages:
+            stages[name] = OpenCVPipelineSpec.build_stage({'name': name})
+
+        stages[name].add_argument(**arguments)
+        event_publisher.publish(ImageProcessingEvent.UPDATE_PROCESS, process=stages[name])
+
+
+def process_directly(image_path: str):
+    image = cv2.imread(image_path)
+    _, image = cv2.threshold(image, 200, 255, cv2.THRESH_TOZERO)
+    return cv2.morphologyEx(image, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8), iterations=3)
+
+
+def test_sequence_set_add_replaces_the_stage_of_the_same_name():
+    processor_set = ImageProcessorSequenceSet()
+    processor_set.add(OpenCVPipelineSpec.build_stage({'name': 'threshold', 'arguments': {'thresh': 50, 'maxval': 255, 'type': 0}}))
+
+    # A replayed update is a new processor object, not the one already in the set
+    stage = OpenCVPipelineSpec.build_stage({'name': 'threshold', 'arguments': {'thresh': 150, 'maxval': 255, 'type': 0}})
+    processor_set.add(stage)
+
+    assert len(processor_set.processor_sequence) == 1
+    assert processor_set.processor_sequence[0].argument_dict['thresh'] == 150
+
+    stage.enabled = False
+    processor_set.add(stage)
+
+    assert len(processor_set.processor_sequence) == 0
+
+
+def test_session_follows_every_change_of_a_stage(image_path):
+    event_broker = EventBroker()
+    session = OpenCVHeadlessSession(event_broker)
+
+    publish_updates(EventPublisher(event_broker), image_path)
+
+    assert np.array_equal(session.output, process_directly(image_path))
+
+
+def test_replayed_session_matches_the_direct_run(image_path, tmp_path):
+    session_path = str(tmp_path / 'session.jsonl')
+
+    event_broker = EventBroker()
+    recorded_session = OpenCVHeadlessSession(event_broker)
+    event_broker.start_recording(session_path, OpenCVEventCodec())
+
+    publish_updates(EventPublisher(event_broker), image_path)
+
+    event_broker.stop_recording()
+
+    event_replayer = EventReplayer(session_path, OpenCVEventCodec())
+
+    assert len(event_replayer) == len(STAGE_UPDATES) + 1
+
+    replay_broker = EventBroker()
+    replayed_session = OpenCVHeadlessSession(replay_broker)
+    event_replayer.replay(replay_broker, speed=None)
+
+    expected = process_directly(image_path)
+
+    assert np.array_equal(recorded_session.output, expected)
+    assert np.array_equal(replayed_session.output, expected)
+    assert len(replayed_session.run_times) == len(recorded_session.run_times)
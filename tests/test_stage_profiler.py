@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from image_processing_gui.image_system.stage_profiler import StageProfiler
+
+
+def record_calls(profiler, name, *milliseconds):
+    image = np.zeros((4, 4), dtype=np.uint8)
+
+    for duration in milliseconds:
+        with profiler._lock:
+            profiler.get_statistics(name).record(duration / 1000, image.shape, image.shape, 0)
+
+
+def test_snapshot_since_only_counts_the_calls_after_the_baseline():
+    profiler = StageProfiler(enabled=True)
+    record_calls(profiler, 'threshold', 1, 30)
+    record_calls(profiler, 'canny', 2)
+
+    baseline = profiler.snapshot()
+
+    record_calls(profiler, 'threshold', 3, 4)
+    profiler.record_exception('threshold')
+    record_calls(profiler, 'morph', 5)
+
+    snapshot = profiler.snapshot_since(baseline)
+
+    # canny was not called since the baseline
+    assert set(snapshot) == {'threshold', 'morph'}
+    assert snapshot['threshold']['calls'] == 2
+    assert snapshot['threshold']['exceptions'] == 1
+    assert snapshot['threshold']['total_ms'] == pytest.approx(7)
+    assert snapshot['threshold']['mean_ms'] == pytest.approx(3.5)
+    assert snapshot['threshold']['input_shapes'] == {(4, 4): 2}
+    assert sum(snapshot['threshold']['histogram']) == 2
+
+    # The 30 ms call is older than the baseline, the maximum is bounded by the bucket of the 4 ms call
+    assert 4 <= snapshot['threshold']['max_ms'] <= 5
+    assert 2.5 <= snapshot['threshold']['min_ms'] <= 3
+
+    assert snapshot['morph']['calls'] == 1
+    assert snapshot['morph']['max_ms'] == pytest.approx(5)
+
+    # The profiler itself is left untouched
+    assert profiler.snapshot()['threshold']['calls'] == 4
+
+
+def test_extremes_reached_after_the_baseline_are_exact():
+    profiler = StageProfiler(enabled=True)
+    record_calls(profiler, 'threshold', 2, 3)
+
+    baseline = profiler.snapshot()
+    record_calls(profiler, 'threshold', 1.2, 42)
+
+    snapshot = profiler.snapshot_since(baseline)
+
+    assert snapshot['threshold']['min_ms'] == pytest.approx(1.2)
+    assert snapshot['threshold']['max_ms'] == pytest.approx(42)
+
+
+def test_stages_reset_after_the_baseline_are_reported_whole():
+    profiler = StageProfiler(enabled=True)
+    record_calls(profiler, 'threshold', 1, 2, 3)
+
+    baseline = profiler.snapshot()
+    profiler.reset()
+    record_calls(profiler, 'threshold', 4)
+
+    assert profiler.snapshot_since(baseline) == profiler.snapshot()
+    assert 'threshold' in profiler.report(baseline)
+    assert profiler.report(profiler.snapshot()) == 'No stage profiled'
+
+
+def test_clearing_the_metrics_tab_keeps_the_shared_profiler(tk_root):
+    from image_processing_gui.console.console_metrics import ConsoleMetrics
+    from image_processing_gui.events.event_broker import EventBroker
+
+    profiler = StageProfiler.shared()
+    profiler.reset()
+    profiler.enabled = True
+
+    try:
+        record_calls(profiler, 'threshold', 1)
+        console_metrics = ConsoleMetrics(EventBroker(), tk_root)
+
+        console_metrics.on_clear()
+
+        assert profiler.snapshot()['threshold']['calls'] == 1
+        assert 'No stage profiled' in console_metrics.format_metrics()
+
+        record_calls(profiler, 'threshold', 2)
+
+        assert 'threshold' in console_metrics.format_metrics()
+
+        console_metrics.on_close()
+    finally:
+        profiler.enabled = False
+        profiler.reset()